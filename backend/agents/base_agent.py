@@ -7,6 +7,14 @@ from backend.database import DatabaseClient
 class BaseAgent:
     # Base class for all agents
     
+    # One logger per agent class, shared by its instances
+    logger = structlog.get_logger("BaseAgent")
+    
+    def __init_subclass__(cls, **kwargs: Any):
+        # Give each subclass its own named logger at class creation
+        super().__init_subclass__(**kwargs)
+        cls.logger = structlog.get_logger(cls.__name__)
+    
     def __init__(
         self, 
         llm: LLMClient, 
@@ -16,7 +24,6 @@ class BaseAgent:
         # Setup core clients
         self.llm = llm
         self.db = db
-        self.logger = structlog.get_logger(self.__class__.__name__)
         
         # Additional attributes can be passed via kwargs
         for key, value in kwargs.items():
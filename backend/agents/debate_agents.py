@@ -1,7 +1,11 @@
 # Bull and Bear analysts for debate
-from typing import Dict, Any
+from typing import Dict, Any, List, Set, Tuple, AsyncIterator
+import asyncio
+import functools
+import hashlib
 import structlog
-import json
+import orjson
+import numpy as np
 
 from .base_agent import BaseAgent
 from backend.database import DatabaseClient
@@ -9,16 +13,23 @@ from backend.clients import LLMClient
 from backend.database.models import Debate
 
 
+# Output caps; gpt-5 models spend part of this on hidden reasoning tokens
+_ARGUMENT_MAX_TOKENS = 1500
+_CONSENSUS_MAX_TOKENS = 1000
+
+
+async def _collect_stream(stream: AsyncIterator[str]) -> str:
+    # Join streamed deltas into the full reply
+    parts = []
+    async for delta in stream:
+        parts.append(delta)
+    return "".join(parts)
+
+
 class BullAgent(BaseAgent):
     # Bullish perspective
     
-    def __init__(self, db: DatabaseClient, llm: LLMClient):
-        super().__init__(llm=llm, db=db)
-    
-    def make_argument(self, ticker: str, context: Dict[str, Any]) -> str:
-        # Build bullish case
-        article_count = context.get("article_count", len(context.get("articles", [])))
-        system_prompt = f"""You are a bullish stock analyst. Make a compelling argument for why this stock is a good buy.
+    _SYSTEM_PROMPT_TEMPLATE = """You are a bullish stock analyst. Make a compelling argument for why this stock is a good buy.
 
 IMPORTANT: You have access to {article_count} news articles. You MUST base your argument on MULTIPLE independent news sources, not just one. Look for CONVERGING EVIDENCE across different sources.
 
@@ -29,30 +40,43 @@ Focus on:
 - Market opportunities mentioned in multiple independent reports
 
 Be specific and data-driven. Reference MULTIPLE news sources in your argument. If you only have one or two news sources, acknowledge this limitation."""
+    
+    def __init__(self, db: DatabaseClient, llm: LLMClient):
+        super().__init__(llm=llm, db=db)
+    
+    def _build_messages(self, ticker: str, context: Dict[str, Any]) -> List[Dict[str, str]]:
+        # Prompt for the bullish case
+        article_count = context.get("article_count", len(context.get("articles", [])))
+        system_prompt = self._SYSTEM_PROMPT_TEMPLATE.format_map({"article_count": article_count})
         
-        user_prompt = f"Make a bullish argument for {ticker}:\n\n{json.dumps(context, indent=2)}"
+        user_prompt = f"Make a bullish argument for {ticker}:\n\n{orjson.dumps(context, default=str).decode()}"
         
-        response = self.llm.chat_completion(
-            [
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt}
-            ],
-            temperature=0.8
+        return [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt}
+        ]
+    
+    def make_argument(self, ticker: str, context: Dict[str, Any]) -> str:
+        # Build bullish case
+        return self.llm.chat_completion(
+            self._build_messages(ticker, context),
+            temperature=0.8,
+            max_tokens=_ARGUMENT_MAX_TOKENS
         )
-        
-        return response
+    
+    async def amake_argument(self, ticker: str, context: Dict[str, Any]) -> str:
+        # Async bullish case for concurrent debates, streamed as it is generated
+        return await _collect_stream(self.llm.astream_chat_completion(
+            self._build_messages(ticker, context),
+            temperature=0.8,
+            max_tokens=_ARGUMENT_MAX_TOKENS
+        ))
 
 
 class BearAgent(BaseAgent):
     # Bearish perspective
     
-    def __init__(self, db: DatabaseClient, llm: LLMClient):
-        super().__init__(llm=llm, db=db)
-    
-    def make_argument(self, ticker: str, context: Dict[str, Any]) -> str:
-        # Build bearish case
-        article_count = context.get("article_count", len(context.get("articles", [])))
-        system_prompt = f"""You are a bearish stock analyst. Make a compelling argument for why this stock should be avoided or sold.
+    _SYSTEM_PROMPT_TEMPLATE = """You are a bearish stock analyst. Make a compelling argument for why this stock should be avoided or sold.
 
 IMPORTANT: You have access to {article_count} news articles. You MUST base your argument on MULTIPLE independent news sources, not just one. Look for CONVERGING EVIDENCE across different sources.
 
@@ -63,49 +87,172 @@ Focus on:
 - Market threats mentioned in multiple independent reports
 
 Be specific and data-driven. Reference MULTIPLE news sources in your argument. If you only have one or two news sources, acknowledge this limitation."""
+    
+    def __init__(self, db: DatabaseClient, llm: LLMClient):
+        super().__init__(llm=llm, db=db)
+    
+    def _build_messages(self, ticker: str, context: Dict[str, Any]) -> List[Dict[str, str]]:
+        # Prompt for the bearish case
+        article_count = context.get("article_count", len(context.get("articles", [])))
+        system_prompt = self._SYSTEM_PROMPT_TEMPLATE.format_map({"article_count": article_count})
         
-        user_prompt = f"Make a bearish argument for {ticker}:\n\n{json.dumps(context, indent=2)}"
+        user_prompt = f"Make a bearish argument for {ticker}:\n\n{orjson.dumps(context, default=str).decode()}"
         
-        response = self.llm.chat_completion(
-            [
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt}
-            ],
-            temperature=0.8
+        return [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt}
+        ]
+    
+    def make_argument(self, ticker: str, context: Dict[str, Any]) -> str:
+        # Build bearish case
+        return self.llm.chat_completion(
+            self._build_messages(ticker, context),
+            temperature=0.8,
+            max_tokens=_ARGUMENT_MAX_TOKENS
         )
-        
-        return response
+    
+    async def amake_argument(self, ticker: str, context: Dict[str, Any]) -> str:
+        # Async bearish case for concurrent debates, streamed as it is generated
+        return await _collect_stream(self.llm.astream_chat_completion(
+            self._build_messages(ticker, context),
+            temperature=0.8,
+            max_tokens=_ARGUMENT_MAX_TOKENS
+        ))
+
+
+@functools.lru_cache(maxsize=8)
+def _debaters(db: DatabaseClient, llm: LLMClient) -> Tuple[BullAgent, BearAgent]:
+    # Bull/Bear agents hold no per-debate state, so share one pair per client pair
+    return BullAgent(db, llm), BearAgent(db, llm)
 
 
 class DebateOrchestrator(BaseAgent):
     # Manages the debate flow
     
+    # Per-article and total character limits for debate context
+    _ARTICLE_MAX_CHARS = 1000
+    _ARTICLE_CHAR_BUDGET = 12000
+    # Shingle overlap above which two articles count as the same story
+    _NEAR_DUPLICATE_THRESHOLD = 0.8
+    # Embedding cosine similarity above which two articles count as the same story
+    _SEMANTIC_DUPLICATE_THRESHOLD = 0.9
+    # Prefix length hashed for exact-duplicate detection
+    _HASH_PREFIX_CHARS = 2000
+    
     def __init__(self, db: DatabaseClient, llm: LLMClient):
         super().__init__(llm=llm, db=db)
-        self.bull = BullAgent(db, llm)
-        self.bear = BearAgent(db, llm)
+        self.bull, self.bear = _debaters(db, llm)
     
-    def conduct_debate(self, ticker: str, trader_event_id: int) -> Debate:
-        # Run rounds and get consensus
+    @staticmethod
+    def _shingles(text: str, size: int = 5) -> Set[Tuple[str, ...]]:
+        # Word n-grams for cheap near-duplicate detection
+        words = text.lower().split()
+        return {tuple(words[i:i + size]) for i in range(max(1, len(words) - size + 1))}
+    
+    def _dedupe_articles(self, articles: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        # Exact dupes by hash, then rewrites by stored embedding similarity
+        unique = []
+        seen_hashes: Set[str] = set()
+        for article in articles:
+            text = article.get("content_text") or ""
+            if not text:
+                continue
+            digest = hashlib.md5(text[:self._HASH_PREFIX_CHARS].encode("utf-8")).hexdigest()
+            if digest in seen_hashes:
+                continue
+            seen_hashes.add(digest)
+            unique.append(article)
+        
+        embedded_ids = [a["id"] for a in unique if a.get("id") and a.get("has_embedding")]
+        if not embedded_ids:
+            return unique
+        
         try:
-            articles = self.db.get_recent_articles(ticker=ticker, hours=24)
-            snapshot = self.db.get_latest_snapshot(ticker)
-            recent_trades = self.db.get_recent_trades(ticker=ticker, days=30)
+            embeddings = self.db.get_article_embeddings(embedded_ids)
+        except Exception as e:
+            self.logger.warning("Semantic dedup skipped", error=str(e))
+            return unique
+        
+        # Greedy radius clustering: keep an article unless it sits close to one already kept
+        kept = []
+        centers: List[np.ndarray] = []
+        for article in unique:
+            vector = embeddings.get(article.get("id"))
+            if vector is not None:
+                vector = np.asarray(vector, dtype=np.float32)
+                norm = np.linalg.norm(vector)
+                if norm:
+                    vector = vector / norm
+                if centers and float(np.max(np.stack(centers) @ vector)) >= self._SEMANTIC_DUPLICATE_THRESHOLD:
+                    continue
+                centers.append(vector)
+            kept.append(article)
+        
+        return kept
+    
+    def _select_article_texts(self, articles: List[Dict[str, Any]]) -> List[str]:
+        # Keep one text per story until the character budget runs out
+        selected: List[str] = []
+        seen_shingles: List[Set[Tuple[str, ...]]] = []
+        budget = self._ARTICLE_CHAR_BUDGET
+        
+        for article in self._dedupe_articles(articles):
+            text = (article.get("content_text") or "")[:self._ARTICLE_MAX_CHARS]
+            if not text:
+                continue
+            if len(text) > budget:
+                break
             
-            # Use more articles to ensure multiple news sources are considered
-            # Take up to 20 articles to ensure we have multiple independent sources
-            article_texts = [a["content_text"][:1000] for a in articles[:20] if a.get("content_text")]
+            shingles = self._shingles(text)
+            if any(
+                len(shingles & other) / len(shingles | other) >= self._NEAR_DUPLICATE_THRESHOLD
+                for other in seen_shingles
+            ):
+                continue
             
-            context = {
-                "ticker": ticker,
-                "current_price": float(snapshot["price"]) if snapshot else None,
-                "articles": article_texts,
-                "article_count": len(article_texts),
-                "recent_trades": recent_trades[:5]
-            }
+            selected.append(text)
+            seen_shingles.append(shingles)
+            budget -= len(text)
+        
+        return selected
+    
+    async def _gather_arguments(self, ticker: str, context: Dict[str, Any]) -> Tuple[str, str]:
+        # Fire both sides concurrently
+        bull_argument, bear_argument = await asyncio.gather(
+            self.bull.amake_argument(ticker, context),
+            self.bear.amake_argument(ticker, context)
+        )
+        return bull_argument, bear_argument
+    
+    def _debate_context(self, ticker: str) -> Dict[str, Any]:
+        # Articles, price and trade history both sides argue from
+        articles = self.db.get_recent_articles(ticker=ticker, hours=24)
+        snapshot = self.db.get_latest_snapshot(ticker)
+        recent_trades = self.db.get_recent_trades(ticker=ticker, days=30, limit=5)
+        
+        # Drop duplicate wire copies and cap total prompt size, so
+        # article_count reflects independent sources
+        article_texts = self._select_article_texts(articles)
+        
+        return {
+            "ticker": ticker,
+            "current_price": snapshot.price if snapshot else None,
+            "articles": article_texts,
+            "article_count": len(article_texts),
+            "recent_trades": recent_trades
+        }
+    
+    def conduct_debate(self, ticker: str, trader_event_id: int) -> Debate:
+        # Run rounds and get consensus
+        return asyncio.run(self.aconduct_debate(ticker, trader_event_id))
+    
+    async def aconduct_debate(self, ticker: str, trader_event_id: int) -> Debate:
+        # Async debate so callers already on an event loop overlap it with other work
+        try:
+            context = await asyncio.to_thread(self._debate_context, ticker)
             
-            bull_argument = self.bull.make_argument(ticker, context)
-            bear_argument = self.bear.make_argument(ticker, context)
+            # Bull and bear are independent, so run both LLM calls at once
+            bull_argument, bear_argument = await self._gather_arguments(ticker, context)
             
             transcript = {
                 "rounds": [
@@ -126,9 +273,10 @@ BEAR ARGUMENT:
 
 Provide a balanced assessment."""
             
-            consensus = self.llm.chat_completion(
+            consensus = await self.llm.acached_chat_completion(
                 [{"role": "user", "content": consensus_prompt}],
-                temperature=0.7
+                temperature=0.7,
+                max_tokens=_CONSENSUS_MAX_TOKENS
             )
             
             debate = Debate(
@@ -141,7 +289,7 @@ Provide a balanced assessment."""
                 trader_agent_id=trader_event_id
             )
             
-            debate_id = self.db.save_debate(debate)
+            debate_id = await asyncio.to_thread(self.db.save_debate, debate)
             debate.id = debate_id
             
             self.logger.info("Debate conducted", ticker=ticker, debate_id=debate_id)
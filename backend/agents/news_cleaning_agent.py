@@ -1,63 +1,158 @@
 # Cleans raw HTML into structured data
-from typing import Dict, Any
-from datetime import datetime
+from typing import Dict, Any, List, Optional, Tuple
+from datetime import datetime, timezone
+import asyncio
+import re
 import structlog
+from dateutil.parser import isoparse
+from selectolax.parser import HTMLParser
 
 from .base_agent import BaseAgent
 from backend.clients import LLMClient
 from backend.database.models import ArticleCleaned
 
 
+# Boilerplate patterns stripped from rule-based extracts
+_URL_RE = re.compile(r"https?://\S+")
+_EMAIL_RE = re.compile(r"\b[\w.+-]+@[\w-]+\.[\w.-]+\b")
+_MULTI_SPACE_RE = re.compile(r"[ \t\xa0]+")
+_MULTI_NEWLINE_RE = re.compile(r"\s*\n\s*")
+# Ticker mentions like "(NASDAQ: AAPL)" or "$AAPL"
+_TICKER_RE = re.compile(r"\((?:NASDAQ|NYSE|AMEX|NYSEARCA)\s*:\s*([A-Z.]{1,6})\)|\$([A-Z]{1,5})\b")
+_STRIPPED_TAGS = "script, style, nav, aside, footer, form"
+
+
 class NewsCleaningAgent(BaseAgent):
     # Extracts news from HTML
     
+    # Below this much article text the rule-based extract is not trusted
+    _MIN_RULE_BASED_CHARS = 200
+    # Max concurrent LLM extractions in clean_articles
+    _LLM_CONCURRENCY = 16
+    
     def __init__(self, llm_client: LLMClient):
         super().__init__(llm=llm_client)
     
-    def clean_article(self, raw_html: str, raw_article_id: int) -> ArticleCleaned:
-        # Get JSON from LLM
-        try:
-            extracted = self.llm.extract_article_json(raw_html)
-            
-            if extracted.get("timestamp"):
-                try:
-                    from dateutil import parser
-                    timestamp = parser.isoparse(extracted["timestamp"])
-                except:
-                    timestamp = datetime.utcnow()
-            else:
-                timestamp = datetime.utcnow()
-            
-            cleaned = ArticleCleaned(
-                raw_article_id=raw_article_id,
-                title=extracted.get("title", "Unknown"),
-                ticker=extracted.get("ticker"),
-                content_text=extracted.get("content_text", ""),
-                is_usable=extracted.get("is_usable", False),
-                reason=extracted.get("reason"),
-                timestamp=timestamp,
-                llm_model=self.llm.chat_model,
-                llm_response=extracted
-            )
-            
-            self.logger.info(
-                "Article cleaned",
-                raw_id=raw_article_id,
-                usable=cleaned.is_usable,
-                ticker=cleaned.ticker
-            )
-            
-            return cleaned
+    def _parse_timestamp(self, value: Any) -> datetime:
+        # ISO timestamp or now
+        if value and isinstance(value, str):
+            try:
+                return isoparse(value)
+            except ValueError:
+                pass
+        return datetime.now(timezone.utc)
+    
+    def _rule_based_extract(self, raw_html: str, ticker: Optional[str]) -> Optional[Dict[str, Any]]:
+        # Cheap HTML parse, None when the result looks unreliable or the article may not be
+        # about the expected ticker; relevance is otherwise the LLM's call
+        if not ticker:
+            return None
+        tree = HTMLParser(raw_html)
+        
+        body = tree.css_first("article") or tree.css_first("main")
+        if body is None:
+            return None
+        
+        for node in body.css(_STRIPPED_TAGS):
+            node.decompose()
+        
+        text = body.text(separator="\n", strip=True)
+        text = _URL_RE.sub("", text)
+        text = _EMAIL_RE.sub("", text)
+        text = _MULTI_SPACE_RE.sub(" ", text)
+        text = _MULTI_NEWLINE_RE.sub("\n", text).strip()
+        if len(text) < self._MIN_RULE_BASED_CHARS:
+            return None
+        
+        ticker = ticker.upper()
+        if ticker not in {match.group(1) or match.group(2) for match in _TICKER_RE.finditer(text)}:
+            return None
+        
+        og_title = tree.css_first('meta[property="og:title"]')
+        og_title = (og_title.attributes.get("content") or "").strip() if og_title else ""
+        title_tag = tree.css_first("title")
+        title = og_title or (title_tag.text(strip=True) if title_tag else "") or "Unknown"
+        
+        time_tag = tree.css_first('meta[property="article:published_time"]')
         
+        return {
+            "title": title,
+            "ticker": ticker,
+            "content_text": text,
+            "is_usable": True,
+            "reason": "Extracted by rule-based parser",
+            "timestamp": time_tag.attributes.get("content") if time_tag else None
+        }
+    
+    def _build_cleaned(self, extracted: Dict[str, Any], raw_article_id: int, llm_model: Optional[str]) -> ArticleCleaned:
+        # Extract dict to model, llm_response only holds actual LLM output
+        cleaned = ArticleCleaned(
+            raw_article_id=raw_article_id,
+            title=extracted.get("title", "Unknown"),
+            ticker=extracted.get("ticker"),
+            content_text=extracted.get("content_text", ""),
+            is_usable=extracted.get("is_usable", False),
+            reason=extracted.get("reason"),
+            timestamp=self._parse_timestamp(extracted.get("timestamp")),
+            llm_model=llm_model,
+            llm_response=extracted if llm_model is not None else None
+        )
+        
+        self.logger.info(
+            "Article cleaned",
+            raw_id=raw_article_id,
+            usable=cleaned.is_usable,
+            ticker=cleaned.ticker,
+            used_llm=llm_model is not None
+        )
+        
+        return cleaned
+    
+    def _failed_article(self, raw_article_id: int, error: Exception) -> ArticleCleaned:
+        # Unusable placeholder when cleaning blows up
+        self.logger.error("Failed to clean article", raw_id=raw_article_id, error=str(error))
+        return ArticleCleaned(
+            raw_article_id=raw_article_id,
+            title="Error",
+            ticker=None,
+            content_text="",
+            is_usable=False,
+            reason=f"Cleaning failed: {str(error)}",
+            timestamp=datetime.now(timezone.utc)
+        )
+    
+    def clean_article(self, raw_html: str, raw_article_id: int, ticker: Optional[str] = None) -> ArticleCleaned:
+        # Parse locally, only fall back to the LLM when that fails; ticker is the symbol the article was scraped for
+        try:
+            extracted = self._rule_based_extract(raw_html, ticker)
+            llm_model = None
+            if extracted is None:
+                extracted = self.llm.extract_article_json(raw_html, ticker)
+                llm_model = self.llm.chat_model
+            return self._build_cleaned(extracted, raw_article_id, llm_model)
         except Exception as e:
-            self.logger.error("Failed to clean article", raw_id=raw_article_id, error=str(e))
-            return ArticleCleaned(
-                raw_article_id=raw_article_id,
-                title="Error",
-                ticker=None,
-                content_text="",
-                is_usable=False,
-                reason=f"Cleaning failed: {str(e)}",
-                timestamp=datetime.utcnow()
-            )
-
+            return self._failed_article(raw_article_id, e)
+    
+    def clean_articles(self, raw_items: List[Tuple[str, int, Optional[str]]]) -> List[ArticleCleaned]:
+        # Clean a batch of (raw_html, raw_article_id, ticker), LLM fallbacks run concurrently
+        if not raw_items:
+            return []
+        return asyncio.run(self._aclean_articles(raw_items))
+    
+    async def _aclean_articles(self, raw_items: List[Tuple[str, int, Optional[str]]]) -> List[ArticleCleaned]:
+        # Fan out with a cap on in-flight LLM requests
+        semaphore = asyncio.Semaphore(self._LLM_CONCURRENCY)
+        
+        async def clean_one(raw_html: str, raw_article_id: int, ticker: Optional[str]) -> ArticleCleaned:
+            try:
+                extracted = self._rule_based_extract(raw_html, ticker)
+                llm_model = None
+                if extracted is None:
+                    async with semaphore:
+                        extracted = await self.llm.aextract_article_json(raw_html, ticker)
+                    llm_model = self.llm.chat_model
+                return self._build_cleaned(extracted, raw_article_id, llm_model)
+            except Exception as e:
+                return self._failed_article(raw_article_id, e)
+        
+        return list(await asyncio.gather(*(clean_one(*item) for item in raw_items)))
@@ -1,8 +1,9 @@
 # Manages risk and executes orders
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Tuple
+from concurrent.futures import ThreadPoolExecutor
 from decimal import Decimal
 import structlog
-import json
+import orjson
 import time
 
 from .base_agent import BaseAgent
@@ -11,60 +12,13 @@ from backend.clients import LLMClient, AlpacaClient
 from backend.database.models import TradeProposal, ExecutedTrade
 
 
+_ZERO = Decimal("0")
+
+
 class PortfolioManagerAgent(BaseAgent):
     # Final approval and execution
     
-    def __init__(self, db: DatabaseClient, llm: LLMClient, alpaca: AlpacaClient):
-        super().__init__(llm=llm, db=db, alpaca=alpaca)
-    
-    def review_proposal(self, proposal: TradeProposal) -> Dict[str, Any]:
-        # Approve or reject based on risk rules
-        try:
-            account = self.alpaca.get_account()
-            positions = self.alpaca.get_positions()
-            recent_trades = self.db.get_recent_trades(days=7)
-            
-            current_position = None
-            for pos in positions:
-                if pos["symbol"] == proposal.ticker:
-                    current_position = pos
-                    break
-            
-            # Check if we need buying power for this trade
-            needs_buying_power = False
-            required_cash = 0.0
-            if proposal.action == "BUY" and proposal.quantity > 0:
-                # Estimate required cash (using proposed price or current price)
-                price = float(proposal.proposed_price) if proposal.proposed_price else 0.0
-                if price == 0 and current_position:
-                    price = current_position.get("current_price", 0.0)
-                if price == 0:
-                    # Fallback: get current price from snapshot
-                    snapshot = self.db.get_latest_snapshot(proposal.ticker)
-                    if snapshot:
-                        price = float(snapshot.get("price", 0.0))
-                
-                required_cash = price * proposal.quantity
-                needs_buying_power = required_cash > account.get("buying_power", 0.0)
-            
-            context = {
-                "proposal": {
-                    "ticker": proposal.ticker,
-                    "action": proposal.action,
-                    "quantity": proposal.quantity,
-                    "reasoning": proposal.reasoning,
-                    "confidence_score": proposal.confidence_score,
-                    "proposed_price": float(proposal.proposed_price) if proposal.proposed_price else None
-                },
-                "account": account,
-                "current_position": current_position,
-                "positions": positions,
-                "recent_trades": recent_trades[:10],
-                "needs_buying_power": needs_buying_power,
-                "required_cash": required_cash
-            }
-            
-            system_prompt = """You are a conservative portfolio manager. Review trade proposals and decide whether to approve or reject them.
+    _REVIEW_SYSTEM_PROMPT = """You are a conservative portfolio manager. Review trade proposals and decide whether to approve or reject them.
 
 CRITICAL TRADING RULES:
 - REJECT any proposal with confidence_score < 70 - we only trade on STRONG confidence
@@ -96,43 +50,201 @@ Return JSON:
 }
 
 REJECT if confidence_score < 70. REJECT if based on insufficient news sources."""
+    
+    _REBALANCE_SYSTEM_PROMPT = """You are a portfolio manager evaluating whether to sell an existing position to free up buying power for a new trade.
+
+The proposed trade requires more buying power than available. You need to decide:
+1. Is the proposed trade better than holding current positions?
+2. If yes, which position should be sold to free up the required cash?
+
+Consider:
+- The quality and confidence of the proposed trade
+- The performance and prospects of current positions
+- Recent news/headlines for each position
+- Portfolio diversification
+- Risk management
+
+Return JSON:
+{
+  "should_rebalance": true/false,
+  "reasoning": "Why you should or shouldn't rebalance",
+  "position_to_sell": ticker symbol to sell (if should_rebalance is true),
+  "sell_quantity": quantity to sell (if should_rebalance is true)
+}
+
+Only recommend selling if the proposed trade is clearly better than holding the current position."""
+    
+    _BATCH_REVIEW_SYSTEM_PROMPT = _REVIEW_SYSTEM_PROMPT + """
+
+BATCH MODE: You will receive several proposals under "proposals", all sharing the portfolio state given above them.
+Review each one independently and return JSON:
+{
+  "decisions": [one decision object per proposal, in the same order, using the structure above]
+}"""
+    
+    # Shared portfolio state goes before this marker and per-proposal data after it,
+    # so consecutive calls share the longest possible cached prompt prefix
+    _PROPOSAL_SEPARATOR = "\n---PROPOSAL---\n"
+    
+    # Output cap per decision; gpt-5 models spend part of this on hidden reasoning tokens
+    _DECISION_MAX_TOKENS = 1000
+    # Reuse account/positions fetched within this many seconds
+    _ACCOUNT_STATE_TTL = 5.0
+    # Rebalance sells: how long and how often to poll for the fill
+    _FILL_TIMEOUT = 2.0
+    _FILL_POLL_INTERVAL = 0.05
+    _SETTLED_ORDER_STATUSES = frozenset({"filled", "partially_filled", "canceled", "expired", "rejected"})
+    
+    def __init__(self, db: DatabaseClient, llm: LLMClient, alpaca: AlpacaClient):
+        super().__init__(llm=llm, db=db, alpaca=alpaca)
+        self._account_state: Optional[Tuple[float, Dict[str, Any], List[Dict[str, Any]], Dict[str, Dict[str, Any]]]] = None
+    
+    def _fetch_account_state(self) -> Tuple[Dict[str, Any], List[Dict[str, Any]], Dict[str, Dict[str, Any]]]:
+        # Account, positions and a symbol -> position map, remembered for execute_trade
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            account_future = pool.submit(self.alpaca.get_account)
+            positions_future = pool.submit(self.alpaca.get_positions)
+            account, positions = account_future.result(), positions_future.result()
+        positions_by_symbol = {pos["symbol"]: pos for pos in positions}
+        self._account_state = (time.monotonic(), account, positions, positions_by_symbol)
+        return account, positions, positions_by_symbol
+    
+    def _get_account_state(self) -> Tuple[Dict[str, Any], List[Dict[str, Any]], Dict[str, Dict[str, Any]]]:
+        # Recent snapshot if still fresh, otherwise refetch
+        if self._account_state is not None:
+            fetched_at, account, positions, positions_by_symbol = self._account_state
+            if time.monotonic() - fetched_at < self._ACCOUNT_STATE_TTL:
+                return account, positions, positions_by_symbol
+        return self._fetch_account_state()
+    
+    @staticmethod
+    def _dump(value: Any) -> str:
+        # Stable JSON rendering for prompts
+        return orjson.dumps(value, default=str, option=orjson.OPT_INDENT_2).decode()
+    
+    def _proposal_context(
+        self,
+        proposal: TradeProposal,
+        account: Dict[str, Any],
+        positions_by_symbol: Dict[str, Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        # Per-proposal facts: sizing, cash needs and existing position
+        current_position = positions_by_symbol.get(proposal.ticker)
+        
+        # Check if we need buying power for this trade
+        needs_buying_power = False
+        required_cash = _ZERO
+        if proposal.action == "BUY" and proposal.quantity > 0:
+            # Estimate required cash (using proposed price or current price)
+            price = proposal.proposed_price or _ZERO
+            if price == 0 and current_position:
+                price = current_position.get("current_price") or _ZERO
+            if price == 0:
+                # Fallback: get current price from snapshot
+                snapshot = self.db.get_latest_snapshot(proposal.ticker)
+                if snapshot:
+                    price = Decimal(str(snapshot.price))
+            
+            required_cash = price * proposal.quantity
+            needs_buying_power = required_cash > account.get("buying_power", _ZERO)
+        
+        return {
+            "proposal": {
+                "ticker": proposal.ticker,
+                "action": proposal.action,
+                "quantity": proposal.quantity,
+                "reasoning": proposal.reasoning,
+                "confidence_score": proposal.confidence_score,
+                "proposed_price": proposal.proposed_price
+            },
+            "current_position": current_position,
+            "needs_buying_power": needs_buying_power,
+            "required_cash": required_cash
+        }
+    
+    def _finalize_decision(
+        self,
+        proposal: TradeProposal,
+        decision: Dict[str, Any],
+        needs_buying_power: bool
+    ) -> Dict[str, Any]:
+        # Apply hard rules on top of the LLM verdict
+        # Enforce minimum confidence threshold - reject if below 70
+        confidence_score = proposal.confidence_score or 0
+        if confidence_score < 70 and decision.get("decision") == "APPROVE":
+            self.logger.warning(
+                "Rejecting proposal due to low confidence",
+                proposal_id=proposal.id,
+                confidence=confidence_score,
+                required=70
+            )
+            decision["decision"] = "REJECT"
+            decision["reasoning"] = f"{decision.get('reasoning', '')} [Rejected: Confidence {confidence_score} < 70 required]"
+        
+        self.logger.info(
+            "Proposal reviewed",
+            proposal_id=proposal.id,
+            decision=decision.get("decision"),
+            ticker=proposal.ticker,
+            confidence=confidence_score,
+            needs_buying_power=needs_buying_power,
+            position_to_sell=decision.get("position_to_sell")
+        )
+        
+        return decision
+    
+    def _low_confidence_rejection(self, proposal: TradeProposal) -> Optional[Dict[str, Any]]:
+        # Hard reject below 70 confidence without asking the LLM
+        confidence_score = proposal.confidence_score or 0
+        if confidence_score >= 70:
+            return None
+        self.logger.debug(
+            "Skipping review for low confidence proposal",
+            proposal_id=proposal.id,
+            ticker=proposal.ticker,
+            confidence=confidence_score,
+            required=70
+        )
+        return {
+            "decision": "REJECT",
+            "reasoning": f"Confidence {confidence_score} < 70 required"
+        }
+    
+    def review_proposal(self, proposal: TradeProposal) -> Dict[str, Any]:
+        # Approve or reject based on risk rules
+        rejection = self._low_confidence_rejection(proposal)
+        if rejection is not None:
+            return rejection
+        
+        try:
+            account, positions, positions_by_symbol = self._fetch_account_state()
+            recent_trades = self.db.get_recent_trades(days=7, limit=10)
+            
+            portfolio = {
+                "account": account,
+                "positions": positions,
+                "recent_trades": recent_trades,
+            }
+            context = self._proposal_context(proposal, account, positions_by_symbol)
             
-            user_prompt = f"Review this trade proposal:\n\n{json.dumps(context, indent=2)}"
+            user_prompt = (
+                f"Portfolio state:\n{self._dump(portfolio)}"
+                f"{self._PROPOSAL_SEPARATOR}"
+                f"Review this trade proposal:\n{self._dump(context)}"
+            )
             
             response = self.llm.chat_completion(
                 [
-                    {"role": "system", "content": system_prompt},
+                    {"role": "system", "content": self._REVIEW_SYSTEM_PROMPT},
                     {"role": "user", "content": user_prompt}
                 ],
                 temperature=0.5,
-                response_format={"type": "json_object"}
-            )
-            
-            decision = json.loads(response)
-            
-            # Enforce minimum confidence threshold - reject if below 70
-            confidence_score = proposal.confidence_score or 0
-            if confidence_score < 70 and decision.get("decision") == "APPROVE":
-                self.logger.warning(
-                    "Rejecting proposal due to low confidence",
-                    proposal_id=proposal.id,
-                    confidence=confidence_score,
-                    required=70
-                )
-                decision["decision"] = "REJECT"
-                decision["reasoning"] = f"{decision.get('reasoning', '')} [Rejected: Confidence {confidence_score} < 70 required]"
-            
-            self.logger.info(
-                "Proposal reviewed",
-                proposal_id=proposal.id,
-                decision=decision.get("decision"),
-                ticker=proposal.ticker,
-                confidence=confidence_score,
-                needs_buying_power=needs_buying_power,
-                position_to_sell=decision.get("position_to_sell")
+                response_format={"type": "json_object"},
+                max_tokens=self._DECISION_MAX_TOKENS
             )
             
-            return decision
+            decision = orjson.loads(response)
+            return self._finalize_decision(proposal, decision, context["needs_buying_power"])
         
         except Exception as e:
             self.logger.error("Failed to review proposal", proposal_id=proposal.id, error=str(e))
@@ -141,24 +253,83 @@ REJECT if confidence_score < 70. REJECT if based on insufficient news sources.""
                 "reasoning": f"Review failed: {str(e)}"
             }
     
+    def review_proposals(self, proposals: List[TradeProposal]) -> List[Dict[str, Any]]:
+        # Review a batch in one LLM call, sharing account and trade lookups
+        if not proposals:
+            return []
+        
+        # Low-confidence proposals are rejected up front, only the rest go to the LLM
+        results: List[Optional[Dict[str, Any]]] = [self._low_confidence_rejection(p) for p in proposals]
+        pending = [i for i, r in enumerate(results) if r is None]
+        if len(pending) > 1:
+            for i, decision in zip(pending, self._review_batch([proposals[i] for i in pending])):
+                results[i] = decision
+        elif pending:
+            results[pending[0]] = self.review_proposal(proposals[pending[0]])
+        return results
+    
+    def _review_batch(self, proposals: List[TradeProposal]) -> List[Dict[str, Any]]:
+        # One LLM call for several proposals
+        try:
+            account, positions, positions_by_symbol = self._fetch_account_state()
+            recent_trades = self.db.get_recent_trades(days=7, limit=10)
+            
+            portfolio = {
+                "account": account,
+                "positions": positions,
+                "recent_trades": recent_trades,
+            }
+            proposal_contexts = [self._proposal_context(p, account, positions_by_symbol) for p in proposals]
+            
+            user_prompt = (
+                f"Portfolio state:\n{self._dump(portfolio)}"
+                f"{self._PROPOSAL_SEPARATOR}"
+                f"Review these trade proposals:\n{self._dump({'proposals': proposal_contexts})}"
+            )
+            
+            response = self.llm.chat_completion(
+                [
+                    {"role": "system", "content": self._BATCH_REVIEW_SYSTEM_PROMPT},
+                    {"role": "user", "content": user_prompt}
+                ],
+                temperature=0.5,
+                response_format={"type": "json_object"},
+                max_tokens=self._DECISION_MAX_TOKENS * len(proposals)
+            )
+            
+            decisions = orjson.loads(response).get("decisions")
+            if not isinstance(decisions, list) or len(decisions) != len(proposals):
+                raise ValueError("Batch review returned wrong number of decisions")
+        
+        except Exception as e:
+            # Fall back to one call per proposal
+            self.logger.warning("Batch review failed, reviewing individually", count=len(proposals), error=str(e))
+            return [self.review_proposal(p) for p in proposals]
+        
+        return [
+            self._finalize_decision(p, dict(d) if isinstance(d, dict) else {"decision": "REJECT", "reasoning": "Malformed batch decision"}, c["needs_buying_power"])
+            for p, d, c in zip(proposals, decisions, proposal_contexts)
+        ]
+    
     def _evaluate_position_to_sell(
         self, 
         proposal: TradeProposal, 
         positions: list, 
-        required_cash: float
+        required_cash: Decimal
     ) -> Optional[Dict[str, Any]]:
         # Check if we should rebalance to fund this trade
         if not positions:
             return None
         
-        # Get recent articles and snapshots for all positions
+        # Skip the ticker we're trying to buy
+        candidates = [pos for pos in positions if pos["symbol"] != proposal.ticker]
+        
+        # Get recent articles for all positions in one round trip
+        articles_by_symbol = self.db.get_recent_articles_bulk([pos["symbol"] for pos in candidates], hours=24, preview_only=True)
+        
         position_data = []
-        for pos in positions:
-            if pos["symbol"] == proposal.ticker:
-                continue  # Skip the ticker we're trying to buy
-            
-            snapshot = self.db.get_latest_snapshot(pos["symbol"])
-            recent_articles = self.db.get_recent_articles(ticker=pos["symbol"], hours=24)
+        for pos in candidates:
+            recent_articles = articles_by_symbol.get(pos["symbol"], [])
             
             position_data.append({
                 "symbol": pos["symbol"],
@@ -182,46 +353,27 @@ REJECT if confidence_score < 70. REJECT if based on insufficient news sources.""
                 "reasoning": proposal.reasoning,
                 "confidence_score": proposal.confidence_score
             },
-            "required_cash": required_cash,
-            "current_positions": position_data
+            "required_cash": required_cash
         }
         
-        system_prompt = """You are a portfolio manager evaluating whether to sell an existing position to free up buying power for a new trade.
-
-The proposed trade requires more buying power than available. You need to decide:
-1. Is the proposed trade better than holding current positions?
-2. If yes, which position should be sold to free up the required cash?
-
-Consider:
-- The quality and confidence of the proposed trade
-- The performance and prospects of current positions
-- Recent news/headlines for each position
-- Portfolio diversification
-- Risk management
-
-Return JSON:
-{
-  "should_rebalance": true/false,
-  "reasoning": "Why you should or shouldn't rebalance",
-  "position_to_sell": ticker symbol to sell (if should_rebalance is true),
-  "sell_quantity": quantity to sell (if should_rebalance is true)
-}
-
-Only recommend selling if the proposed trade is clearly better than holding the current position."""
-        
-        user_prompt = f"Evaluate if we should sell a position to free up buying power:\n\n{json.dumps(context, indent=2)}"
+        user_prompt = (
+            f"Current positions:\n{self._dump(position_data)}"
+            f"{self._PROPOSAL_SEPARATOR}"
+            f"Evaluate if we should sell a position to free up buying power:\n{self._dump(context)}"
+        )
         
         try:
             response = self.llm.chat_completion(
                 [
-                    {"role": "system", "content": system_prompt},
+                    {"role": "system", "content": self._REBALANCE_SYSTEM_PROMPT},
                     {"role": "user", "content": user_prompt}
                 ],
                 temperature=0.5,
-                response_format={"type": "json_object"}
+                response_format={"type": "json_object"},
+                max_tokens=self._DECISION_MAX_TOKENS
             )
             
-            evaluation = json.loads(response)
+            evaluation = orjson.loads(response)
             
             if evaluation.get("should_rebalance") and evaluation.get("position_to_sell"):
                 self.logger.info(
@@ -242,6 +394,26 @@ Only recommend selling if the proposed trade is clearly better than holding the
             self.logger.error("Failed to evaluate position to sell", error=str(e))
             return None
     
+    @staticmethod
+    def _client_order_id(proposal: TradeProposal, leg: str) -> Optional[str]:
+        # Deterministic Alpaca client order id per proposal and leg, so the same order is never placed twice
+        return f"proposal-{proposal.id}-{leg}" if proposal.id else None
+    
+    def _wait_for_fill(self, order: Dict[str, Any]) -> Optional[str]:
+        # Poll until the order fills or settles, capped at _FILL_TIMEOUT; a failed poll is retried next interval
+        order_id = order.get("id")
+        status = order.get("status")
+        deadline = time.monotonic() + self._FILL_TIMEOUT
+        while status not in self._SETTLED_ORDER_STATUSES and order_id and time.monotonic() < deadline:
+            time.sleep(self._FILL_POLL_INTERVAL)
+            try:
+                status = self.alpaca.get_order(order_id).get("status")
+            except Exception as e:
+                self.logger.warning("Failed to poll order status", order_id=order_id, error=str(e))
+        
+        self.logger.debug("Order settle wait finished", order_id=order_id, status=status)
+        return status
+    
     def execute_trade(self, proposal: TradeProposal, decision: Dict[str, Any]) -> Optional[ExecutedTrade]:
         # Send order to Alpaca
         if decision.get("decision") != "APPROVE":
@@ -250,27 +422,31 @@ Only recommend selling if the proposed trade is clearly better than holding the
             return None
         
         try:
+            # A resumed run may reach here again for a trade that already went through
+            if proposal.id:
+                existing = self.db.get_executed_trade_for_proposal(proposal.id)
+                if existing:
+                    self.logger.info("Proposal already executed, not resubmitting", proposal_id=proposal.id, trade_id=existing.id)
+                    return existing
+            
             # Check if we need to sell a position first to free up buying power
             position_to_sell = decision.get("position_to_sell")
             sell_quantity = decision.get("sell_quantity")
             
             if position_to_sell and sell_quantity and proposal.action == "BUY":
-                # First, check if we still need to sell (buying power might have changed)
-                account = self.alpaca.get_account()
-                price = float(proposal.proposed_price) if proposal.proposed_price else 0.0
+                # First, check if we still need to sell (reuses the review snapshot if fresh)
+                account, positions, positions_by_symbol = self._get_account_state()
+                price = proposal.proposed_price or _ZERO
                 if price == 0:
                     snapshot = self.db.get_latest_snapshot(proposal.ticker)
                     if snapshot:
-                        price = float(snapshot.get("price", 0.0))
+                        price = Decimal(str(snapshot.price))
                 
                 required_cash = price * proposal.quantity
                 
-                if required_cash > account.get("buying_power", 0.0):
+                if required_cash > account.get("buying_power", _ZERO):
                     # Verify the position still exists and we should still sell it
-                    positions = self.alpaca.get_positions()
-                    position_exists = any(pos["symbol"] == position_to_sell for pos in positions)
-                    
-                    if not position_exists:
+                    if position_to_sell not in positions_by_symbol:
                         self.logger.warning(
                             "Position to sell no longer exists",
                             ticker=position_to_sell,
@@ -294,8 +470,11 @@ Only recommend selling if the proposed trade is clearly better than holding the
                             symbol=position_to_sell,
                             qty=int(sell_quantity),
                             side="SELL",
-                            order_type="market"
+                            order_type="market",
+                            client_order_id=self._client_order_id(proposal, "sell")
                         )
+                        # Buying power moved, the cached account state is stale
+                        self._account_state = None
                         
                         self.logger.info(
                             "Sell order executed for rebalancing",
@@ -303,8 +482,8 @@ Only recommend selling if the proposed trade is clearly better than holding the
                             order_id=sell_order.get("id")
                         )
                         
-                        # Wait a moment for the order to settle (buying power to update)
-                        time.sleep(2)
+                        # Wait for the fill so buying power is updated
+                        self._wait_for_fill(sell_order)
                     elif rebalance_decision is None:
                         # Evaluation didn't recommend selling, but we'll proceed with original decision
                         # as it was already approved in review_proposal
@@ -318,8 +497,11 @@ Only recommend selling if the proposed trade is clearly better than holding the
                             symbol=position_to_sell,
                             qty=int(sell_quantity),
                             side="SELL",
-                            order_type="market"
+                            order_type="market",
+                            client_order_id=self._client_order_id(proposal, "sell")
                         )
+                        # Buying power moved, the cached account state is stale
+                        self._account_state = None
                         
                         self.logger.info(
                             "Sell order executed for rebalancing",
@@ -327,7 +509,7 @@ Only recommend selling if the proposed trade is clearly better than holding the
                             order_id=sell_order.get("id")
                         )
                         
-                        time.sleep(2)
+                        self._wait_for_fill(sell_order)
                     else:
                         # Evaluation recommends selling a different position - reject for safety
                         self.logger.warning(
@@ -345,10 +527,12 @@ Only recommend selling if the proposed trade is clearly better than holding the
                 symbol=proposal.ticker,
                 qty=quantity,
                 side=proposal.action,
-                order_type="market"
+                order_type="market",
+                client_order_id=self._client_order_id(proposal, "main")
             )
+            self._account_state = None
             
-            execution_price = Decimal(str(order.get("price", 0)))
+            execution_price = Decimal(str(order["price"])) if order.get("price") else _ZERO
             if execution_price == 0 and proposal.proposed_price:
                 execution_price = proposal.proposed_price
             
@@ -363,8 +547,7 @@ Only recommend selling if the proposed trade is clearly better than holding the
                 status="FILLED"
             )
             
-            trade_id = self.db.save_executed_trade(executed_trade)
-            self.db.update_proposal_status(proposal.id, "EXECUTED")
+            trade_id = self.db.save_executed_trade(executed_trade, mark_proposal_executed=True)
             executed_trade.id = trade_id
             
             self.logger.info(
@@ -1,53 +1,32 @@
 # Analyzes headlines and proposes trades
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from datetime import datetime, timedelta
+import asyncio
+import re
+from concurrent.futures import ThreadPoolExecutor
 import structlog
-import json
+import orjson
 
 from .base_agent import BaseAgent
 from backend.database import DatabaseClient
 from backend.clients import LLMClient, FinnhubClient
-from backend.database.models import AnalysisEvent, TradeProposal
+from backend.database.models import AnalysisEvent, TradeProposal, StockSnapshot, SnapshotView
+
+
+# The headline verdict exactly as the prompt's schema lays it out; anything else goes through orjson
+_ANALYSIS_RE = re.compile(
+    r'\s*\{\s*"is_interesting"\s*:\s*(true|false)\s*,'
+    r'\s*"reasoning"\s*:\s*("(?:[^"\\]|\\.)*")\s*,'
+    r'\s*"confidence"\s*:\s*(\d+)\s*\}\s*'
+)
 
 
 class TraderAgent(BaseAgent):
     # Main trading logic
     
-    def __init__(self, db: DatabaseClient, llm: LLMClient, finnhub: FinnhubClient):
-        super().__init__(llm=llm, db=db, finnhub=finnhub)
-    
-    def analyze_ticker(self, ticker: str) -> Dict[str, Any]:
-        # Scan headlines to see if it's worth a debate
-        try:
-            # Get only recent article headlines (not full content)
-            articles = self.db.get_recent_articles(ticker=ticker, hours=24)
-            snapshot = self.db.get_latest_snapshot(ticker)
-            
-            if not snapshot:
-                snapshot_data = self.finnhub.get_stock_snapshot(ticker)
-                from backend.database.models import StockSnapshot
-                snapshot_id = self.db.save_stock_snapshot(StockSnapshot(**snapshot_data))
-                snapshot = self.db.get_latest_snapshot(ticker)
-            
-            # Only use headlines, not article content
-            context = {
-                "ticker": ticker,
-                "current_price": float(snapshot["price"]) if snapshot else None,
-                "price_change": float(snapshot.get("price_change", 0)) if snapshot else 0,
-                "price_change_percent": float(snapshot.get("price_change_percent", 0)) if snapshot else 0,
-                "recent_headlines_count": len(articles),
-                "headlines": [
-                    {
-                        "title": a.get("title", "No title"),
-                        "timestamp": str(a.get("timestamp", "")) if a.get("timestamp") else ""
-                    }
-                    for a in articles[:30]  # Look at up to 30 headlines
-                ]
-            }
-            
-            system_prompt = """You are a swing trading analyst. Your job is to scan news HEADLINES (not full articles) for a stock ticker and decide if it warrants deeper analysis through a debate.
+    _HEADLINE_SYSTEM_PROMPT = """You are a swing trading analyst. Your job is to scan news HEADLINES (not full articles) for a stock ticker and decide if it warrants deeper analysis through a debate.
 
-You can ONLY see headlines - you cannot read full article content. Based on headlines alone, determine if:
+You can ONLY see headlines - you cannot read full article content. Each headline is given as {"t": title, "ts": publish time}, newest first. Based on headlines alone, determine if:
 - There are significant news events (earnings, product launches, regulatory changes, etc.)
 - The headlines suggest potential trading opportunities
 - The news volume and sentiment warrant a deeper debate
@@ -60,45 +39,120 @@ Return JSON:
 }
 
 If is_interesting is true, a debate will be triggered where analysts will read full articles and conduct deep analysis."""
+    
+    _BATCH_HEADLINE_SYSTEM_PROMPT = _HEADLINE_SYSTEM_PROMPT + """
+
+BATCH MODE: You will receive a JSON array with one entry per ticker. Judge each ticker independently and return JSON:
+{
+  "results": [{"ticker": "...", "is_interesting": true/false, "reasoning": "...", "confidence": 0-100}, one entry per input ticker]
+}"""
+    
+    # System messages are shared objects; each call only adds its user message
+    _HEADLINE_SYSTEM_MESSAGE = {"role": "system", "content": _HEADLINE_SYSTEM_PROMPT}
+    _BATCH_HEADLINE_SYSTEM_MESSAGE = {"role": "system", "content": _BATCH_HEADLINE_SYSTEM_PROMPT}
+    
+    # Most recent headlines sent per ticker
+    _MAX_HEADLINES = 10
+    # Tickers per batched headline call (up to 10 headlines each keeps prompts around 2K tokens)
+    _ANALYSIS_BATCH_SIZE = 5
+    # Batched headline calls in flight at once
+    _ANALYSIS_CONCURRENCY = 4
+    # Single-ticker fallbacks in flight at once (I/O bound, the LLM limiter allows bursts)
+    _SINGLE_ANALYSIS_WORKERS = 32
+    
+    def __init__(self, db: DatabaseClient, llm: LLMClient, finnhub: FinnhubClient):
+        super().__init__(llm=llm, db=db, finnhub=finnhub)
+    
+    def _ensure_snapshot(self, ticker: str) -> Optional[SnapshotView]:
+        # Fetch from Finnhub and store, the saved row is the latest snapshot
+        snapshot_data = self.finnhub.get_stock_snapshot(ticker)
+        return self.db.save_stock_snapshot(StockSnapshot(**snapshot_data))
+    
+    def _headline_context(
+        self,
+        ticker: str,
+        articles: List[Dict[str, Any]],
+        snapshot: Optional[SnapshotView]
+    ) -> Dict[str, Any]:
+        # Only use headlines, not article content
+        return {
+            "ticker": ticker,
+            "current_price": snapshot.price if snapshot else None,
+            "price_change": snapshot.price_change if snapshot else 0,
+            "price_change_percent": snapshot.price_change_percent if snapshot else 0,
+            "recent_headlines_count": len(articles),
+            # Newest first, short keys and minute-precision times keep the prompt small
+            "headlines": [
+                {
+                    "t": a.get("title", "No title"),
+                    "ts": a["timestamp"].isoformat(timespec="minutes") if isinstance(a.get("timestamp"), datetime) else str(a.get("timestamp") or "")
+                }
+                for a in articles[:self._MAX_HEADLINES]
+            ]
+        }
+    
+    @staticmethod
+    def _parse_analysis(response: str) -> Dict[str, Any]:
+        # Fast path for the flat verdict object, full JSON decode for any other shape
+        match = _ANALYSIS_RE.fullmatch(response)
+        if match is None:
+            return orjson.loads(response)
+        return {
+            "is_interesting": match.group(1) == "true",
+            "reasoning": orjson.loads(match.group(2)),
+            "confidence": int(match.group(3))
+        }
+    
+    def _analysis_event(self, context: Dict[str, Any], analysis: Dict[str, Any]) -> AnalysisEvent:
+        # Headline verdict as a stored pipeline step
+        return AnalysisEvent(
+            ticker=context["ticker"],
+            event_type="ticker_analysis",
+            reasoning=analysis.get("reasoning", ""),
+            input_data=context,
+            output_data=analysis,
+            agent_name="trader_agent"
+        )
+    
+    def _analysis_result(self, context: Dict[str, Any], analysis: Dict[str, Any], event_id: Optional[int]) -> Dict[str, Any]:
+        # Log and shape the value returned to the graph
+        self.logger.info(
+            "Ticker analyzed from headlines",
+            ticker=context["ticker"],
+            interesting=analysis.get("is_interesting"),
+            confidence=analysis.get("confidence", 0),
+            article_count=context["recent_headlines_count"]
+        )
+        return {
+            "event_id": event_id,
+            "analysis": analysis,
+            "ticker": context["ticker"]
+        }
+    
+    def analyze_ticker(self, ticker: str) -> Dict[str, Any]:
+        # Scan headlines to see if it's worth a debate
+        try:
+            # Get only recent article headlines (not full content)
+            articles = self.db.get_recent_articles(ticker=ticker, hours=24, preview_only=True)
+            snapshot = self.db.get_latest_snapshot(ticker) or self._ensure_snapshot(ticker)
             
-            user_prompt = f"Analyze headlines for this ticker:\n\n{json.dumps(context, indent=2)}"
+            context = self._headline_context(ticker, articles, snapshot)
+            
+            user_prompt = f"Analyze headlines for this ticker:\n\n{orjson.dumps(context, default=str).decode()}"
             
             response = self.llm.chat_completion(
                 [
-                    {"role": "system", "content": system_prompt},
+                    self._HEADLINE_SYSTEM_MESSAGE,
                     {"role": "user", "content": user_prompt}
                 ],
                 temperature=0.7,
                 response_format={"type": "json_object"}
             )
             
-            analysis = json.loads(response)
-            
-            confidence = analysis.get("confidence", 0)
-            
-            event = AnalysisEvent(
-                ticker=ticker,
-                event_type="ticker_analysis",
-                reasoning=analysis.get("reasoning", ""),
-                input_data=context,
-                output_data=analysis,
-                agent_name="trader_agent"
-            )
-            
-            event_id = self.db.save_analysis_event(event)
-            self.logger.info(
-                "Ticker analyzed from headlines",
-                ticker=ticker,
-                interesting=analysis.get("is_interesting"),
-                confidence=confidence,
-                article_count=len(articles)
-            )
+            analysis = self._parse_analysis(response)
             
-            return {
-                "event_id": event_id,
-                "analysis": analysis,
-                "ticker": ticker
-            }
+            event_id = self.db.save_analysis_event(self._analysis_event(context, analysis))
+            return self._analysis_result(context, analysis, event_id)
         
         except Exception as e:
             self.logger.error("Failed to analyze ticker", ticker=ticker, error=str(e))
@@ -108,21 +162,93 @@ If is_interesting is true, a debate will be triggered where analysts will read f
                 "ticker": ticker
             }
     
-    def self_analyze(self, ticker: str, analysis_event_id: int) -> Optional[TradeProposal]:
-        # Full deep dive and proposal
+    def _batch_request(self, contexts: List[Dict[str, Any]]) -> Dict[str, Any]:
+        # Chat kwargs for one LLM call covering several tickers
+        user_prompt = f"Analyze headlines for these tickers:\n\n{orjson.dumps(contexts, default=str).decode()}"
+        return {
+            "messages": [
+                self._BATCH_HEADLINE_SYSTEM_MESSAGE,
+                {"role": "user", "content": user_prompt}
+            ],
+            "temperature": 0.7,
+            "response_format": {"type": "json_object"}
+        }
+    
+    def _parse_batch(self, contexts: List[Dict[str, Any]], response: Any) -> Dict[str, Dict[str, Any]]:
+        # Verdicts keyed by ticker, empty when the call failed or returned junk
         try:
-            articles = self.db.get_recent_articles(ticker=ticker, hours=24)
-            snapshot = self.db.get_latest_snapshot(ticker)
-            recent_trades = self.db.get_recent_trades(ticker=ticker, days=7)
-            
-            context = {
-                "ticker": ticker,
-                "current_price": float(snapshot["price"]) if snapshot else None,
-                "articles": [a["content_text"][:1000] for a in articles[:10] if a.get("content_text")],
-                "recent_trades": recent_trades[:5]
+            if isinstance(response, BaseException):
+                raise response
+            expected = {c["ticker"] for c in contexts}
+            return {
+                r["ticker"]: r
+                for r in orjson.loads(response).get("results", [])
+                if isinstance(r, dict) and r.get("ticker") in expected
             }
-            
-            system_prompt = """You are a swing trading analyst. Analyze all available information and propose a trade.
+        except Exception as e:
+            self.logger.warning("Batch headline analysis failed", tickers=[c["ticker"] for c in contexts], error=str(e))
+            return {}
+    
+    def analyze_tickers(self, tickers: List[str]) -> Dict[str, Dict[str, Any]]:
+        # Headline scan for a whole watchlist, several tickers per LLM call
+        tickers = list(dict.fromkeys(tickers))
+        if not tickers:
+            return {}
+        
+        try:
+            articles_by_ticker = self.db.get_recent_articles_bulk(tickers, hours=24, preview_only=True)
+            snapshots = self.db.get_latest_snapshots(tickers)
+        except Exception as e:
+            self.logger.error("Failed to load batch analysis inputs", error=str(e))
+            return {ticker: self.analyze_ticker(ticker) for ticker in tickers}
+        
+        # Tickers without a stored price get fetched from Finnhub together
+        missing = [t for t in tickers if not snapshots.get(t)]
+        if missing:
+            try:
+                fetched = self.finnhub.get_stock_snapshots(missing)
+                snapshots.update(self.db.save_stock_snapshots([StockSnapshot(**data) for data in fetched.values()]))
+            except Exception as e:
+                self.logger.warning("Failed to fetch missing snapshots", tickers=missing, error=str(e))
+        
+        # Tickers still without a price are left to the single-ticker path below, which records the error
+        contexts = {
+            ticker: self._headline_context(ticker, articles_by_ticker.get(ticker, []), snapshots[ticker])
+            for ticker in tickers
+            if snapshots.get(ticker)
+        }
+        
+        batchable = [t for t in tickers if t in contexts]
+        batches = [batchable[i:i + self._ANALYSIS_BATCH_SIZE] for i in range(0, len(batchable), self._ANALYSIS_BATCH_SIZE)]
+        analyses: Dict[str, Dict[str, Any]] = {}
+        if batches:
+            batch_contexts = [[contexts[t] for t in batch] for batch in batches]
+            responses = asyncio.run(self.llm.gather_many(
+                [self._batch_request(c) for c in batch_contexts],
+                concurrency=self._ANALYSIS_CONCURRENCY
+            ))
+            for batch, response in zip(batch_contexts, responses):
+                analyses.update(self._parse_batch(batch, response))
+        
+        results: Dict[str, Dict[str, Any]] = {}
+        analyzed = [t for t in batchable if t in analyses]
+        if analyzed:
+            try:
+                event_ids = self.db.save_analysis_events([self._analysis_event(contexts[t], analyses[t]) for t in analyzed])
+                for ticker, event_id in zip(analyzed, event_ids):
+                    results[ticker] = self._analysis_result(contexts[ticker], analyses[ticker], event_id)
+            except Exception as e:
+                self.logger.error("Failed to save batch analysis events", error=str(e))
+        
+        # Anything the batch missed goes through the one-ticker path, in parallel
+        leftovers = [t for t in tickers if t not in results]
+        if leftovers:
+            with ThreadPoolExecutor(max_workers=min(self._SINGLE_ANALYSIS_WORKERS, len(leftovers))) as pool:
+                results.update(zip(leftovers, pool.map(self.analyze_ticker, leftovers)))
+        
+        return {ticker: results[ticker] for ticker in tickers}
+    
+    _SELF_ANALYZE_SYSTEM_PROMPT = """You are a swing trading analyst. Analyze all available information and propose a trade.
             
 Return JSON:
 {
@@ -131,39 +257,95 @@ Return JSON:
   "reasoning": "Detailed reasoning for this trade",
   "confidence_score": 0-100
 }"""
-            
-            user_prompt = f"Analyze and propose trade:\n\n{json.dumps(context, indent=2)}"
-            
+    _SELF_ANALYZE_SYSTEM_MESSAGE = {"role": "system", "content": _SELF_ANALYZE_SYSTEM_PROMPT}
+    
+    def _self_analyze_messages(self, ticker: str) -> List[Dict[str, str]]:
+        # Deep-dive prompt from recent articles, price and trades
+        bundle = self.db.get_analysis_bundle(ticker, hours=24, days=7, article_limit=10, trade_limit=5)
+        
+        context = {
+            "ticker": ticker,
+            "current_price": bundle.snapshot.price if bundle.snapshot else None,
+            "articles": [a["content_preview"] for a in bundle.articles if a.get("content_preview")],
+            "recent_trades": bundle.recent_trades
+        }
+        
+        user_prompt = f"Analyze and propose trade:\n\n{orjson.dumps(context, default=str).decode()}"
+        
+        return [
+            self._SELF_ANALYZE_SYSTEM_MESSAGE,
+            {"role": "user", "content": user_prompt}
+        ]
+    
+    def _save_proposal(self, ticker: str, analysis_event_id: int, proposal_data: Dict[str, Any]) -> TradeProposal:
+        # Persist the model's trade idea at the latest known price
+        snapshot = self.db.get_latest_snapshot(ticker)
+        proposal = TradeProposal(
+            ticker=ticker,
+            action=proposal_data.get("action", "HOLD"),
+            quantity=proposal_data.get("quantity", 0),
+            proposed_price=snapshot.price if snapshot else None,
+            reasoning=proposal_data.get("reasoning", ""),
+            confidence_score=proposal_data.get("confidence_score"),
+            analysis_event_id=analysis_event_id,
+            status="PENDING"
+        )
+        
+        proposal_id = self.db.save_trade_proposal(proposal)
+        proposal.id = proposal_id
+        
+        self.logger.info("Trade proposal created", ticker=ticker, action=proposal.action, proposal_id=proposal_id)
+        
+        return proposal
+    
+    def self_analyze(self, ticker: str, analysis_event_id: int) -> Optional[TradeProposal]:
+        # Full deep dive and proposal
+        try:
             response = self.llm.chat_completion(
-                [
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
+                self._self_analyze_messages(ticker),
                 temperature=0.7,
                 response_format={"type": "json_object"}
             )
             
-            proposal_data = json.loads(response)
-            
-            proposal = TradeProposal(
-                ticker=ticker,
-                action=proposal_data.get("action", "HOLD"),
-                quantity=proposal_data.get("quantity", 0),
-                proposed_price=snapshot["price"] if snapshot else None,
-                reasoning=proposal_data.get("reasoning", ""),
-                confidence_score=proposal_data.get("confidence_score"),
-                analysis_event_id=analysis_event_id,
-                status="PENDING"
-            )
-            
-            proposal_id = self.db.save_trade_proposal(proposal)
-            proposal.id = proposal_id
-            
-            self.logger.info("Trade proposal created", ticker=ticker, action=proposal.action, proposal_id=proposal_id)
-            
-            return proposal
+            return self._save_proposal(ticker, analysis_event_id, orjson.loads(response))
         
         except Exception as e:
             self.logger.error("Failed to self-analyze", ticker=ticker, error=str(e))
             return None
-
+    
+    def self_analyze_many(self, ticker_event_pairs: List[Tuple[str, int]]) -> Optional[str]:
+        # Queue deep dives on the Batch API, returns the batch id for collect_self_analyze_batch
+        requests = []
+        for ticker, analysis_event_id in ticker_event_pairs:
+            try:
+                requests.append(self.llm.batch_request(
+                    f"{ticker}:{analysis_event_id}",
+                    self._self_analyze_messages(ticker),
+                    temperature=0.7,
+                    response_format={"type": "json_object"}
+                ))
+            except Exception as e:
+                self.logger.error("Failed to prepare self-analysis", ticker=ticker, error=str(e))
+        
+        if not requests:
+            return None
+        
+        batch_id = self.llm.submit_batch(requests)
+        self.logger.info("Self-analysis batch submitted", batch_id=batch_id, tickers=len(requests))
+        return batch_id
+    
+    def collect_self_analyze_batch(self, batch_id: str) -> Optional[List[TradeProposal]]:
+        # Save proposals once the batch is done, None while it is still running
+        results = self.llm.poll_batch(batch_id)
+        if results is None:
+            return None
+        
+        proposals = []
+        for custom_id, response in results.items():
+            ticker, _, analysis_event_id = custom_id.rpartition(":")
+            try:
+                proposals.append(self._save_proposal(ticker, int(analysis_event_id), orjson.loads(response)))
+            except Exception as e:
+                self.logger.error("Failed to save batched proposal", ticker=ticker, error=str(e))
+        
+        return proposals
@@ -1,5 +1,6 @@
 # Alpaca API client
 from typing import Optional, Dict, Any, List
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from decimal import Decimal
 import structlog
 from alpaca_trade_api import REST
@@ -15,6 +16,9 @@ logger = structlog.get_logger(__name__)
 class AlpacaClient:
     # Handles Alpaca REST calls
     
+    # Max orders in flight at once in submit_orders
+    _ORDER_WORKERS = 8
+    
     def __init__(self, paper: bool = True):
         # Init REST client (default to paper)
         base_url = "https://paper-api.alpaca.markets" if paper else "https://api.alpaca.markets"
@@ -36,10 +40,10 @@ class AlpacaClient:
         try:
             account = self.client.get_account()
             return {
-                "cash": float(account.cash),
-                "portfolio_value": float(account.portfolio_value),
-                "buying_power": float(account.buying_power),
-                "equity": float(account.equity),
+                "cash": Decimal(account.cash),
+                "portfolio_value": Decimal(account.portfolio_value),
+                "buying_power": Decimal(account.buying_power),
+                "equity": Decimal(account.equity),
             }
         except Exception as e:
             logger.error("Failed to get account", error=str(e))
@@ -59,10 +63,10 @@ class AlpacaClient:
                 {
                     "symbol": pos.symbol,
                     "qty": float(pos.qty),
-                    "avg_entry_price": float(pos.avg_entry_price),
-                    "current_price": float(pos.current_price),
-                    "market_value": float(pos.market_value),
-                    "unrealized_pl": float(pos.unrealized_pl),
+                    "avg_entry_price": Decimal(pos.avg_entry_price),
+                    "current_price": Decimal(pos.current_price),
+                    "market_value": Decimal(pos.market_value),
+                    "unrealized_pl": Decimal(pos.unrealized_pl),
                 }
                 for pos in positions
             ]
@@ -82,9 +86,11 @@ class AlpacaClient:
         qty: int,
         side: str,
         order_type: str = "market",
-        limit_price: Optional[Decimal] = None
+        limit_price: Optional[Decimal] = None,
+        client_order_id: Optional[str] = None
     ) -> Dict[str, Any]:
-        # Send new order
+        # Send new order. With a client_order_id a repeat send (a retry after a lost response,
+        # or a resumed run) returns the order Alpaca already has instead of placing another
         try:
             order_side = "buy" if side.upper() == "BUY" else "sell"
             time_in_force = "day"
@@ -95,7 +101,8 @@ class AlpacaClient:
                     qty=qty,
                     side=order_side,
                     type="market",
-                    time_in_force=time_in_force
+                    time_in_force=time_in_force,
+                    client_order_id=client_order_id
                 )
             else:
                 if not limit_price:
@@ -106,7 +113,8 @@ class AlpacaClient:
                     side=order_side,
                     type="limit",
                     limit_price=float(limit_price),
-                    time_in_force=time_in_force
+                    time_in_force=time_in_force,
+                    client_order_id=client_order_id
                 )
             
             logger.info(
@@ -117,19 +125,68 @@ class AlpacaClient:
                 order_id=order.id
             )
             
-            return {
-                "id": str(order.id),
-                "symbol": order.symbol,
-                "qty": float(order.qty),
-                "side": order.side,
-                "status": order.status,
-                "order_type": order.type,
-                "price": float(order.filled_avg_price) if hasattr(order, 'filled_avg_price') and order.filled_avg_price else None,
-            }
+            return self._order_to_dict(order)
         except Exception as e:
+            # Only the same symbol and side counts, a reset database can hand out an old proposal id again
+            existing = self._find_order(client_order_id) if client_order_id else None
+            if existing is not None and existing["symbol"] == symbol and str(existing["side"]).lower() == order_side:
+                logger.info("Order already submitted", symbol=symbol, client_order_id=client_order_id, order_id=existing["id"])
+                return existing
             logger.error("Failed to submit order", symbol=symbol, error=str(e))
             raise
     
+    def _find_order(self, client_order_id: str) -> Optional[Dict[str, Any]]:
+        # Order previously sent under this client id, None if Alpaca has none
+        try:
+            return self._order_to_dict(self.client.get_order_by_client_order_id(client_order_id))
+        except Exception:
+            return None
+    
+    def submit_orders(self, orders: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        # Send a basket of orders (submit_order kwargs) in parallel, results in input order
+        if not orders:
+            return []
+        
+        results: List[Optional[Dict[str, Any]]] = [None] * len(orders)
+        with ThreadPoolExecutor(max_workers=min(self._ORDER_WORKERS, len(orders))) as pool:
+            # Each task retries on its own, so one throttled order doesn't hold up the rest
+            futures = {pool.submit(self.submit_order, **order): i for i, order in enumerate(orders)}
+            for future in as_completed(futures):
+                i = futures[future]
+                try:
+                    results[i] = future.result()
+                except Exception as e:
+                    results[i] = {
+                        "symbol": orders[i].get("symbol"),
+                        "side": orders[i].get("side"),
+                        "status": "failed",
+                        "error": str(e),
+                    }
+        
+        logger.info("Order basket submitted", count=len(orders), failed=sum(1 for r in results if r.get("status") == "failed"))
+        return results
+    
+    def get_order(self, order_id: str) -> Dict[str, Any]:
+        # Current state of a submitted order. Single attempt, callers poll this on their own deadline
+        try:
+            return self._order_to_dict(self.client.get_order(order_id))
+        except Exception as e:
+            logger.error("Failed to get order", order_id=order_id, error=str(e))
+            raise
+    
+    @staticmethod
+    def _order_to_dict(order: AlpacaOrder) -> Dict[str, Any]:
+        # Flatten Alpaca order entity
+        return {
+            "id": str(order.id),
+            "symbol": order.symbol,
+            "qty": float(order.qty),
+            "side": order.side,
+            "status": order.status,
+            "order_type": order.type,
+            "price": float(order.filled_avg_price) if hasattr(order, 'filled_avg_price') and order.filled_avg_price else None,
+        }
+    
     def get_position(self, symbol: str) -> Optional[Dict[str, Any]]:
         # Single position check
         try:
@@ -137,10 +194,10 @@ class AlpacaClient:
             return {
                 "symbol": position.symbol,
                 "qty": float(position.qty),
-                "avg_entry_price": float(position.avg_entry_price),
-                "current_price": float(position.current_price),
-                "market_value": float(position.market_value),
-                "unrealized_pl": float(position.unrealized_pl),
+                "avg_entry_price": Decimal(position.avg_entry_price),
+                "current_price": Decimal(position.current_price),
+                "market_value": Decimal(position.market_value),
+                "unrealized_pl": Decimal(position.unrealized_pl),
             }
         except Exception as e:
             logger.debug("Position not found", symbol=symbol, error=str(e))
@@ -0,0 +1,110 @@
+# SQLite-backed memoization for slow external API calls
+from typing import Any, Callable, Optional, Tuple
+import functools
+import json
+import pickle
+import random
+import sqlite3
+import threading
+import time
+import structlog
+
+from backend.config import settings
+
+
+logger = structlog.get_logger(__name__)
+
+# Past this fraction of the TTL a hit may refresh early, spreading refreshes out before expiry
+_EARLY_REFRESH_AGE = 0.8
+_EARLY_REFRESH_PROBABILITY = 0.1
+
+
+class SQLiteCache:
+    # Key/value store with per-entry TTL, shared across threads and processes
+    
+    def __init__(self, path: str):
+        # Open (or create) the cache file
+        self.path = path
+        self._local = threading.local()
+        self._connect().execute(
+            """
+            CREATE TABLE IF NOT EXISTS cache (
+                key TEXT PRIMARY KEY,
+                value BLOB NOT NULL,
+                created_at REAL NOT NULL,
+                ttl REAL NOT NULL
+            )
+            """
+        )
+        logger.info("API cache initialized", path=path)
+    
+    def _connect(self) -> sqlite3.Connection:
+        # One connection per thread, sqlite3 connections are not thread-safe
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+    
+    def get(self, key: str) -> Optional[Tuple[Any, float]]:
+        # (value, age in seconds) for a live entry, else None
+        row = self._connect().execute(
+            "SELECT value, created_at, ttl FROM cache WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        value, created_at, ttl = row
+        age = time.time() - created_at
+        if age >= ttl:
+            return None
+        return pickle.loads(value), age
+    
+    def set(self, key: str, value: Any, ttl: float):
+        # Insert or replace an entry
+        self._connect().execute(
+            "INSERT OR REPLACE INTO cache (key, value, created_at, ttl) VALUES (?, ?, ?, ?)",
+            (key, pickle.dumps(value), time.time(), ttl)
+        )
+
+
+_cache: Optional[SQLiteCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_cache() -> SQLiteCache:
+    # Process-wide cache, opened on first use
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = SQLiteCache(settings.api_cache_path)
+    return _cache
+
+
+def memoize(ttl: float) -> Callable:
+    # Cache a client method's result by (method, args) for ttl seconds
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(self, *args, **kwargs):
+            key = f"{func.__qualname__}:{json.dumps([args, kwargs], sort_keys=True, default=str)}"
+            try:
+                hit = get_cache().get(key)
+            except Exception as e:
+                logger.warning("API cache read failed", key=key, error=str(e))
+                hit = None
+            
+            if hit is not None:
+                value, age = hit
+                if age < ttl * _EARLY_REFRESH_AGE or random.random() >= _EARLY_REFRESH_PROBABILITY:
+                    return value
+            
+            value = func(self, *args, **kwargs)
+            try:
+                get_cache().set(key, value, ttl)
+            except Exception as e:
+                logger.warning("API cache write failed", key=key, error=str(e))
+            return value
+        return wrapper
+    return decorator
@@ -1,17 +1,24 @@
 # Finnhub API client
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
+from concurrent.futures import ThreadPoolExecutor
 from decimal import Decimal
 from datetime import datetime
+import orjson
 import structlog
 import finnhub
-import requests
+from requests.adapters import HTTPAdapter
 from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
 
 from backend.config import settings
+from .cache import memoize
+from .rate_limiter import RateLimiter
 
 
 logger = structlog.get_logger(__name__)
 
+# Shared pool for independent Finnhub requests (quote + profile per ticker)
+_REQUEST_POOL = ThreadPoolExecutor(max_workers=16, thread_name_prefix="finnhub")
+
 
 class FinnhubClient:
     # Client for Finnhub data
@@ -19,8 +26,16 @@ class FinnhubClient:
     def __init__(self):
         # Setup Finnhub connection
         self.client = finnhub.Client(api_key=settings.finnhub_key)
+        # Keep enough pooled connections for parallel requests to reuse TLS sessions
+        adapter = HTTPAdapter(pool_connections=16, pool_maxsize=32)
+        self.client._session.mount("https://", adapter)
+        # Direct REST calls share the SDK's pooled keep-alive session
+        self.http = self.client._session
+        # Paces requests across the request pool threads; cache hits never take a token
+        self.rate_limiter = RateLimiter(max_calls=settings.finnhub_calls_per_minute, period_seconds=60)
         logger.info("Finnhub client initialized")
     
+    @memoize(ttl=30)
     @retry(
         stop=stop_after_attempt(5),
         wait=wait_exponential(multiplier=1, min=2, max=60),
@@ -30,6 +45,7 @@ class FinnhubClient:
     def get_quote(self, ticker: str) -> Dict[str, Any]:
         # Get latest price info
         try:
+            self.rate_limiter.wait_if_needed()
             quote = self.client.quote(ticker)
             logger.debug("Fetched quote", ticker=ticker, quote=quote)
             return quote
@@ -37,6 +53,7 @@ class FinnhubClient:
             logger.error("Failed to fetch quote", ticker=ticker, error=str(e))
             raise
     
+    @memoize(ttl=24 * 60 * 60)
     @retry(
         stop=stop_after_attempt(5),
         wait=wait_exponential(multiplier=1, min=2, max=60),
@@ -46,6 +63,7 @@ class FinnhubClient:
     def get_company_profile(self, ticker: str) -> Dict[str, Any]:
         # Get industry and business info
         try:
+            self.rate_limiter.wait_if_needed()
             profile = self.client.company_profile2(symbol=ticker)
             logger.debug("Fetched company profile", ticker=ticker)
             return profile
@@ -53,6 +71,7 @@ class FinnhubClient:
             logger.error("Failed to fetch company profile", ticker=ticker, error=str(e))
             raise
     
+    @memoize(ttl=6 * 60 * 60)
     @retry(
         stop=stop_after_attempt(5),
         wait=wait_exponential(multiplier=1, min=2, max=60),
@@ -62,6 +81,7 @@ class FinnhubClient:
     def get_financials(self, ticker: str, statement: str = "bs") -> Dict[str, Any]:
         # Basic financials (BS/PL/CF)
         try:
+            self.rate_limiter.wait_if_needed()
             financials = self.client.financials(symbol=ticker, statement=statement)
             logger.debug("Fetched financials", ticker=ticker, statement=statement)
             return financials
@@ -69,6 +89,7 @@ class FinnhubClient:
             logger.error("Failed to fetch financials", ticker=ticker, error=str(e))
             raise
     
+    @memoize(ttl=30)
     @retry(
         stop=stop_after_attempt(5),
         wait=wait_exponential(multiplier=1, min=2, max=60),
@@ -84,15 +105,17 @@ class FinnhubClient:
                 "exchange": exchange,
                 "token": settings.finnhub_key
             }
-            response = requests.get(url, params=params, timeout=10)
+            self.rate_limiter.wait_if_needed()
+            response = self.http.get(url, params=params, timeout=10)
             response.raise_for_status()
-            status = response.json()
+            status = orjson.loads(response.content)
             logger.debug("Fetched market status", exchange=exchange, status=status)
             return status
         except Exception as e:
             logger.error("Failed to fetch market status", exchange=exchange, error=str(e))
             raise
     
+    @memoize(ttl=30)
     def is_market_open(self, exchange: str = "US") -> bool:
         # Simple open/closed check
         try:
@@ -106,35 +129,51 @@ class FinnhubClient:
             return False
     
     def get_stock_snapshot(self, ticker: str) -> Dict[str, Any]:
-        # Combined price and profile data
+        # Combined price and profile data, both fetched concurrently
         try:
-            quote = self.get_quote(ticker)
-            profile = self.get_company_profile(ticker)
-            
-            market_cap = profile.get("marketCapitalization") if profile else None
-            if market_cap and isinstance(market_cap, float):
-                market_cap = int(market_cap)
-            
-            pe_ratio = profile.get("finnhubIndustry") if profile else None
-            if pe_ratio and not isinstance(pe_ratio, (int, float, Decimal)):
-                pe_ratio = None
-            
-            snapshot = {
-                "ticker": ticker,
-                "price": Decimal(str(quote.get("c", 0))),
-                "high": Decimal(str(quote.get("h", 0))) if quote.get("h") else None,
-                "low": Decimal(str(quote.get("l", 0))) if quote.get("l") else None,
-                "open_price": Decimal(str(quote.get("o", 0))) if quote.get("o") else None,
-                "close_price": Decimal(str(quote.get("pc", 0))) if quote.get("pc") else None,
-                "volume": quote.get("v", 0),
-                "market_cap": market_cap,
-                "pe_ratio": Decimal(str(pe_ratio)) if pe_ratio and isinstance(pe_ratio, (int, float)) else None,
-                "snapshot_time": datetime.utcnow(),
-            }
-            
-            logger.info("Created stock snapshot", ticker=ticker)
-            return snapshot
+            quote_future = _REQUEST_POOL.submit(self.get_quote, ticker)
+            profile_future = _REQUEST_POOL.submit(self.get_company_profile, ticker)
+            return self._build_snapshot(ticker, quote_future.result(), profile_future.result())
         except Exception as e:
             logger.error("Failed to create stock snapshot", ticker=ticker, error=str(e))
             raise
-
+    
+    def get_stock_snapshots(self, tickers: List[str]) -> Dict[str, Dict[str, Any]]:
+        # Snapshots for many tickers, all quote/profile requests in flight together; failed tickers are left out
+        futures = {
+            ticker: (_REQUEST_POOL.submit(self.get_quote, ticker), _REQUEST_POOL.submit(self.get_company_profile, ticker))
+            for ticker in dict.fromkeys(tickers)
+        }
+        snapshots = {}
+        for ticker, (quote_future, profile_future) in futures.items():
+            try:
+                snapshots[ticker] = self._build_snapshot(ticker, quote_future.result(), profile_future.result())
+            except Exception as e:
+                logger.error("Failed to create stock snapshot", ticker=ticker, error=str(e))
+        return snapshots
+    
+    def _build_snapshot(self, ticker: str, quote: Dict[str, Any], profile: Dict[str, Any]) -> Dict[str, Any]:
+        # Map Finnhub quote/profile payloads to StockSnapshot fields
+        market_cap = profile.get("marketCapitalization") if profile else None
+        if market_cap and isinstance(market_cap, float):
+            market_cap = int(market_cap)
+        
+        pe_ratio = profile.get("finnhubIndustry") if profile else None
+        if pe_ratio and not isinstance(pe_ratio, (int, float, Decimal)):
+            pe_ratio = None
+        
+        snapshot = {
+            "ticker": ticker,
+            "price": Decimal(str(quote.get("c", 0))),
+            "high": Decimal(str(quote.get("h", 0))) if quote.get("h") else None,
+            "low": Decimal(str(quote.get("l", 0))) if quote.get("l") else None,
+            "open_price": Decimal(str(quote.get("o", 0))) if quote.get("o") else None,
+            "close_price": Decimal(str(quote.get("pc", 0))) if quote.get("pc") else None,
+            "volume": quote.get("v", 0),
+            "market_cap": market_cap,
+            "pe_ratio": Decimal(str(pe_ratio)) if pe_ratio and isinstance(pe_ratio, (int, float)) else None,
+            "snapshot_time": datetime.utcnow(),
+        }
+        
+        logger.info("Created stock snapshot", ticker=ticker)
+        return snapshot
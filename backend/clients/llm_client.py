@@ -1,57 +1,194 @@
 # OpenAI wrapper for embeddings and chat
-from typing import List, Dict, Any, Optional
-import json
-import time
+from typing import List, Dict, Any, Optional, AsyncIterator, Awaitable
+import asyncio
+import hashlib
+import os
+import re
 import threading
+import orjson
+import httpx
 import structlog
-from openai import OpenAI
+from openai import OpenAI, AsyncOpenAI
 from openai import APIError as OpenAIAPIError
 from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
 
 from backend.config import settings
+from .cache import get_cache
+from .rate_limiter import RateLimiter
 
 
 logger = structlog.get_logger(__name__)
 
+# One keep-alive pool shared by every LLMClient to avoid repeated TLS handshakes
+_HTTP_LIMITS = httpx.Limits(max_connections=64, max_keepalive_connections=32)
+_HTTP_CLIENT = httpx.Client(limits=_HTTP_LIMITS)
 
-class RateLimiter:
-    # Simple rate limiting logic
-    
-    def __init__(self, max_calls: int, period_seconds: int, db_client=None):
-        # Tracks call frequency
-        self.max_calls = max_calls
-        self.period_seconds = period_seconds
-        self.min_interval = period_seconds / max_calls  # Minimum seconds between calls
-        self.last_call_time = 0.0
-        self.lock = threading.Lock()
-        self.db_client = db_client
-        logger.info("Rate limiter initialized", max_calls=max_calls, period_seconds=period_seconds, min_interval=self.min_interval, shared=db_client is not None)
-    
-    def wait_if_needed(self):
-        # Block if over limit
-        with self.lock:
-            current_time = time.time()
-            time_since_last_call = current_time - self.last_call_time
-            
-            if time_since_last_call < self.min_interval:
-                sleep_time = self.min_interval - time_since_last_call
-                logger.debug("Rate limiting", sleep_time=sleep_time, calls_per_minute=self.max_calls)
-                time.sleep(sleep_time)
-            
-            self.last_call_time = time.time()
+# Async requests all run on one long-lived loop in a daemon thread. An httpx.AsyncClient is
+# tied to the loop it first ran on, so this lets a single AsyncOpenAI client and its pool serve
+# every caller's loop, including the short-lived ones from asyncio.run
+_async_lock = threading.Lock()
+_client_loop: Optional[asyncio.AbstractEventLoop] = None
+_client_loop_pid: Optional[int] = None
+_aclient: Optional[AsyncOpenAI] = None
+
+
+def _get_client_loop() -> asyncio.AbstractEventLoop:
+    # Shared loop, started on first use and again in a forked child (the thread does not survive a fork)
+    global _client_loop, _client_loop_pid, _aclient
+    if _client_loop is None or _client_loop_pid != os.getpid():
+        with _async_lock:
+            if _client_loop is None or _client_loop_pid != os.getpid():
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="llm-client-loop", daemon=True).start()
+                _client_loop, _client_loop_pid, _aclient = loop, os.getpid(), None
+    return _client_loop
+
+
+def _get_aclient() -> AsyncOpenAI:
+    # Shared async client, only ever used on the shared loop
+    global _aclient
+    _get_client_loop()
+    if _aclient is None:
+        with _async_lock:
+            if _aclient is None:
+                _aclient = AsyncOpenAI(
+                    api_key=settings.openai_api_key,
+                    http_client=httpx.AsyncClient(limits=_HTTP_LIMITS)
+                )
+    return _aclient
+
+
+async def _on_client_loop(coro: Awaitable) -> Any:
+    # Await coro on the shared loop from whatever loop the caller is on; cancelling the caller cancels it
+    return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, _get_client_loop()))
+
+
+async def _anext_or_none(stream: Any) -> Any:
+    # Next stream chunk or None when done, StopAsyncIteration cannot cross the loop hop
+    try:
+        return await stream.__anext__()
+    except StopAsyncIteration:
+        return None
+
+_EXTRACT_SYSTEM_PROMPT = """You are a financial news article extractor. Extract structured information from raw HTML.
+
+CRITICAL RULE: An article is ONLY usable if it specifically mentions the company/ticker symbol in the article content.
+
+Return a JSON object with the following structure:
+{
+  "title": "Article title",
+  "ticker": "Stock ticker symbol if mentioned (e.g., AAPL, TSLA)",
+  "content_text": "Clean article text without HTML tags",
+  "is_usable": true/false,
+  "reason": "Why this article is usable or not",
+  "timestamp": "ISO 8601 timestamp if available"
+}
+
+Rules for is_usable:
+- Set is_usable to TRUE ONLY if:
+  * The article specifically mentions the company/ticker symbol in the content
+  * The article contains substantial information about the company (not just a passing mention)
+  * The article is about the company's business, financials, products, or news
+  * The content is substantial (at least 200 characters of meaningful text)
+  
+- Set is_usable to FALSE if:
+  * The company/ticker is NOT mentioned in the article content
+  * The article is about a different company
+  * The article only mentions the company in passing without substantial information
+  * The article is too short, corrupted, or contains no meaningful content
+  * The article is generic market commentary without company-specific details
+  * The article is about unrelated topics (politics, sports, etc.) unless directly impacting the company
+
+Content extraction:
+- Extract only the main article content, remove navigation, ads, headers, footers
+- If no ticker is mentioned in content, set ticker to null
+- Extract timestamp if available in the article
+- Return ONLY valid JSON, no markdown formatting
+
+Examples:
+
+1. Earnings story, expected ticker NVDA:
+   "<h1>Nvidia beats on data center demand</h1><p>Nvidia (NASDAQ: NVDA) reported quarterly revenue of $26.0 billion, up 262% from a year ago, driven by data center sales of $22.6 billion. The company guided next-quarter revenue to $28.0 billion, above analyst estimates...</p>"
+   {
+     "title": "Nvidia beats on data center demand",
+     "ticker": "NVDA",
+     "content_text": "Nvidia (NASDAQ: NVDA) reported quarterly revenue of $26.0 billion, up 262% from a year ago, driven by data center sales of $22.6 billion. The company guided next-quarter revenue to $28.0 billion, above analyst estimates...",
+     "is_usable": true,
+     "reason": "Company-specific earnings results and guidance for NVDA",
+     "timestamp": null
+   }
+
+2. Market wrap, expected ticker AAPL:
+   "<h1>Stocks close higher as yields ease</h1><p>The S&P 500 rose 0.8% on Tuesday as Treasury yields fell. Technology shares led the gains, with Apple among the many large caps trading higher. Investors are watching Friday's jobs report...</p>"
+   {
+     "title": "Stocks close higher as yields ease",
+     "ticker": "AAPL",
+     "content_text": "The S&P 500 rose 0.8% on Tuesday as Treasury yields fell. Technology shares led the gains, with Apple among the many large caps trading higher. Investors are watching Friday's jobs report...",
+     "is_usable": false,
+     "reason": "Generic market commentary, Apple is only mentioned in passing",
+     "timestamp": null
+   }
+
+3. Different company, expected ticker TSLA:
+   "<h1>Rivian cuts production forecast</h1><p>Rivian Automotive (NASDAQ: RIVN) lowered its annual production outlook to 47,000 vehicles, citing a supplier shortage of a shared component...</p>"
+   {
+     "title": "Rivian cuts production forecast",
+     "ticker": "RIVN",
+     "content_text": "Rivian Automotive (NASDAQ: RIVN) lowered its annual production outlook to 47,000 vehicles, citing a supplier shortage of a shared component...",
+     "is_usable": false,
+     "reason": "Article is about Rivian, TSLA is not mentioned",
+     "timestamp": null
+   }
+
+4. Paywall or error page, no expected ticker:
+   "<h1>Subscribe to continue reading</h1><p>Create a free account or log in to read this story.</p>"
+   {
+     "title": "Subscribe to continue reading",
+     "ticker": null,
+     "content_text": "Create a free account or log in to read this story.",
+     "is_usable": false,
+     "reason": "No meaningful article content, page is a paywall prompt",
+     "timestamp": null
+   }
+
+5. Regulatory news with a publish date, expected ticker MSFT:
+   "<meta property=\"article:published_time\" content=\"2024-03-12T14:05:00Z\"><h1>EU opens probe into Microsoft Teams bundling</h1><p>The European Commission said on Tuesday it is investigating whether Microsoft (NASDAQ: MSFT) breached antitrust rules by tying Teams to its Office 365 suites, a case that could lead to fines of up to 10% of global revenue...</p>"
+   {
+     "title": "EU opens probe into Microsoft Teams bundling",
+     "ticker": "MSFT",
+     "content_text": "The European Commission said on Tuesday it is investigating whether Microsoft (NASDAQ: MSFT) breached antitrust rules by tying Teams to its Office 365 suites, a case that could lead to fines of up to 10% of global revenue...",
+     "is_usable": true,
+     "reason": "Regulatory action directly targeting MSFT's business",
+     "timestamp": "2024-03-12T14:05:00Z"
+   }"""
+
+# Extractions are reused for this long when the same article text shows up again
+_EXTRACT_CACHE_TTL = 7 * 24 * 60 * 60
+_WHITESPACE_RE = re.compile(r"\s+")
+_PARSE_FAILED_REASON = "Failed to parse LLM response"
+
+# Identical bytes on every call, so the provider can reuse the cached prefix
+# (the examples keep it above the 1024-token minimum for prompt caching)
+_EXTRACT_SYSTEM_MESSAGE = {"role": "system", "content": _EXTRACT_SYSTEM_PROMPT}
 
 
 class LLMClient:
     # OpenAI interaction
     
+    # Inputs per embeddings request in get_embeddings_batch
+    _EMBEDDING_BATCH_SIZE = 96
+    
     def __init__(self, chat_model: Optional[str] = None):
         # Setup OpenAI and limiter
-        self.client = OpenAI(api_key=settings.openai_api_key)
+        self.client = OpenAI(api_key=settings.openai_api_key, http_client=_HTTP_CLIENT)
         self.embedding_model = "text-embedding-3-small"
         self.chat_model = chat_model or "gpt-5-nano-2025-08-07"  # Default to nano
+        # gpt-5-nano models only support default temperature (1), decided once per client
+        self._supports_temperature = "gpt-5-nano" not in self.chat_model.lower()
+        self._base_kwargs = {"model": self.chat_model}
         # Rate limiter: OpenAI paid tiers have high limits, but keep conservative rate limiting
         # Adjust based on your OpenAI tier (free: 3 RPM, paid: much higher)
-        self.rate_limiter = RateLimiter(max_calls=1000, period_seconds=60)
+        self.rate_limiter = RateLimiter(max_calls=settings.llm_calls_per_minute, period_seconds=60)
         logger.info("LLM client initialized", chat_model=self.chat_model, embedding_model=self.embedding_model, rate_limit="1000 calls/minute")
     
     def get_embedding(self, text: str) -> Optional[List[float]]:
@@ -79,6 +216,76 @@ class LLMClient:
             logger.warning("Failed to get embedding", error=str(e))
             return None
     
+    def get_embeddings_batch(self, texts: List[str]) -> List[Optional[List[float]]]:
+        # Vectors in input order, one request per _EMBEDDING_BATCH_SIZE texts.
+        # A failed batch falls back to get_embedding per text, so one bad input only loses itself
+        embeddings: List[Optional[List[float]]] = []
+        for start in range(0, len(texts), self._EMBEDDING_BATCH_SIZE):
+            batch = texts[start:start + self._EMBEDDING_BATCH_SIZE]
+            self.rate_limiter.wait_if_needed()
+            try:
+                response = self.client.embeddings.create(
+                    model=self.embedding_model,
+                    input=batch
+                )
+                embeddings.extend(item.embedding for item in sorted(response.data, key=lambda item: item.index))
+                logger.debug("Generated embeddings", count=len(batch))
+            except OpenAIAPIError as e:
+                status_code = getattr(e, 'status_code', None)
+                if status_code in (401, 403):
+                    logger.debug("Embedding model not available - embeddings disabled", model=self.embedding_model, status_code=status_code)
+                    return embeddings + [None] * (len(texts) - len(embeddings))
+                logger.warning("Embedding batch failed, retrying one by one", status_code=status_code, count=len(batch), error=str(e))
+                embeddings.extend(self.get_embedding(text) for text in batch)
+            except Exception as e:
+                logger.warning("Embedding batch failed, retrying one by one", count=len(batch), error=str(e))
+                embeddings.extend(self.get_embedding(text) for text in batch)
+        return embeddings
+    
+    def _chat_kwargs(
+        self,
+        messages: List[Dict[str, str]],
+        temperature: float,
+        response_format: Optional[Dict[str, str]],
+        max_tokens: Optional[int]
+    ) -> Dict[str, Any]:
+        # Request params shared by sync and async chat
+        kwargs = {**self._base_kwargs, "messages": messages}
+        if self._supports_temperature:
+            kwargs["temperature"] = temperature
+        
+        if response_format:
+            kwargs["response_format"] = response_format
+        # max_completion_tokens is the cap accepted by both gpt-4o and gpt-5 models
+        if max_tokens:
+            kwargs["max_completion_tokens"] = max_tokens
+        return kwargs
+    
+    def _extract_content(self, response: Any, messages_count: int) -> str:
+        # Pull message text and reject empty replies
+        content = response.choices[0].message.content
+        
+        # Validate response is not empty
+        if not content or len(content.strip()) == 0:
+            logger.error("Empty response from LLM")
+            raise ValueError("Empty response from LLM")
+        
+        logger.debug("Got chat completion", messages_count=messages_count)
+        return content
+    
+    def _log_chat_error(self, e: Exception) -> None:
+        # Shared error reporting for chat calls
+        if isinstance(e, OpenAIAPIError):
+            status_code = getattr(e, 'status_code', None)
+            if status_code in (401, 403):
+                logger.error("OpenAI API authentication failed - check API key", status_code=status_code)
+            elif status_code == 429:
+                logger.error("Rate limit exceeded despite rate limiter", status_code=429)
+            else:
+                logger.error("Failed to get chat completion", status_code=status_code, error=str(e))
+        else:
+            logger.error("Failed to get chat completion", error=str(e))
+    
     @retry(
         stop=stop_after_attempt(3),
         wait=wait_exponential(multiplier=1, min=2, max=30),
@@ -89,113 +296,278 @@ class LLMClient:
         self,
         messages: List[Dict[str, str]],
         temperature: float = 0.7,
-        response_format: Optional[Dict[str, str]] = None
+        response_format: Optional[Dict[str, str]] = None,
+        max_tokens: Optional[int] = None
     ) -> str:
         # Standard GPT chat
         # Rate limit: wait if needed
         self.rate_limiter.wait_if_needed()
         
         try:
-            kwargs = {
-                "model": self.chat_model,
-                "messages": messages,
-            }
-            # gpt-5-nano models only support default temperature (1), so skip temperature parameter
-            # For other models, include temperature if it's not the default
-            if "gpt-5-nano" not in self.chat_model.lower():
-                kwargs["temperature"] = temperature
-            elif temperature != 1.0:
-                logger.debug("Skipping temperature parameter for gpt-5-nano model (only supports default)")
-            
-            if response_format:
-                kwargs["response_format"] = response_format
-            
+            kwargs = self._chat_kwargs(messages, temperature, response_format, max_tokens)
             response = self.client.chat.completions.create(**kwargs)
-            content = response.choices[0].message.content
-            
-            # Validate response is not empty
-            if not content or len(content.strip()) == 0:
-                logger.error("Empty response from LLM")
-                raise ValueError("Empty response from LLM")
-            
-            logger.debug("Got chat completion", messages_count=len(messages))
-            return content
-        except OpenAIAPIError as e:
-            status_code = getattr(e, 'status_code', None)
-            if status_code in (401, 403):
-                logger.error("OpenAI API authentication failed - check API key", status_code=status_code)
-            elif status_code == 429:
-                logger.error("Rate limit exceeded despite rate limiter", status_code=429)
-            else:
-                logger.error("Failed to get chat completion", status_code=status_code, error=str(e))
+            return self._extract_content(response, len(messages))
+        except Exception as e:
+            self._log_chat_error(e)
             raise
+    
+    @retry(
+        stop=stop_after_attempt(3),
+        wait=wait_exponential(multiplier=1, min=2, max=30),
+        retry=retry_if_exception_type((OpenAIAPIError,)),
+        reraise=True
+    )
+    async def achat_completion(
+        self,
+        messages: List[Dict[str, str]],
+        temperature: float = 0.7,
+        response_format: Optional[Dict[str, str]] = None,
+        max_tokens: Optional[int] = None
+    ) -> str:
+        # Async GPT chat so independent calls can overlap
+        await self.rate_limiter.acquire()
+        
+        try:
+            kwargs = self._chat_kwargs(messages, temperature, response_format, max_tokens)
+            response = await _on_client_loop(_get_aclient().chat.completions.create(**kwargs))
+            return self._extract_content(response, len(messages))
         except Exception as e:
-            logger.error("Failed to get chat completion", error=str(e))
+            self._log_chat_error(e)
             raise
     
-    def extract_article_json(self, raw_html: str, ticker: Optional[str] = None) -> Dict[str, Any]:
-        # Parse news HTML to JSON
-        system_prompt = """You are a financial news article extractor. Extract structured information from raw HTML.
-
-CRITICAL RULE: An article is ONLY usable if it specifically mentions the company/ticker symbol in the article content.
-
-Return a JSON object with the following structure:
-{
-  "title": "Article title",
-  "ticker": "Stock ticker symbol if mentioned (e.g., AAPL, TSLA)",
-  "content_text": "Clean article text without HTML tags",
-  "is_usable": true/false,
-  "reason": "Why this article is usable or not",
-  "timestamp": "ISO 8601 timestamp if available"
-}
-
-Rules for is_usable:
-- Set is_usable to TRUE ONLY if:
-  * The article specifically mentions the company/ticker symbol in the content
-  * The article contains substantial information about the company (not just a passing mention)
-  * The article is about the company's business, financials, products, or news
-  * The content is substantial (at least 200 characters of meaningful text)
-  
-- Set is_usable to FALSE if:
-  * The company/ticker is NOT mentioned in the article content
-  * The article is about a different company
-  * The article only mentions the company in passing without substantial information
-  * The article is too short, corrupted, or contains no meaningful content
-  * The article is generic market commentary without company-specific details
-  * The article is about unrelated topics (politics, sports, etc.) unless directly impacting the company
-
-Content extraction:
-- Extract only the main article content, remove navigation, ads, headers, footers
-- If no ticker is mentioned in content, set ticker to null
-- Extract timestamp if available in the article
-- Return ONLY valid JSON, no markdown formatting"""
+    async def acached_chat_completion(
+        self,
+        messages: List[Dict[str, str]],
+        temperature: float = 0.7,
+        response_format: Optional[Dict[str, str]] = None,
+        max_tokens: Optional[int] = None,
+        ttl: float = 24 * 60 * 60
+    ) -> str:
+        # achat_completion memoized in the API cache by model, sampling params and prompt,
+        # so a retried step does not pay for the same completion twice
+        key = "llm:" + hashlib.md5(
+            orjson.dumps([self.chat_model, temperature, response_format, max_tokens, messages])
+        ).hexdigest()
+        try:
+            hit = get_cache().get(key)
+        except Exception as e:
+            logger.warning("LLM cache read failed", error=str(e))
+            hit = None
+        if hit is not None:
+            return hit[0]
         
-        user_prompt = f"Extract article information from this HTML"
-        if ticker:
-            user_prompt += f". Expected ticker: {ticker} - the article MUST mention this company to be usable."
-        user_prompt += f"\n\n{raw_html[:8000]}"
+        content = await self.achat_completion(messages, temperature, response_format, max_tokens)
+        try:
+            get_cache().set(key, content, ttl)
+        except Exception as e:
+            logger.warning("LLM cache write failed", error=str(e))
+        return content
+    
+    @retry(
+        stop=stop_after_attempt(3),
+        wait=wait_exponential(multiplier=1, min=2, max=30),
+        retry=retry_if_exception_type((OpenAIAPIError,)),
+        reraise=True
+    )
+    async def _aopen_stream(self, kwargs: Dict[str, Any]) -> Any:
+        # Retry only opening the stream, a half-read stream cannot be replayed
+        await self.rate_limiter.acquire()
+        try:
+            return await _on_client_loop(_get_aclient().chat.completions.create(stream=True, **kwargs))
+        except Exception as e:
+            self._log_chat_error(e)
+            raise
+    
+    async def gather_many(self, requests: List[Dict[str, Any]], concurrency: int = 16) -> List[Any]:
+        # Run achat_completion for each kwargs dict, at most `concurrency` in flight
+        # Results keep input order; a failed request yields its exception instead of a string
+        semaphore = asyncio.Semaphore(concurrency)
         
-        messages = [
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": user_prompt}
-        ]
+        async def run(request: Dict[str, Any]) -> str:
+            async with semaphore:
+                return await self.achat_completion(**request)
         
-        response = self.chat_completion(
-            messages,
-            temperature=0.3,
-            response_format={"type": "json_object"}
-        )
+        return await asyncio.gather(*(run(request) for request in requests), return_exceptions=True)
+    
+    async def astream_chat_completion(
+        self,
+        messages: List[Dict[str, str]],
+        temperature: float = 0.7,
+        max_tokens: Optional[int] = None
+    ) -> AsyncIterator[str]:
+        # Yield text deltas as the model produces them
+        kwargs = self._chat_kwargs(messages, temperature, None, max_tokens)
+        stream = await self._aopen_stream(kwargs)
+        received = False
+        try:
+            while (chunk := await _on_client_loop(_anext_or_none(stream))) is not None:
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    received = True
+                    yield delta
+        except Exception as e:
+            self._log_chat_error(e)
+            raise
+        finally:
+            await _on_client_loop(stream.close())
         
+        if not received:
+            logger.error("Empty response from LLM")
+            raise ValueError("Empty response from LLM")
+        logger.debug("Got streamed chat completion", messages_count=len(messages))
+    
+    def batch_request(
+        self,
+        custom_id: str,
+        messages: List[Dict[str, str]],
+        temperature: float = 0.7,
+        response_format: Optional[Dict[str, str]] = None,
+        max_tokens: Optional[int] = None
+    ) -> Dict[str, Any]:
+        # One JSONL line for the Batch API, same params as chat_completion
+        return {
+            "custom_id": custom_id,
+            "method": "POST",
+            "url": "/v1/chat/completions",
+            "body": self._chat_kwargs(messages, temperature, response_format, max_tokens),
+        }
+    
+    @retry(
+        stop=stop_after_attempt(3),
+        wait=wait_exponential(multiplier=1, min=2, max=30),
+        retry=retry_if_exception_type((OpenAIAPIError,)),
+        reraise=True
+    )
+    def submit_batch(self, requests: List[Dict[str, Any]]) -> str:
+        # Upload requests and start a 24h batch (half price, separate rate limits)
         try:
-            return json.loads(response)
-        except json.JSONDecodeError:
+            payload = b"\n".join(orjson.dumps(r) for r in requests)
+            batch_file = self.client.files.create(file=("batch.jsonl", payload), purpose="batch")
+            batch = self.client.batches.create(
+                input_file_id=batch_file.id,
+                endpoint="/v1/chat/completions",
+                completion_window="24h"
+            )
+            logger.info("Submitted chat batch", batch_id=batch.id, requests=len(requests))
+            return batch.id
+        except Exception as e:
+            logger.error("Failed to submit batch", requests=len(requests), error=str(e))
+            raise
+    
+    @retry(
+        stop=stop_after_attempt(3),
+        wait=wait_exponential(multiplier=1, min=2, max=30),
+        retry=retry_if_exception_type((OpenAIAPIError,)),
+        reraise=True
+    )
+    def poll_batch(self, batch_id: str) -> Optional[Dict[str, str]]:
+        # custom_id -> reply text once the batch has completed, None while it is still running
+        batch = self.client.batches.retrieve(batch_id)
+        if batch.status in ("failed", "expired", "cancelled"):
+            logger.error("Chat batch did not complete", batch_id=batch_id, status=batch.status)
+            raise RuntimeError(f"Batch {batch_id} ended with status {batch.status}")
+        if batch.status != "completed":
+            logger.debug("Chat batch still running", batch_id=batch_id, status=batch.status)
+            return None
+        
+        results: Dict[str, str] = {}
+        if batch.output_file_id:
+            for line in self.client.files.content(batch.output_file_id).text.splitlines():
+                if not line.strip():
+                    continue
+                item = orjson.loads(line)
+                response = item.get("response") or {}
+                if response.get("status_code") != 200:
+                    logger.warning("Batch request failed", batch_id=batch_id, custom_id=item.get("custom_id"), error=item.get("error"))
+                    continue
+                content = response["body"]["choices"][0]["message"]["content"]
+                if content and content.strip():
+                    results[item["custom_id"]] = content
+        
+        logger.info("Chat batch completed", batch_id=batch_id, results=len(results))
+        return results
+    
+    def _extract_messages(self, raw_html: str, ticker: Optional[str]) -> List[Dict[str, str]]:
+        # Prompt for article extraction
+        # Fixed lead-in first, per-call values last so more of the prefix matches; built in one pass
+        ticker_note = f"\n\nExpected ticker: {ticker} - the article MUST mention this company to be usable." if ticker else ""
+        return [
+            _EXTRACT_SYSTEM_MESSAGE,
+            {"role": "user", "content": f"Extract article information from this HTML:\n\n{raw_html[:8000]}{ticker_note}"}
+        ]
+    
+    def _parse_extracted(self, response: str) -> Dict[str, Any]:
+        # Decode extraction JSON with a safe default
+        try:
+            return orjson.loads(response)
+        except orjson.JSONDecodeError:
             logger.error("Failed to parse LLM JSON response", response=response[:200])
             return {
                 "title": "Unknown",
                 "ticker": None,
                 "content_text": "",
                 "is_usable": False,
-                "reason": "Failed to parse LLM response",
+                "reason": _PARSE_FAILED_REASON,
                 "timestamp": None
             }
-
+    
+    def _extract_cache_key(self, raw_html: str, ticker: Optional[str]) -> str:
+        # Same model, ticker and prompt text up to whitespace, so wire copy republished
+        # by several outlets is extracted once
+        text = _WHITESPACE_RE.sub(" ", raw_html[:8000]).strip()
+        return "extract:" + hashlib.sha256(orjson.dumps([self.chat_model, ticker, text])).hexdigest()
+    
+    def _cached_extraction(self, key: str) -> Optional[Dict[str, Any]]:
+        # Previous extraction for this key, a copy so callers can modify it
+        try:
+            hit = get_cache().get(key)
+        except Exception as e:
+            logger.warning("Extraction cache read failed", error=str(e))
+            return None
+        if hit is None:
+            return None
+        logger.debug("Extraction cache hit", key=key)
+        return dict(hit[0])
+    
+    def _store_extraction(self, key: str, extracted: Dict[str, Any]):
+        # Remember a parsed extraction, unparseable replies are retried next time
+        if extracted.get("reason") == _PARSE_FAILED_REASON:
+            return
+        try:
+            get_cache().set(key, extracted, _EXTRACT_CACHE_TTL)
+        except Exception as e:
+            logger.warning("Extraction cache write failed", error=str(e))
+    
+    def extract_article_json(self, raw_html: str, ticker: Optional[str] = None) -> Dict[str, Any]:
+        # Parse news HTML to JSON
+        key = self._extract_cache_key(raw_html, ticker)
+        cached = self._cached_extraction(key)
+        if cached is not None:
+            return cached
+        
+        response = self.chat_completion(
+            self._extract_messages(raw_html, ticker),
+            temperature=0.3,
+            response_format={"type": "json_object"}
+        )
+        extracted = self._parse_extracted(response)
+        self._store_extraction(key, extracted)
+        return extracted
+    
+    async def aextract_article_json(self, raw_html: str, ticker: Optional[str] = None) -> Dict[str, Any]:
+        # Async variant for batch cleaning
+        key = self._extract_cache_key(raw_html, ticker)
+        cached = self._cached_extraction(key)
+        if cached is not None:
+            return cached
+        
+        response = await self.achat_completion(
+            self._extract_messages(raw_html, ticker),
+            temperature=0.3,
+            response_format={"type": "json_object"}
+        )
+        extracted = self._parse_extracted(response)
+        self._store_extraction(key, extracted)
+        return extracted
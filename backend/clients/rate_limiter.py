@@ -0,0 +1,46 @@
+# Token-bucket limiter shared by the API clients
+import asyncio
+import time
+import threading
+import structlog
+
+
+logger = structlog.get_logger(__name__)
+
+
+class RateLimiter:
+    # Token bucket: bursts up to max_calls, refilled at max_calls per period
+    
+    def __init__(self, max_calls: int, period_seconds: int, db_client=None):
+        # Tracks call frequency
+        self.max_calls = max_calls
+        self.period_seconds = period_seconds
+        self.rate = max_calls / period_seconds  # Tokens added per second
+        self.tokens = float(max_calls)
+        self.last_refill = time.monotonic()
+        self.lock = threading.Lock()
+        self.db_client = db_client
+        logger.info("Rate limiter initialized", max_calls=max_calls, period_seconds=period_seconds, rate=self.rate, shared=db_client is not None)
+    
+    def _take(self) -> float:
+        # Take a token if one is available, else return how long to wait for it
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(float(self.max_calls), self.tokens + (now - self.last_refill) * self.rate)
+            self.last_refill = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0.0
+            return (1 - self.tokens) / self.rate
+    
+    def wait_if_needed(self):
+        # Take a token, sleeping (outside the lock) until one is available
+        while (sleep_time := self._take()) > 0:
+            logger.debug("Rate limiting", sleep_time=sleep_time, calls_per_minute=self.max_calls)
+            time.sleep(sleep_time)
+    
+    async def acquire(self):
+        # Async wait_if_needed, paces on the event loop instead of a worker thread
+        while (sleep_time := self._take()) > 0:
+            logger.debug("Rate limiting", sleep_time=sleep_time, calls_per_minute=self.max_calls)
+            await asyncio.sleep(sleep_time)
@@ -1,5 +1,7 @@
 # Config from env
 from typing import List
+import os
+import tempfile
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from pydantic import Field, AliasChoices
 
@@ -19,6 +21,16 @@ class Settings(BaseSettings):
     postgres_url: str = Field(..., validation_alias=AliasChoices("POSTGRES_URL", "DATABASE_URL"))
     stock_list: str = Field(..., validation_alias=AliasChoices("STOCK_LIST", "STOCKS"))
     log_level: str = Field(default="INFO", validation_alias=AliasChoices("LOG_LEVEL", "LOGLEVEL"))
+    llm_calls_per_minute: int = Field(default=1000, validation_alias=AliasChoices("LLM_CALLS_PER_MINUTE"))
+    finnhub_calls_per_minute: int = Field(default=60, validation_alias=AliasChoices("FINNHUB_CALLS_PER_MINUTE"))
+    api_cache_path: str = Field(
+        default=os.path.join(tempfile.gettempdir(), "trading_api_cache.sqlite3"),
+        validation_alias=AliasChoices("API_CACHE_PATH")
+    )
+    graph_checkpoint_path: str = Field(
+        default=os.path.join(tempfile.gettempdir(), "trading_graph_state.sqlite3"),
+        validation_alias=AliasChoices("GRAPH_CHECKPOINT_PATH")
+    )
 
     @property
     def finnhub_key(self) -> str:
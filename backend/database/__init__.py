@@ -4,6 +4,9 @@ from .models import (
     ArticleCleaned,
     ArticleEmbedding,
     StockSnapshot,
+    SnapshotView,
+    AnalysisBundle,
+    SimilarArticle,
     AnalysisEvent,
     Debate,
     TradeProposal,
@@ -16,6 +19,9 @@ __all__ = [
     "ArticleCleaned",
     "ArticleEmbedding",
     "StockSnapshot",
+    "SnapshotView",
+    "AnalysisBundle",
+    "SimilarArticle",
     "AnalysisEvent",
     "Debate",
     "TradeProposal",
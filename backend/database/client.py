@@ -1,14 +1,19 @@
 # Postgre client with vector support
-import json
-from typing import List, Optional, Dict, Any
-from datetime import datetime, timedelta
+import os
+import threading
+import weakref
+from typing import List, Optional, Dict, Any, Callable, Hashable, Iterator, Sequence, Set, Tuple
+from datetime import date, datetime, timedelta
 from decimal import Decimal
 import structlog
 import psycopg2
+from cachetools import LRUCache, TTLCache
+from psycopg2 import sql
 from psycopg2.extras import RealDictCursor, execute_values
-from psycopg2.pool import ThreadedConnectionPool
+from psycopg2.pool import PoolError, ThreadedConnectionPool
 from pgvector.psycopg2 import register_vector
 import numpy as np
+import zstandard
 
 from backend.config import settings
 from backend.database.models import (
@@ -16,6 +21,9 @@ from backend.database.models import (
     ArticleCleaned,
     ArticleEmbedding,
     StockSnapshot,
+    SnapshotView,
+    AnalysisBundle,
+    SimilarArticle,
     AnalysisEvent,
     Debate,
     TradeProposal,
@@ -25,33 +33,210 @@ from backend.database.models import (
 
 logger = structlog.get_logger(__name__)
 
+# zstd level for raw_html_zstd, level 3 is the library default speed/ratio point
+_HTML_ZSTD_LEVEL = 3
+
+
+def _compress_html(raw_html: str) -> bytes:
+    # Page text to the bytes stored in raw_html_zstd
+    return zstandard.compress(raw_html.encode("utf-8"), _HTML_ZSTD_LEVEL)
+
+
+def _decompress_html(data) -> str:
+    # Inverse of _compress_html, psycopg2 hands bytea back as a memoryview
+    return zstandard.decompress(bytes(data)).decode("utf-8")
+
+
+def _seen_key(url: str, ticker: Optional[str]) -> int:
+    # Seen-article cache key; an int holds far less memory than the url string it stands for,
+    # and a 64-bit clash within the cache is vanishingly unlikely
+    return hash((url, ticker))
+
+
+def _copy_read(value: Any) -> Any:
+    # Caller-owned copy of a cached read: fresh lists and dicts all the way down,
+    # frozen views and scalars are shared as they cannot change
+    if isinstance(value, list):
+        return [_copy_read(item) for item in value]
+    if isinstance(value, dict):
+        return {key: _copy_read(item) for key, item in value.items()}
+    return value
+
+
+# stock_snapshots columns in SnapshotView field order, numerics cast so rows map positionally
+_SNAPSHOT_VIEW_COLUMNS = """
+    ticker, price::float8, 0.0::float8, 0.0::float8, id, volume,
+    high::float8, low::float8, open_price::float8, close_price::float8,
+    market_cap, pe_ratio::float8, dividend_yield::float8, snapshot_time,
+    COALESCE(data_source, 'finnhub')
+"""
+
 
 class DatabaseClient:
     # Handles persistence and vector search
     
+    # Hot reads (trades, latest snapshot, recent news) are reused within this window.
+    # The cache is per process: this client's own writes invalidate it, but writes from
+    # another service (e.g. the scraper's article inserts) show up only once an entry expires
+    _READ_CACHE_TTL = 30.0
+    _READ_CACHE_SIZE = 1024
+    # Keys of (url, ticker) pairs known to be cleaned; a cleaned article never becomes uncleaned
+    _SEEN_ARTICLES_SIZE = 50000
+    
+    # Checkouts beyond maxconn wait this long for a free connection; the bare pool raises at once
+    _CHECKOUT_TIMEOUT = 30.0
+    
+    # Latest-snapshot reads only look this far back, letting the planner prune older partitions
+    _LATEST_SNAPSHOT_WINDOW = timedelta(days=7)
+    
+    # HNSW graph for article vector search (migration 03); higher ef_search trades speed for recall.
+    # The graph indexes a half-precision copy of each vector, storage stays full precision
+    _EMBEDDING_DIM = 1536
+    _HNSW_EF_SEARCH = 100
+    
     def __init__(self):
         # Create pool
+        self._inherited_pools: List[ThreadedConnectionPool] = []
+        self._init_pool(maxconn=10)
+        logger.info("Database connection pool initialized")
+    
+    def _init_pool(self, maxconn: int):
+        # Pool plus the per-connection state that must not cross a fork
         self.pool = ThreadedConnectionPool(
             minconn=1,
-            maxconn=10,
+            maxconn=maxconn,
             dsn=settings.postgres_url,
         )
-        logger.info("Database connection pool initialized")
+        self._conn_slots = threading.Semaphore(maxconn)
+        self._pid = os.getpid()
+        self._read_cache = TTLCache(maxsize=self._READ_CACHE_SIZE, ttl=self._READ_CACHE_TTL)
+        self._read_cache_lock = threading.Lock()
+        # Positive answers only: cleaned (url, ticker) pairs and the UTC day a trade was seen
+        self._seen_articles = LRUCache(maxsize=self._SEEN_ARTICLES_SIZE)
+        self._traded_on: Optional[date] = None
+        # First day of the UTC month whose snapshot partitions are known to exist
+        self._partitions_month: Optional[date] = None
+        self._partitions_lock = threading.Lock()
+        # Names of statements already PREPAREd on each pooled connection
+        self._prepared: "weakref.WeakKeyDictionary[Any, set]" = weakref.WeakKeyDictionary()
+        self._prepared_lock = threading.Lock()
+        # Pooled connections that already know the pgvector type
+        self._vector_conns: "weakref.WeakSet[Any]" = weakref.WeakSet()
+    
+    def configure_for_process(self, maxconn: int = 3):
+        # Give a forked worker its own small pool. The inherited connections share sockets
+        # with the parent, so they are kept referenced (closing them would end the parent's sessions)
+        self._inherited_pools.append(self.pool)
+        self._init_pool(maxconn=maxconn)
+        logger.info("Database pool reinitialized for process", pid=self._pid, maxconn=maxconn)
+    
+    def _ensure_snapshot_partitions(self):
+        # This and next month's stock_snapshots partitions, checked once per UTC month by the
+        # snapshot writers so long-running services keep creating them ahead of time.
+        # A no-op before the partitioning migration; failures are retried on the next write
+        month = datetime.utcnow().date().replace(day=1)
+        if self._partitions_month == month:
+            return
+        with self._partitions_lock:
+            if self._partitions_month == month:
+                return
+            conn = self._get_conn()
+            try:
+                with conn.cursor() as cur:
+                    cur.execute("SELECT to_regproc('create_stock_snapshot_partitions') IS NOT NULL")
+                    if cur.fetchone()[0]:
+                        cur.execute("SELECT create_stock_snapshot_partitions(now(), now() + interval '1 month')")
+                conn.commit()
+                self._partitions_month = month
+            except Exception as e:
+                conn.rollback()
+                logger.warning("Failed to ensure snapshot partitions", error=str(e))
+            finally:
+                self._put_conn(conn)
     
     def _get_conn(self):
-        # Checkout from pool
-        return self.pool.getconn()
+        # Checkout from pool, reopening it first if this is a forked child
+        if os.getpid() != self._pid:
+            self.configure_for_process()
+        if not self._conn_slots.acquire(timeout=self._CHECKOUT_TIMEOUT):
+            raise PoolError("connection pool exhausted")
+        try:
+            return self.pool.getconn()
+        except Exception:
+            self._conn_slots.release()
+            raise
     
     def _put_conn(self, conn):
-        # Checkin to pool
-        self.pool.putconn(conn)
+        # Checkin to pool, freeing a slot for a waiting thread
+        try:
+            self.pool.putconn(conn)
+        finally:
+            self._conn_slots.release()
+    
+    def _get_vector_conn(self):
+        # Checkout with the vector type registered, the OID lookup runs once per connection
+        conn = self._get_conn()
+        if conn not in self._vector_conns:
+            try:
+                register_vector(conn)
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                self._put_conn(conn)
+                raise
+            self._vector_conns.add(conn)
+        return conn
+    
+    def _cached_read(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        # Serve from the read cache, load and store on miss; callers get their own copy,
+        # so mutating a result cannot change what later readers see
+        with self._read_cache_lock:
+            if key in self._read_cache:
+                return _copy_read(self._read_cache[key])
+        value = loader()
+        with self._read_cache_lock:
+            self._read_cache[key] = value
+        return _copy_read(value)
+    
+    def _invalidate_reads(self, *kinds: str):
+        # Drop cached reads whose key starts with one of kinds
+        with self._read_cache_lock:
+            for key in [k for k in self._read_cache.keys() if k[0] in kinds]:
+                self._read_cache.pop(key, None)
+    
+    def _execute_prepared(self, cur, name: str, query: str, params: tuple):
+        # Run a %s-style query as a named prepared statement, parsed once per connection
+        with self._prepared_lock:
+            prepared = self._prepared.setdefault(cur.connection, set())
+        if name not in prepared:
+            parts = query.split("%s")
+            body = "".join(f"{part}${i}" for i, part in enumerate(parts[:-1], 1)) + parts[-1]
+            cur.execute(f"PREPARE {name} AS {body}")
+            prepared.add(name)
+        cur.execute(f"EXECUTE {name} ({', '.join(['%s'] * len(params))})", params)
     
-    def _execute_query(self, query: str, params: tuple = None, fetch: bool = True):
+    def _execute_query(
+        self,
+        query: str,
+        params: tuple = None,
+        fetch: bool = True,
+        prepared_name: Optional[str] = None,
+        readonly: bool = False
+    ):
         # Run SQL with cursor management
         conn = self._get_conn()
         try:
+            if readonly:
+                # Single SELECT in autocommit: no BEGIN, COMMIT or checkin rollback round trips
+                conn.autocommit = True
+                with conn.cursor(cursor_factory=RealDictCursor) as cur:
+                    cur.execute(query, params)
+                    return cur.fetchall()
             with conn.cursor(cursor_factory=RealDictCursor) as cur:
-                cur.execute(query, params)
+                if prepared_name:
+                    self._execute_prepared(cur, prepared_name, query, params)
+                else:
+                    cur.execute(query, params)
                 if fetch:
                     results = cur.fetchall()
                     conn.commit()
@@ -60,29 +245,81 @@ class DatabaseClient:
                     conn.commit()
                     return cur.rowcount
         except Exception as e:
-            conn.rollback()
+            if not readonly:
+                conn.rollback()
+            logger.error("Database query failed", error=str(e), query=query[:100])
+            raise
+        finally:
+            if readonly and not conn.closed:
+                conn.autocommit = False
+            self._put_conn(conn)
+    
+    def _execute_query_rows(self, query: str, params: tuple, row_cls: Callable) -> list:
+        # Read-only SELECT on a plain tuple cursor, each row becomes row_cls(*row).
+        # Skips the per-row dict RealDictCursor builds; column order must match row_cls
+        conn = self._get_conn()
+        try:
+            conn.autocommit = True
+            with conn.cursor() as cur:
+                cur.execute(query, params)
+                return [row_cls(*row) for row in cur.fetchall()]
+        except Exception as e:
             logger.error("Database query failed", error=str(e), query=query[:100])
             raise
+        finally:
+            if not conn.closed:
+                conn.autocommit = False
+            self._put_conn(conn)
+    
+    def _execute_pipeline(self, statements: List[tuple]) -> List[Dict[str, Any]]:
+        # Send several (query, params) statements as one request in one transaction,
+        # returns the rows of the last statement
+        conn = self._get_conn()
+        try:
+            with conn.cursor(cursor_factory=RealDictCursor) as cur:
+                batch = b";\n".join(cur.mogrify(query, params) for query, params in statements)
+                cur.execute(batch)
+                results = cur.fetchall() if cur.description else []
+                conn.commit()
+                return results
+        except Exception as e:
+            conn.rollback()
+            logger.error("Pipelined statements failed", error=str(e), count=len(statements))
+            raise
         finally:
             self._put_conn(conn)
     
     # Article operations
     def save_raw_article(self, article: ArticleRaw) -> Optional[int]:
-        # Save HTML before processing
+        # Save HTML before processing, a re-scraped url keeps its stored page and id
         conn = self._get_conn()
         try:
             with conn.cursor(cursor_factory=RealDictCursor) as cur:
+                # DO NOTHING skips rewriting the TOASTed raw_html on duplicates
                 query = """
-                    INSERT INTO articles_raw (url, raw_html, ticker, source_url, scraped_at)
-                    VALUES (%s, %s, %s, %s, %s)
-                    ON CONFLICT (url) DO UPDATE SET
-                        raw_html = EXCLUDED.raw_html,
-                        scraped_at = EXCLUDED.scraped_at
-                    RETURNING id
+                    WITH ins AS (
+                        INSERT INTO articles_raw (url, raw_html_zstd, ticker, source_url, scraped_at)
+                        VALUES (%s, %s, %s, %s, %s)
+                        ON CONFLICT (url) DO NOTHING
+                        RETURNING id
+                    )
+                    SELECT id FROM ins
+                    UNION ALL
+                    SELECT id FROM articles_raw WHERE url = %s AND NOT EXISTS (SELECT 1 FROM ins)
+                    LIMIT 1
                 """
-                cur.execute(
+                self._execute_prepared(
+                    cur,
+                    "prep_save_raw",
                     query,
-                    (article.url, article.raw_html, article.ticker, article.source_url, article.scraped_at or datetime.utcnow())
+                    (
+                        article.url,
+                        _compress_html(article.raw_html),
+                        article.ticker,
+                        article.source_url,
+                        article.scraped_at or datetime.utcnow(),
+                        article.url,
+                    )
                 )
                 result = cur.fetchone()
                 if not result:
@@ -99,6 +336,49 @@ class DatabaseClient:
         finally:
             self._put_conn(conn)
     
+    def save_raw_articles_bulk(self, articles: List[ArticleRaw]) -> List[Optional[int]]:
+        # Save many raw pages in one INSERT, ids in input order
+        if not articles:
+            return []
+        # One row per url, the first copy wins like an already stored page does
+        by_url: Dict[str, ArticleRaw] = {}
+        for article in articles:
+            by_url.setdefault(article.url, article)
+        conn = self._get_conn()
+        try:
+            with conn.cursor(cursor_factory=RealDictCursor) as cur:
+                rows = execute_values(
+                    cur,
+                    """
+                        INSERT INTO articles_raw (url, raw_html_zstd, ticker, source_url, scraped_at)
+                        VALUES %s
+                        ON CONFLICT (url) DO NOTHING
+                        RETURNING id, url
+                    """,
+                    [
+                        (a.url, _compress_html(a.raw_html), a.ticker, a.source_url, a.scraped_at or datetime.utcnow())
+                        for a in by_url.values()
+                    ],
+                    page_size=500,
+                    fetch=True
+                )
+                # Duplicates return nothing under DO NOTHING, look their ids up
+                inserted = {row["url"] for row in rows}
+                existing = [url for url in by_url if url not in inserted]
+                if existing:
+                    cur.execute("SELECT id, url FROM articles_raw WHERE url = ANY(%s)", (existing,))
+                    rows.extend(cur.fetchall())
+                conn.commit()
+        except Exception as e:
+            conn.rollback()
+            logger.error("Failed to save raw articles", error=str(e), count=len(articles))
+            raise
+        finally:
+            self._put_conn(conn)
+        
+        ids = {row["url"]: row["id"] for row in rows}
+        return [ids.get(article.url) for article in articles]
+    
     def save_cleaned_article(self, article: ArticleCleaned) -> Optional[int]:
         # Save LLM output
         conn = self._get_conn()
@@ -106,23 +386,15 @@ class DatabaseClient:
             with conn.cursor(cursor_factory=RealDictCursor) as cur:
                 query = """
                     INSERT INTO articles_cleaned 
-                    (raw_article_id, title, ticker, content_text, is_usable, reason, timestamp, llm_model, llm_response)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+                    (raw_article_id, title, ticker, content_text, content_preview, is_usable, reason, timestamp, llm_model, llm_response)
+                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
                     RETURNING id
                 """
-                cur.execute(
+                self._execute_prepared(
+                    cur,
+                    "prep_save_cleaned",
                     query,
-                    (
-                        article.raw_article_id,
-                        article.title,
-                        article.ticker,
-                        article.content_text,
-                        article.is_usable,
-                        article.reason,
-                        article.timestamp,
-                        article.llm_model,
-                        json.dumps(article.llm_response) if article.llm_response else None,
-                    )
+                    article.to_db_row()
                 )
                 result = cur.fetchone()
                 if not result:
@@ -131,6 +403,7 @@ class DatabaseClient:
                     return None
                 article_id = result["id"]
                 conn.commit()
+                self._invalidate_reads("articles")
                 return article_id
         except Exception as e:
             conn.rollback()
@@ -140,60 +413,51 @@ class DatabaseClient:
             self._put_conn(conn)
     
     def save_raw_and_cleaned_article(self, raw_article: ArticleRaw, cleaned_article: ArticleCleaned) -> tuple[Optional[int], Optional[int]]:
-        # Atomic save for both raw and cleaned
+        # Atomic save for both raw and cleaned, one statement and one round trip
         conn = self._get_conn()
         try:
             with conn.cursor(cursor_factory=RealDictCursor) as cur:
-                # First, save raw article
-                raw_query = """
-                    INSERT INTO articles_raw (url, raw_html, ticker, source_url, scraped_at)
-                    VALUES (%s, %s, %s, %s, %s)
-                    ON CONFLICT (url) DO UPDATE SET
-                        raw_html = EXCLUDED.raw_html,
-                        scraped_at = EXCLUDED.scraped_at
-                    RETURNING id
-                """
-                cur.execute(
-                    raw_query,
-                    (raw_article.url, raw_article.raw_html, raw_article.ticker, raw_article.source_url, raw_article.scraped_at or datetime.utcnow())
-                )
-                raw_result = cur.fetchone()
-                if not raw_result:
-                    logger.error("No ID returned from raw article INSERT", url=raw_article.url[:60] if raw_article.url else "no url")
-                    conn.rollback()
-                    return None, None
-                raw_id = raw_result["id"]
-                
-                # Then, save cleaned article using the same connection
-                cleaned_query = """
+                query = """
+                    WITH ins AS (
+                        INSERT INTO articles_raw (url, raw_html_zstd, ticker, source_url, scraped_at)
+                        VALUES (%s, %s, %s, %s, %s)
+                        ON CONFLICT (url) DO NOTHING
+                        RETURNING id
+                    ),
+                    raw_ins AS (
+                        SELECT id FROM ins
+                        UNION ALL
+                        SELECT id FROM articles_raw WHERE url = %s AND NOT EXISTS (SELECT 1 FROM ins)
+                        LIMIT 1
+                    )
                     INSERT INTO articles_cleaned 
-                    (raw_article_id, title, ticker, content_text, is_usable, reason, timestamp, llm_model, llm_response)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-                    RETURNING id
+                    (raw_article_id, title, ticker, content_text, content_preview, is_usable, reason, timestamp, llm_model, llm_response)
+                    SELECT raw_ins.id, %s, %s, %s, %s, %s, %s, %s, %s, %s::jsonb FROM raw_ins
+                    RETURNING raw_article_id AS raw_id, id AS cleaned_id
                 """
                 cur.execute(
-                    cleaned_query,
+                    query,
                     (
-                        raw_id,
-                        cleaned_article.title,
-                        cleaned_article.ticker,
-                        cleaned_article.content_text,
-                        cleaned_article.is_usable,
-                        cleaned_article.reason,
-                        cleaned_article.timestamp,
-                        cleaned_article.llm_model,
-                        json.dumps(cleaned_article.llm_response) if cleaned_article.llm_response else None,
+                        raw_article.url,
+                        _compress_html(raw_article.raw_html),
+                        raw_article.ticker,
+                        raw_article.source_url,
+                        raw_article.scraped_at or datetime.utcnow(),
+                        raw_article.url,
+                        *cleaned_article.to_db_row()[1:],
                     )
                 )
-                cleaned_result = cur.fetchone()
-                if not cleaned_result:
-                    logger.error("No ID returned from cleaned article INSERT", raw_id=raw_id)
+                result = cur.fetchone()
+                if not result:
+                    logger.error("No IDs returned from raw and cleaned article INSERT", url=raw_article.url[:60] if raw_article.url else "no url")
                     conn.rollback()
                     return None, None
-                cleaned_id = cleaned_result["id"]
                 
                 conn.commit()
-                return raw_id, cleaned_id
+                self._invalidate_reads("articles")
+                with self._read_cache_lock:
+                    self._seen_articles[_seen_key(raw_article.url, cleaned_article.ticker)] = True
+                return result["raw_id"], result["cleaned_id"]
         except Exception as e:
             conn.rollback()
             logger.error("Failed to save raw and cleaned article", error=str(e), url=raw_article.url[:60] if raw_article.url else "no url")
@@ -201,18 +465,80 @@ class DatabaseClient:
         finally:
             self._put_conn(conn)
     
+    def save_raw_and_cleaned_articles(
+        self,
+        items: List[Tuple[ArticleRaw, ArticleCleaned]]
+    ) -> List[Tuple[Optional[int], Optional[int]]]:
+        # save_raw_and_cleaned_article for many pairs: two multi-row INSERTs, one commit,
+        # (raw_id, cleaned_id) in input order
+        if not items:
+            return []
+        # One raw row per url, the first copy wins like an already stored page does
+        by_url: Dict[str, ArticleRaw] = {}
+        for raw_article, _ in items:
+            by_url.setdefault(raw_article.url, raw_article)
+        conn = self._get_conn()
+        try:
+            with conn.cursor() as cur:
+                rows = execute_values(
+                    cur,
+                    """
+                        INSERT INTO articles_raw (url, raw_html_zstd, ticker, source_url, scraped_at)
+                        VALUES %s
+                        ON CONFLICT (url) DO NOTHING
+                        RETURNING url, id
+                    """,
+                    [
+                        (a.url, _compress_html(a.raw_html), a.ticker, a.source_url, a.scraped_at or datetime.utcnow())
+                        for a in by_url.values()
+                    ],
+                    page_size=500,
+                    fetch=True
+                )
+                raw_ids = dict(rows)
+                existing = [url for url in by_url if url not in raw_ids]
+                if existing:
+                    cur.execute("SELECT url, id FROM articles_raw WHERE url = ANY(%s)", (existing,))
+                    raw_ids.update(cur.fetchall())
+                
+                rows = execute_values(
+                    cur,
+                    """
+                        INSERT INTO articles_cleaned
+                        (raw_article_id, title, ticker, content_text, content_preview, is_usable, reason, timestamp, llm_model, llm_response)
+                        VALUES %s
+                        RETURNING id
+                    """,
+                    [(raw_ids[raw.url], *cleaned.to_db_row()[1:]) for raw, cleaned in items],
+                    page_size=500,
+                    fetch=True
+                )
+                conn.commit()
+        except Exception as e:
+            conn.rollback()
+            logger.error("Failed to save raw and cleaned articles", error=str(e), count=len(items))
+            raise
+        finally:
+            self._put_conn(conn)
+        
+        self._invalidate_reads("articles")
+        with self._read_cache_lock:
+            for raw, cleaned in items:
+                self._seen_articles[_seen_key(raw.url, cleaned.ticker)] = True
+        return [(raw_ids[raw.url], row[0]) for (raw, _), row in zip(items, rows)]
+    
     def save_article_embedding(self, embedding: ArticleEmbedding) -> Optional[int]:
         # Save vector for search
-        conn = self._get_conn()
+        conn = self._get_vector_conn()
         try:
-            register_vector(conn)
             with conn.cursor() as cur:
                 cur.execute(
                     "INSERT INTO article_embeddings (cleaned_article_id, embedding) VALUES (%s, %s) RETURNING id",
-                    (embedding.cleaned_article_id, np.array(embedding.embedding))
+                    (embedding.cleaned_article_id, embedding.embedding)
                 )
                 result = cur.fetchone()
                 conn.commit()
+                self._invalidate_reads("articles")
                 return result[0] if result else None
         except Exception as e:
             conn.rollback()
@@ -221,29 +547,133 @@ class DatabaseClient:
         finally:
             self._put_conn(conn)
     
-    def get_recent_articles(self, ticker: Optional[str] = None, hours: int = 24) -> List[Dict[str, Any]]:
+    def save_article_embeddings_bulk(self, embeddings: List[ArticleEmbedding]) -> List[int]:
+        # Save many vectors in one INSERT, ids in input order
+        if not embeddings:
+            return []
+        conn = self._get_vector_conn()
+        try:
+            with conn.cursor() as cur:
+                rows = execute_values(
+                    cur,
+                    "INSERT INTO article_embeddings (cleaned_article_id, embedding) VALUES %s RETURNING id",
+                    list(zip((e.cleaned_article_id for e in embeddings), np.stack([e.embedding for e in embeddings]))),
+                    template="(%s, %s::vector)",
+                    page_size=500,
+                    fetch=True
+                )
+                conn.commit()
+                self._invalidate_reads("articles")
+                return [row[0] for row in rows]
+        except Exception as e:
+            conn.rollback()
+            logger.error("Failed to save embeddings", error=str(e), count=len(embeddings))
+            raise
+        finally:
+            self._put_conn(conn)
+    
+    def _recent_articles_from(self, preview_only: bool) -> str:
+        # SELECT/FROM for recent article reads; previews skip the body and embedding check
+        if preview_only:
+            return """
+                SELECT ac.id, ac.ticker, ac.title, ac.timestamp, ac.content_preview
+                FROM articles_cleaned ac
+            """
+        return """
+            SELECT ac.*, EXISTS (SELECT 1 FROM article_embeddings ae WHERE ae.cleaned_article_id = ac.id) as has_embedding
+            FROM articles_cleaned ac
+        """
+    
+    def get_recent_articles(self, ticker: Optional[str] = None, hours: int = 24, preview_only: bool = False) -> List[Dict[str, Any]]:
         # Filter cleaned news by time
+        return self._cached_read(
+            ("articles", ticker, hours, preview_only),
+            lambda: self._query_recent_articles(ticker, hours, preview_only)
+        )
+    
+    def _recent_articles_where(self, ticker: Optional[str], hours: int) -> tuple:
+        # WHERE/ORDER BY and params for recent usable articles
         since = datetime.utcnow() - timedelta(hours=hours)
         if ticker:
-            query = """
-                SELECT ac.*, ae.embedding IS NOT NULL as has_embedding
-                FROM articles_cleaned ac
-                LEFT JOIN article_embeddings ae ON ac.id = ae.cleaned_article_id
+            return """
                 WHERE ac.ticker = %s AND ac.is_usable = true AND ac.timestamp >= %s
                 ORDER BY ac.timestamp DESC
-            """
-            params = (ticker, since)
+            """, (ticker, since)
+        return """
+            WHERE ac.is_usable = true AND ac.timestamp >= %s
+            ORDER BY ac.timestamp DESC
+        """, (since,)
+    
+    def _query_recent_articles(self, ticker: Optional[str], hours: int, preview_only: bool) -> List[Dict[str, Any]]:
+        # Uncached read behind get_recent_articles
+        where, params = self._recent_articles_where(ticker, hours)
+        return self._execute_query(self._recent_articles_from(preview_only) + where, params, readonly=True)
+    
+    def iter_recent_articles(
+        self,
+        ticker: Optional[str] = None,
+        hours: int = 24,
+        columns: Optional[Sequence[str]] = None,
+        chunk: int = 200
+    ) -> Iterator[Dict[str, Any]]:
+        # Stream recent articles through a server-side cursor, chunk rows per fetch.
+        # columns limits the articles_cleaned fields sent; the connection is held until the iterator ends
+        where, params = self._recent_articles_where(ticker, hours)
+        if columns:
+            select = sql.SQL("SELECT {} FROM articles_cleaned ac ").format(
+                sql.SQL(", ").join(sql.Identifier("ac", column) for column in columns)
+            )
         else:
-            query = """
-                SELECT ac.*, ae.embedding IS NOT NULL as has_embedding
-                FROM articles_cleaned ac
-                LEFT JOIN article_embeddings ae ON ac.id = ae.cleaned_article_id
-                WHERE ac.is_usable = true AND ac.timestamp >= %s
-                ORDER BY ac.timestamp DESC
-            """
-            params = (since,)
+            select = sql.SQL(self._recent_articles_from(False))
         
-        return self._execute_query(query, params)
+        conn = self._get_conn()
+        try:
+            with conn.cursor(name="recent_articles", cursor_factory=RealDictCursor) as cur:
+                cur.itersize = chunk
+                cur.execute(select + sql.SQL(where), params)
+                yield from cur
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            logger.error("Failed to stream recent articles", error=str(e), ticker=ticker)
+            raise
+        finally:
+            self._put_conn(conn)
+    
+    def get_recent_articles_bulk(self, tickers: List[str], hours: int = 24, preview_only: bool = False) -> Dict[str, List[Dict[str, Any]]]:
+        # Recent news for many tickers in one query
+        if not tickers:
+            return {}
+        since = datetime.utcnow() - timedelta(hours=hours)
+        query = self._recent_articles_from(preview_only) + """
+            WHERE ac.ticker = ANY(%s) AND ac.is_usable = true AND ac.timestamp >= %s
+            ORDER BY ac.timestamp DESC
+        """
+        grouped: Dict[str, List[Dict[str, Any]]] = {t: [] for t in tickers}
+        for row in self._execute_query(query, (list(tickers), since), readonly=True):
+            grouped.setdefault(row["ticker"], []).append(row)
+        return grouped
+    
+    def get_article_embeddings(self, cleaned_article_ids: List[int]) -> Dict[int, np.ndarray]:
+        # Stored vectors keyed by cleaned article id
+        if not cleaned_article_ids:
+            return {}
+        conn = self._get_vector_conn()
+        try:
+            with conn.cursor() as cur:
+                cur.execute(
+                    "SELECT cleaned_article_id, embedding FROM article_embeddings WHERE cleaned_article_id = ANY(%s)",
+                    (list(cleaned_article_ids),)
+                )
+                rows = cur.fetchall()
+                conn.commit()
+                return {row[0]: row[1] for row in rows}
+        except Exception as e:
+            conn.rollback()
+            logger.error("Failed to fetch embeddings", error=str(e))
+            raise
+        finally:
+            self._put_conn(conn)
     
     def get_article_by_id(self, article_id: int) -> Optional[Dict[str, Any]]:
         # Fetch detailed article info
@@ -252,58 +682,102 @@ class DatabaseClient:
                 ac.*,
                 ar.url as raw_url,
                 ar.raw_html,
+                ar.raw_html_zstd,
                 ar.scraped_at,
-                ae.embedding IS NOT NULL as has_embedding
+                EXISTS (SELECT 1 FROM article_embeddings ae WHERE ae.cleaned_article_id = ac.id) as has_embedding
             FROM articles_cleaned ac
             LEFT JOIN articles_raw ar ON ac.raw_article_id = ar.id
-            LEFT JOIN article_embeddings ae ON ac.id = ae.cleaned_article_id
             WHERE ac.id = %s
         """
-        results = self._execute_query(query, (article_id,))
-        return results[0] if results else None
+        results = self._execute_query(query, (article_id,), readonly=True)
+        if not results:
+            return None
+        article = results[0]
+        compressed = article.pop("raw_html_zstd", None)
+        if compressed is not None:
+            article["raw_html"] = _decompress_html(compressed)
+        return article
     
     def cleaned_article_exists(self, url: str, ticker: str) -> bool:
-        # Avoid duplicate cleaning
+        # Avoid duplicate cleaning; a True answer is remembered, False is always re-checked
+        with self._read_cache_lock:
+            if _seen_key(url, ticker) in self._seen_articles:
+                return True
         query = """
-            SELECT COUNT(*) as count
-            FROM articles_cleaned ac
-            INNER JOIN articles_raw ar ON ac.raw_article_id = ar.id
-            WHERE ar.url = %s AND ac.ticker = %s
+            SELECT EXISTS (
+                SELECT 1
+                FROM articles_cleaned ac
+                INNER JOIN articles_raw ar ON ac.raw_article_id = ar.id
+                WHERE ar.url = %s AND ac.ticker = %s
+            ) as found
         """
-        results = self._execute_query(query, (url, ticker))
-        return results[0]["count"] > 0 if results else False
+        results = self._execute_query(query, (url, ticker), readonly=True)
+        found = results[0]["found"] if results else False
+        if found:
+            with self._read_cache_lock:
+                self._seen_articles[_seen_key(url, ticker)] = True
+        return found
     
-    def vector_search(self, query_embedding: List[float], limit: int = 10, ticker: Optional[str] = None) -> List[Dict[str, Any]]:
-        # Cosine similarity via pgvector
-        conn = self._get_conn()
+    def cleaned_articles_existing(self, pairs: List[Tuple[str, str]]) -> Set[Tuple[str, str]]:
+        # cleaned_article_exists for many (url, ticker) pairs in one query, returns the cleaned ones
+        with self._read_cache_lock:
+            found = {pair for pair in pairs if _seen_key(*pair) in self._seen_articles}
+        unknown = list(dict.fromkeys(pair for pair in pairs if pair not in found))
+        if not unknown:
+            return found
+        query = """
+            SELECT ar.url, ac.ticker
+            FROM unnest(%s::text[], %s::text[]) AS q(url, ticker)
+            INNER JOIN articles_raw ar ON ar.url = q.url
+            INNER JOIN articles_cleaned ac ON ac.raw_article_id = ar.id AND ac.ticker = q.ticker
+        """
+        results = self._execute_query(
+            query,
+            ([url for url, _ in unknown], [ticker for _, ticker in unknown]),
+            readonly=True
+        )
+        cleaned = {(row["url"], row["ticker"]) for row in results}
+        with self._read_cache_lock:
+            for pair in cleaned:
+                self._seen_articles[_seen_key(*pair)] = True
+        return found | cleaned
+    
+    def vector_search(
+        self,
+        query_embedding: List[float],
+        limit: int = 10,
+        ticker: Optional[str] = None,
+        rows_as_dicts: bool = False
+    ) -> list:
+        # Cosine similarity via pgvector. Hits come back as SimilarArticle tuples;
+        # rows_as_dicts returns the full articles_cleaned rows plus similarity instead
+        conn = self._get_vector_conn()
         try:
-            register_vector(conn)
-            with conn.cursor(cursor_factory=RealDictCursor) as cur:
-                if ticker:
-                    cur.execute(
-                        """
-                        SELECT ac.*, 1 - (ae.embedding <=> %s::vector) as similarity
-                        FROM article_embeddings ae
-                        JOIN articles_cleaned ac ON ae.cleaned_article_id = ac.id
-                        WHERE ac.ticker = %s AND ac.is_usable = true
-                        ORDER BY ae.embedding <=> %s::vector
-                        LIMIT %s
-                        """,
-                        (np.array(query_embedding), ticker, np.array(query_embedding), limit)
-                    )
-                else:
-                    cur.execute(
-                        """
-                        SELECT ac.*, 1 - (ae.embedding <=> %s::vector) as similarity
-                        FROM article_embeddings ae
-                        JOIN articles_cleaned ac ON ae.cleaned_article_id = ac.id
-                        WHERE ac.is_usable = true
-                        ORDER BY ae.embedding <=> %s::vector
-                        LIMIT %s
-                        """,
-                        (np.array(query_embedding), np.array(query_embedding), limit)
-                    )
-                return cur.fetchall()
+            with conn.cursor(cursor_factory=RealDictCursor if rows_as_dicts else None) as cur:
+                # Scoped to this transaction, the pool rolls it back on checkin
+                cur.execute("SET LOCAL hnsw.ef_search = %s", (self._HNSW_EF_SEARCH,))
+                # Distances use the same halfvec expression as the index so the planner can use it;
+                # the query vector is bound once and ORDER BY reuses the selected distance
+                half = f"halfvec({self._EMBEDDING_DIM})"
+                ticker_filter = "ac.ticker = %(ticker)s AND " if ticker else ""
+                columns = "ac.*" if rows_as_dicts else "ac.id, ac.ticker, ac.title, ac.timestamp, ac.content_preview"
+                cur.execute(
+                    f"""
+                    SELECT {columns}, ae.embedding::{half} <=> %(q)s::{half} as distance
+                    FROM article_embeddings ae
+                    JOIN articles_cleaned ac ON ae.cleaned_article_id = ac.id
+                    WHERE {ticker_filter}ac.is_usable = true
+                    ORDER BY distance
+                    LIMIT %(limit)s
+                    """,
+                    {"q": np.asarray(query_embedding, dtype=np.float32), "ticker": ticker, "limit": limit}
+                )
+                rows = cur.fetchall()
+                if not rows_as_dicts:
+                    return [SimilarArticle(*row[:-1], 1 - row[-1]) for row in rows]
+                for row in rows:
+                    row["similarity"] = 1 - row.pop("distance")
+                return rows
         except Exception as e:
             logger.error("Vector search failed", error=str(e))
             raise
@@ -311,53 +785,124 @@ class DatabaseClient:
             self._put_conn(conn)
     
     # Stock snapshot operations
-    def save_stock_snapshot(self, snapshot: StockSnapshot) -> int:
-        # Log market data sample
+    def _snapshot_params(self, snapshot: StockSnapshot) -> tuple:
+        # Column values for a stock_snapshots INSERT
+        return (
+            snapshot.ticker,
+            float(snapshot.price),
+            snapshot.volume,
+            float(snapshot.high) if snapshot.high else None,
+            float(snapshot.low) if snapshot.low else None,
+            float(snapshot.open_price) if snapshot.open_price else None,
+            float(snapshot.close_price) if snapshot.close_price else None,
+            snapshot.market_cap,
+            float(snapshot.pe_ratio) if snapshot.pe_ratio else None,
+            float(snapshot.dividend_yield) if snapshot.dividend_yield else None,
+            snapshot.snapshot_time or datetime.utcnow(),
+            snapshot.data_source,
+        )
+    
+    def save_stock_snapshot(self, snapshot: StockSnapshot) -> Optional[SnapshotView]:
+        # Log market data sample, returns the stored row so callers need no re-read
         query = """
             INSERT INTO stock_snapshots 
             (ticker, price, volume, high, low, open_price, close_price, market_cap, pe_ratio, dividend_yield, snapshot_time, data_source)
             VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-            RETURNING id
+            RETURNING *
         """
-        result = self._execute_query(
-            query,
-            (
-                snapshot.ticker,
-                float(snapshot.price),
-                snapshot.volume,
-                float(snapshot.high) if snapshot.high else None,
-                float(snapshot.low) if snapshot.low else None,
-                float(snapshot.open_price) if snapshot.open_price else None,
-                float(snapshot.close_price) if snapshot.close_price else None,
-                snapshot.market_cap,
-                float(snapshot.pe_ratio) if snapshot.pe_ratio else None,
-                float(snapshot.dividend_yield) if snapshot.dividend_yield else None,
-                snapshot.snapshot_time or datetime.utcnow(),
-                snapshot.data_source,
-            )
-        )
-        return result[0]["id"] if result else None
+        self._ensure_snapshot_partitions()
+        result = self._execute_query(query, self._snapshot_params(snapshot), prepared_name="prep_save_snapshot")
+        # Only this ticker's latest snapshot changed
+        with self._read_cache_lock:
+            self._read_cache.pop(("snapshot", snapshot.ticker), None)
+        return SnapshotView.from_row(result[0]) if result else None
     
-    def get_latest_snapshot(self, ticker: str) -> Optional[Dict[str, Any]]:
+    def save_stock_snapshots(self, snapshots: List[StockSnapshot]) -> Dict[str, SnapshotView]:
+        # Log many market data samples in one INSERT, stored rows keyed by ticker
+        if not snapshots:
+            return {}
+        self._ensure_snapshot_partitions()
+        conn = self._get_conn()
+        try:
+            with conn.cursor(cursor_factory=RealDictCursor) as cur:
+                rows = execute_values(
+                    cur,
+                    """
+                        INSERT INTO stock_snapshots
+                        (ticker, price, volume, high, low, open_price, close_price, market_cap, pe_ratio, dividend_yield, snapshot_time, data_source)
+                        VALUES %s
+                        RETURNING *
+                    """,
+                    [self._snapshot_params(snapshot) for snapshot in snapshots],
+                    fetch=True
+                )
+                conn.commit()
+        except Exception as e:
+            conn.rollback()
+            logger.error("Failed to save stock snapshots", error=str(e), count=len(snapshots))
+            raise
+        finally:
+            self._put_conn(conn)
+        
+        with self._read_cache_lock:
+            for snapshot in snapshots:
+                self._read_cache.pop(("snapshot", snapshot.ticker), None)
+        return {row["ticker"]: SnapshotView.from_row(row) for row in rows}
+    
+    def get_latest_snapshot(self, ticker: str) -> Optional[SnapshotView]:
         # Most recent price
-        query = """
-            SELECT * FROM stock_snapshots
-            WHERE ticker = %s
+        return self._cached_read(("snapshot", ticker), lambda: self._query_latest_snapshot(ticker))
+    
+    def _query_latest_snapshot(self, ticker: str) -> Optional[SnapshotView]:
+        # Uncached read behind get_latest_snapshot
+        query = f"""
+            SELECT {_SNAPSHOT_VIEW_COLUMNS} FROM stock_snapshots
+            WHERE ticker = %s AND snapshot_time >= %s
             ORDER BY snapshot_time DESC
             LIMIT 1
         """
-        result = self._execute_query(query, (ticker,))
+        since = datetime.utcnow() - self._LATEST_SNAPSHOT_WINDOW
+        result = self._execute_query_rows(query, (ticker, since), SnapshotView)
         return result[0] if result else None
     
-    def get_recent_snapshots(self, ticker: str, hours: int = 24) -> List[Dict[str, Any]]:
+    def get_latest_snapshots(self, tickers: List[str]) -> Dict[str, SnapshotView]:
+        # Most recent price for many tickers in one query
+        if not tickers:
+            return {}
+        snapshots: Dict[str, SnapshotView] = {}
+        missing = []
+        with self._read_cache_lock:
+            for ticker in tickers:
+                key = ("snapshot", ticker)
+                if key in self._read_cache:
+                    if self._read_cache[key] is not None:
+                        snapshots[ticker] = self._read_cache[key]
+                else:
+                    missing.append(ticker)
+        if not missing:
+            return snapshots
+        query = f"""
+            SELECT DISTINCT ON (ticker) {_SNAPSHOT_VIEW_COLUMNS} FROM stock_snapshots
+            WHERE ticker = ANY(%s) AND snapshot_time >= %s
+            ORDER BY ticker, snapshot_time DESC
+        """
+        since = datetime.utcnow() - self._LATEST_SNAPSHOT_WINDOW
+        fetched = {view.ticker: view for view in self._execute_query_rows(query, (missing, since), SnapshotView)}
+        with self._read_cache_lock:
+            for ticker in missing:
+                self._read_cache[("snapshot", ticker)] = fetched.get(ticker)
+        snapshots.update(fetched)
+        return snapshots
+    
+    def get_recent_snapshots(self, ticker: str, hours: int = 24) -> List[SnapshotView]:
         """Get recent stock snapshots."""
         since = datetime.utcnow() - timedelta(hours=hours)
-        query = """
-            SELECT * FROM stock_snapshots
+        query = f"""
+            SELECT {_SNAPSHOT_VIEW_COLUMNS} FROM stock_snapshots
             WHERE ticker = %s AND snapshot_time >= %s
             ORDER BY snapshot_time DESC
         """
-        return self._execute_query(query, (ticker, since))
+        return self._execute_query_rows(query, (ticker, since), SnapshotView)
     
     # Analysis event operations
     def save_analysis_event(self, event: AnalysisEvent) -> Optional[int]:
@@ -370,16 +915,11 @@ class DatabaseClient:
                     VALUES (%s, %s, %s, %s, %s, %s)
                     RETURNING id
                 """
-                cur.execute(
+                self._execute_prepared(
+                    cur,
+                    "prep_save_analysis_event",
                     query,
-                    (
-                        event.ticker,
-                        event.event_type,
-                        event.reasoning,
-                        json.dumps(event.input_data) if event.input_data else None,
-                        json.dumps(event.output_data) if event.output_data else None,
-                        event.agent_name,
-                    )
+                    event.to_db_row()
                 )
                 result = cur.fetchone()
                 if not result:
@@ -396,6 +936,32 @@ class DatabaseClient:
         finally:
             self._put_conn(conn)
     
+    def save_analysis_events(self, events: List[AnalysisEvent]) -> List[Optional[int]]:
+        # Log many agent steps in one INSERT, ids in input order
+        if not events:
+            return []
+        conn = self._get_conn()
+        try:
+            with conn.cursor(cursor_factory=RealDictCursor) as cur:
+                rows = execute_values(
+                    cur,
+                    """
+                        INSERT INTO analysis_events (ticker, event_type, reasoning, input_data, output_data, agent_name)
+                        VALUES %s
+                        RETURNING id
+                    """,
+                    [event.to_db_row() for event in events],
+                    fetch=True
+                )
+                conn.commit()
+                return [row["id"] for row in rows]
+        except Exception as e:
+            conn.rollback()
+            logger.error("Failed to save analysis events", error=str(e), count=len(events))
+            raise
+        finally:
+            self._put_conn(conn)
+    
     # Debate operations
     def save_debate(self, debate: Debate) -> int:
         # Save analyst transcript
@@ -406,15 +972,7 @@ class DatabaseClient:
         """
         result = self._execute_query(
             query,
-            (
-                debate.ticker,
-                debate.debate_type,
-                json.dumps(debate.transcript),
-                debate.bull_argument,
-                debate.bear_argument,
-                debate.final_consensus,
-                debate.trader_agent_id,
-            )
+            debate.to_db_row()
         )
         return result[0]["id"] if result else None
     
@@ -430,7 +988,9 @@ class DatabaseClient:
                     VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
                     RETURNING id
                 """
-                cur.execute(
+                self._execute_prepared(
+                    cur,
+                    "prep_save_trade_proposal",
                     query,
                     (
                         proposal.ticker,
@@ -466,66 +1026,216 @@ class DatabaseClient:
             WHERE status = 'PENDING'
             ORDER BY created_at DESC
         """
-        return self._execute_query(query)
+        return self._execute_query(query, readonly=True)
+    
+    def get_recent_proposals(self, limit: int = 20) -> List[Dict[str, Any]]:
+        # Newest proposals with only the columns the dashboard renders
+        query = """
+            SELECT id, ticker, action, quantity, proposed_price::float8 AS proposed_price,
+                   reasoning, confidence_score::float8 AS confidence_score, status, created_at
+            FROM trade_proposals
+            ORDER BY created_at DESC
+            LIMIT %s
+        """
+        return self._execute_query(query, (limit,), readonly=True)
     
     def update_proposal_status(self, proposal_id: int, status: str):
         # Transitions pending -> executed/rejected
-        query = "UPDATE trade_proposals SET status = %s WHERE id = %s"
-        self._execute_query(query, (status, proposal_id), fetch=False)
+        self.update_proposal_statuses([(proposal_id, status)])
+    
+    def update_proposal_statuses(self, items: List[Tuple[int, str]]):
+        # Apply many (proposal_id, status) transitions in one UPDATE
+        if not items:
+            return
+        conn = self._get_conn()
+        try:
+            with conn.cursor() as cur:
+                execute_values(
+                    cur,
+                    """
+                        UPDATE trade_proposals SET status = data.status
+                        FROM (VALUES %s) AS data(id, status)
+                        WHERE trade_proposals.id = data.id
+                    """,
+                    items,
+                    template="(%s::integer, %s::text)"
+                )
+                conn.commit()
+        except Exception as e:
+            conn.rollback()
+            logger.error("Failed to update proposal statuses", error=str(e), count=len(items))
+            raise
+        finally:
+            self._put_conn(conn)
+        self._invalidate_reads("trades")
     
     # Executed trade operations
-    def save_executed_trade(self, trade: ExecutedTrade) -> int:
-        # Record final Alpaca order
+    def save_executed_trade(self, trade: ExecutedTrade, mark_proposal_executed: bool = False) -> int:
+        # Record final Alpaca order, optionally flipping its proposal to EXECUTED in the same round trip
         query = """
             INSERT INTO executed_trades 
             (trade_proposal_id, ticker, action, quantity, execution_price, alpaca_order_id, portfolio_manager_reasoning, status)
             VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
             RETURNING id
         """
-        result = self._execute_query(
-            query,
-            (
-                trade.trade_proposal_id,
-                trade.ticker,
-                trade.action,
-                trade.quantity,
-                float(trade.execution_price),
-                trade.alpaca_order_id,
-                trade.portfolio_manager_reasoning,
-                trade.status,
-            )
+        params = (
+            trade.trade_proposal_id,
+            trade.ticker,
+            trade.action,
+            trade.quantity,
+            float(trade.execution_price),
+            trade.alpaca_order_id,
+            trade.portfolio_manager_reasoning,
+            trade.status,
         )
+        if mark_proposal_executed and trade.trade_proposal_id:
+            result = self._execute_pipeline([
+                ("UPDATE trade_proposals SET status = 'EXECUTED' WHERE id = %s", (trade.trade_proposal_id,)),
+                (query, params),
+            ])
+        else:
+            result = self._execute_query(query, params)
+        self._invalidate_reads("trades")
+        self._traded_on = datetime.utcnow().date()
         return result[0]["id"] if result else None
     
-    def get_recent_trades(self, ticker: Optional[str] = None, days: int = 30) -> List[Dict[str, Any]]:
-        # Done trades history
+    def get_executed_trade_for_proposal(self, proposal_id: int) -> Optional[ExecutedTrade]:
+        # Trade already recorded for a proposal, uncached so a resumed run never re-submits it
+        query = "SELECT * FROM executed_trades WHERE trade_proposal_id = %s ORDER BY id LIMIT 1"
+        result = self._execute_query(query, (proposal_id,), readonly=True)
+        return ExecutedTrade(**result[0]) if result else None
+    
+    def get_recent_trades(
+        self,
+        ticker: Optional[str] = None,
+        days: int = 30,
+        limit: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        # Done trades history, newest first; limit is applied in SQL
+        return self._cached_read(
+            ("trades", ticker, days, limit),
+            lambda: self._query_recent_trades(ticker, days, limit)
+        )
+    
+    def _query_recent_trades(self, ticker: Optional[str], days: int, limit: Optional[int]) -> List[Dict[str, Any]]:
+        # Uncached read behind get_recent_trades, LIMIT NULL means no limit
         since = datetime.utcnow() - timedelta(days=days)
         if ticker:
             query = """
                 SELECT * FROM executed_trades
                 WHERE ticker = %s AND executed_at >= %s
                 ORDER BY executed_at DESC
+                LIMIT %s
             """
-            params = (ticker, since)
+            params = (ticker, since, limit)
         else:
             query = """
                 SELECT * FROM executed_trades
                 WHERE executed_at >= %s
                 ORDER BY executed_at DESC
+                LIMIT %s
             """
-            params = (since,)
-        return self._execute_query(query, params)
+            params = (since, limit)
+        return self._execute_query(query, params, readonly=True)
+    
+    def get_analysis_bundle(
+        self,
+        ticker: str,
+        hours: int = 24,
+        days: int = 7,
+        article_limit: int = 10,
+        trade_limit: int = 5
+    ) -> AnalysisBundle:
+        # Article previews, latest snapshot and recent trades for one ticker in a single query
+        now = datetime.utcnow()
+        query = """
+            WITH a AS (
+                SELECT ac.id, ac.ticker, ac.title, ac.timestamp, ac.content_preview
+                FROM articles_cleaned ac
+                WHERE ac.ticker = %(ticker)s AND ac.is_usable = true AND ac.timestamp >= %(articles_since)s
+                ORDER BY ac.timestamp DESC
+                LIMIT %(article_limit)s
+            ), s AS (
+                SELECT * FROM stock_snapshots
+                WHERE ticker = %(ticker)s AND snapshot_time >= %(snapshot_since)s
+                ORDER BY snapshot_time DESC
+                LIMIT 1
+            ), t AS (
+                SELECT * FROM executed_trades
+                WHERE ticker = %(ticker)s AND executed_at >= %(trades_since)s
+                ORDER BY executed_at DESC
+                LIMIT %(trade_limit)s
+            )
+            SELECT
+                (SELECT COALESCE(json_agg(a ORDER BY a.timestamp DESC), '[]'::json) FROM a) AS articles,
+                (SELECT row_to_json(s) FROM s) AS snapshot,
+                (SELECT COALESCE(json_agg(t ORDER BY t.executed_at DESC), '[]'::json) FROM t) AS recent_trades
+        """
+        params = {
+            "ticker": ticker,
+            "articles_since": now - timedelta(hours=hours),
+            "trades_since": now - timedelta(days=days),
+            "snapshot_since": now - self._LATEST_SNAPSHOT_WINDOW,
+            "article_limit": article_limit,
+            "trade_limit": trade_limit,
+        }
+        row = self._execute_query(query, params, readonly=True)[0]
+        
+        # JSON round trip turns timestamps into strings; the snapshot keeps a real datetime
+        snapshot = row["snapshot"]
+        if snapshot and snapshot.get("snapshot_time"):
+            snapshot["snapshot_time"] = datetime.fromisoformat(snapshot["snapshot_time"])
+        return AnalysisBundle(
+            articles=row["articles"],
+            snapshot=SnapshotView.from_row(snapshot) if snapshot else None,
+            recent_trades=row["recent_trades"]
+        )
+    
+    def get_article_context(
+        self,
+        ticker: str,
+        analysis_limit: int = 5,
+        debate_limit: int = 3,
+        proposal_limit: int = 5
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        # Latest analysis events, debates and proposals for a ticker in a single query
+        query = """
+            WITH e AS (
+                SELECT * FROM analysis_events WHERE ticker = %(ticker)s
+                ORDER BY created_at DESC LIMIT %(analysis_limit)s
+            ), d AS (
+                SELECT * FROM debates WHERE ticker = %(ticker)s
+                ORDER BY created_at DESC LIMIT %(debate_limit)s
+            ), p AS (
+                SELECT * FROM trade_proposals WHERE ticker = %(ticker)s
+                ORDER BY created_at DESC LIMIT %(proposal_limit)s
+            )
+            SELECT
+                (SELECT COALESCE(json_agg(e ORDER BY e.created_at DESC), '[]'::json) FROM e) AS analysis,
+                (SELECT COALESCE(json_agg(d ORDER BY d.created_at DESC), '[]'::json) FROM d) AS debates,
+                (SELECT COALESCE(json_agg(p ORDER BY p.created_at DESC), '[]'::json) FROM p) AS proposals
+        """
+        params = {
+            "ticker": ticker,
+            "analysis_limit": analysis_limit,
+            "debate_limit": debate_limit,
+            "proposal_limit": proposal_limit,
+        }
+        return dict(self._execute_query(query, params, readonly=True)[0])
     
     def has_traded_today(self) -> bool:
-        # Safety check for single trade per day
+        # Safety check for single trade per day; once True it holds until the next UTC midnight
         today_start = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+        if self._traded_on == today_start.date():
+            return True
         query = """
-            SELECT COUNT(*) as count FROM executed_trades
-            WHERE executed_at >= %s
+            SELECT EXISTS (SELECT 1 FROM executed_trades WHERE executed_at >= %s) as found
         """
-        result = self._execute_query(query, (today_start,))
-        count = result[0]["count"] if result else 0
-        return count > 0
+        result = self._execute_query(query, (today_start,), readonly=True)
+        found = result[0]["found"] if result else False
+        if found:
+            self._traded_on = today_start.date()
+        return found
     
     def close(self):
         # Shutdown pool
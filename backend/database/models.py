@@ -1,8 +1,11 @@
 # Pydantic models for the system
+from dataclasses import dataclass
 from datetime import datetime
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, NamedTuple
 from decimal import Decimal
-from pydantic import BaseModel, Field
+import numpy as np
+import orjson
+from pydantic import BaseModel, ConfigDict, Field, field_validator
 
 
 class ArticleRaw(BaseModel):
@@ -15,6 +18,17 @@ class ArticleRaw(BaseModel):
     source_url: Optional[str] = None
 
 
+# Length of the stored content_preview prefix
+_CONTENT_PREVIEW_CHARS = 1000
+
+
+def _jsonb(value: Any) -> Optional[str]:
+    # JSONB column text, str so psycopg2 does not send it as bytea
+    if not value:
+        return None
+    return orjson.dumps(value, default=str, option=orjson.OPT_NON_STR_KEYS).decode()
+
+
 class ArticleCleaned(BaseModel):
     # LLM processed news
     id: Optional[int] = None
@@ -22,20 +36,44 @@ class ArticleCleaned(BaseModel):
     title: str
     ticker: Optional[str] = None
     content_text: str
+    content_preview: Optional[str] = None
     is_usable: bool
     reason: Optional[str] = None
     timestamp: Optional[datetime] = None
     created_at: Optional[datetime] = None
     llm_model: Optional[str] = None
     llm_response: Optional[Dict[str, Any]] = None
+    
+    def to_db_row(self) -> tuple:
+        # INSERT values in articles_cleaned column order, raw_article_id first
+        return (
+            self.raw_article_id,
+            self.title,
+            self.ticker,
+            self.content_text,
+            self.content_preview or self.content_text[:_CONTENT_PREVIEW_CHARS],
+            self.is_usable,
+            self.reason,
+            self.timestamp,
+            self.llm_model,
+            _jsonb(self.llm_response),
+        )
 
 
 class ArticleEmbedding(BaseModel):
     # Vector data for search
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+    
     id: Optional[int] = None
     cleaned_article_id: int
-    embedding: list[float]
+    embedding: np.ndarray
     created_at: Optional[datetime] = None
+    
+    @field_validator("embedding", mode="before")
+    @classmethod
+    def _as_float32(cls, value: Any) -> np.ndarray:
+        # One contiguous float32 array, the width pgvector stores, instead of a list of Python floats
+        return np.ascontiguousarray(value, dtype=np.float32)
 
 
 class StockSnapshot(BaseModel):
@@ -55,6 +93,69 @@ class StockSnapshot(BaseModel):
     data_source: str = "finnhub"
 
 
+def _as_float(value: Any) -> Optional[float]:
+    # NUMERIC column to float, keeping NULL
+    return float(value) if value is not None else None
+
+
+@dataclass(slots=True, frozen=True)
+class SnapshotView:
+    # Read-only stock snapshot with numeric columns coerced once at load
+    ticker: str
+    price: float
+    price_change: float = 0.0
+    price_change_percent: float = 0.0
+    id: Optional[int] = None
+    volume: Optional[int] = None
+    high: Optional[float] = None
+    low: Optional[float] = None
+    open_price: Optional[float] = None
+    close_price: Optional[float] = None
+    market_cap: Optional[int] = None
+    pe_ratio: Optional[float] = None
+    dividend_yield: Optional[float] = None
+    snapshot_time: Optional[datetime] = None
+    data_source: str = "finnhub"
+    
+    @classmethod
+    def from_row(cls, row: Dict[str, Any]) -> "SnapshotView":
+        # Build from a stock_snapshots row
+        return cls(
+            ticker=row["ticker"],
+            price=float(row["price"]),
+            price_change=float(row.get("price_change") or 0),
+            price_change_percent=float(row.get("price_change_percent") or 0),
+            id=row.get("id"),
+            volume=row.get("volume"),
+            high=_as_float(row.get("high")),
+            low=_as_float(row.get("low")),
+            open_price=_as_float(row.get("open_price")),
+            close_price=_as_float(row.get("close_price")),
+            market_cap=row.get("market_cap"),
+            pe_ratio=_as_float(row.get("pe_ratio")),
+            dividend_yield=_as_float(row.get("dividend_yield")),
+            snapshot_time=row.get("snapshot_time"),
+            data_source=row.get("data_source") or "finnhub",
+        )
+
+
+class AnalysisBundle(NamedTuple):
+    # Everything a ticker deep dive reads, loaded in one round trip
+    articles: List[Dict[str, Any]]
+    snapshot: Optional[SnapshotView]
+    recent_trades: List[Dict[str, Any]]
+
+
+class SimilarArticle(NamedTuple):
+    # vector_search hit, only the fields prompt builders read
+    id: int
+    ticker: Optional[str]
+    title: str
+    timestamp: Optional[datetime]
+    content_preview: Optional[str]
+    similarity: float
+
+
 class AnalysisEvent(BaseModel):
     # Step in agent pipeline
     id: Optional[int] = None
@@ -65,6 +166,17 @@ class AnalysisEvent(BaseModel):
     output_data: Optional[Dict[str, Any]] = None
     agent_name: Optional[str] = None
     created_at: Optional[datetime] = None
+    
+    def to_db_row(self) -> tuple:
+        # INSERT values in analysis_events column order
+        return (
+            self.ticker,
+            self.event_type,
+            self.reasoning,
+            _jsonb(self.input_data),
+            _jsonb(self.output_data),
+            self.agent_name,
+        )
 
 
 class Debate(BaseModel):
@@ -78,6 +190,18 @@ class Debate(BaseModel):
     final_consensus: Optional[str] = None
     created_at: Optional[datetime] = None
     trader_agent_id: Optional[int] = None
+    
+    def to_db_row(self) -> tuple:
+        # INSERT values in debates column order
+        return (
+            self.ticker,
+            self.debate_type,
+            orjson.dumps(self.transcript, default=str, option=orjson.OPT_NON_STR_KEYS).decode(),
+            self.bull_argument,
+            self.bear_argument,
+            self.final_consensus,
+            self.trader_agent_id,
+        )
 
 
 class TradeProposal(BaseModel):
@@ -1,9 +1,16 @@
 # LangGraph trading state machine
 from typing import TypedDict, List, Optional, Dict, Any
-import json
+from datetime import date
+import asyncio
+import threading
+import uuid
+import orjson
 import structlog
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
 from langgraph.graph import StateGraph, END
 
+from backend.config import settings
 from backend.database import DatabaseClient
 from backend.clients import LLMClient, FinnhubClient, AlpacaClient
 from backend.agents import TraderAgent, DebateOrchestrator, PortfolioManagerAgent
@@ -12,10 +19,51 @@ from backend.database.models import TradeProposal
 
 logger = structlog.get_logger(__name__)
 
+# Debate-to-proposal prompt, filled per ticker with format_map
+_PROPOSAL_PROMPT = """Based on a debate between bull and bear analysts, create a trade proposal.
+
+BULL ARGUMENT:
+{bull_argument}
+
+BEAR ARGUMENT:
+{bear_argument}
+
+CONSENSUS:
+{consensus}
+
+CRITICAL REQUIREMENTS FOR TRADING:
+- You MUST have STRONG confidence (70+) to propose BUY or SELL
+- If confidence is below 70, you MUST return "HOLD" regardless of the debate outcome
+- Only trade when there's CONVERGING EVIDENCE from MULTIPLE news sources
+- Consider transaction costs - only trade if the opportunity clearly justifies them
+- Be conservative: when in doubt, HOLD
+- A single news item is NOT sufficient - you need multiple independent sources confirming the narrative
+
+Return JSON:
+{{
+  "action": "BUY" | "SELL" | "HOLD",
+  "quantity": number of shares (0 if HOLD),
+  "reasoning": "Detailed reasoning. Must explain why confidence is high enough to trade, or why HOLD is appropriate.",
+  "confidence_score": 0-100 (MUST be 70+ for BUY/SELL, can be lower for HOLD)
+}}
+
+IMPORTANT: If confidence_score < 70, action MUST be "HOLD"."""
+
+# Proposals below this confidence are forced to HOLD
+_MIN_TRADE_CONFIDENCE = 70
+# Action after the confidence gate, keyed by (proposed action, confident enough)
+_ACTION_REMAP = {
+    ("BUY", True): "BUY",
+    ("BUY", False): "HOLD",
+    ("SELL", True): "SELL",
+    ("SELL", False): "HOLD",
+}
+
 
 class TradingState(TypedDict):
     # Workflow state
     ticker: Optional[str]
+    cycle_id: Optional[str]
     analysis_result: Optional[Dict[str, Any]]
     needs_debate: bool
     debate_result: Optional[Dict[str, Any]]
@@ -28,6 +76,9 @@ class TradingState(TypedDict):
 class TradingGraph:
     # Orchestrates the trading logic chain
     
+    # How often a ticker waiting for the portfolio lock checks it again
+    _PORTFOLIO_LOCK_POLL = 0.05
+    
     def __init__(
         self,
         db: DatabaseClient,
@@ -35,56 +86,21 @@ class TradingGraph:
         finnhub: FinnhubClient,
         alpaca: AlpacaClient
     ):
-        # Setup agents and compile graph
+        # Setup agents, the compiled graph itself is shared
         self.db = db
         self.finnhub = finnhub
         self.trader = TraderAgent(db, llm, finnhub)
         self.debate = DebateOrchestrator(db, llm)
         self.portfolio = PortfolioManagerAgent(db, llm, alpaca)
+        # Tickers run concurrently; review/execute read and spend the same buying power, so one
+        # ticker holds this from its review until its trade is executed or rejected
+        self._portfolio_lock = threading.Lock()
+        self._portfolio_owner: Optional[str] = None
         
-        self.graph = self._build_graph()
+        self.graph = _COMPILED_GRAPH
         logger.info("Trading graph initialized")
     
-    def _build_graph(self) -> StateGraph:
-        # Define nodes and edges
-        workflow = StateGraph(TradingState)
-        
-        workflow.add_node("analyze_ticker", self._analyze_ticker)
-        workflow.add_node("conduct_debate", self._conduct_debate)
-        workflow.add_node("create_proposal_from_debate", self._create_proposal_from_debate)
-        workflow.add_node("review_proposal", self._review_proposal)
-        workflow.add_node("execute_trade", self._execute_trade)
-        
-        workflow.set_entry_point("analyze_ticker")
-        
-        # After analyzing headlines, decide if debate is needed
-        workflow.add_conditional_edges(
-            "analyze_ticker",
-            self._should_debate,
-            {
-                "debate": "conduct_debate",
-                "skip": END
-            }
-        )
-        
-        # Always go through debate → create proposal → review → execute
-        workflow.add_edge("conduct_debate", "create_proposal_from_debate")
-        workflow.add_edge("create_proposal_from_debate", "review_proposal")
-        
-        workflow.add_conditional_edges(
-            "review_proposal",
-            self._should_execute,
-            {
-                "execute": "execute_trade",
-                "reject": END
-            }
-        )
-        
-        workflow.add_edge("execute_trade", END)
-        
-        return workflow.compile()
-    
-    def _analyze_ticker(self, state: TradingState) -> TradingState:
+    async def _analyze_ticker(self, state: TradingState) -> TradingState:
         # Fast scan of news headlines
         try:
             ticker = state["ticker"]
@@ -92,8 +108,8 @@ class TradingGraph:
                 state["error"] = "No ticker provided"
                 return state
             
-            # Trader only looks at headlines, not full articles
-            result = self.trader.analyze_ticker(ticker)
+            # Trader only looks at headlines, not full articles (may be precomputed in a batch)
+            result = state.get("analysis_result") or await asyncio.to_thread(self.trader.analyze_ticker, ticker)
             state["analysis_result"] = result
             # needs_debate is always True if interesting (kept for backwards compatibility)
             state["needs_debate"] = result.get("analysis", {}).get("is_interesting", False)
@@ -106,7 +122,8 @@ class TradingGraph:
         
         return state
     
-    def _should_debate(self, state: TradingState) -> str:
+    @staticmethod
+    def _should_debate(state: TradingState) -> str:
         # Check if news warrants deep dive
         if state.get("error"):
             return "skip"
@@ -120,7 +137,7 @@ class TradingGraph:
         logger.info("Ticker is interesting, triggering debate", ticker=state.get("ticker"))
         return "debate"
     
-    def _conduct_debate(self, state: TradingState) -> TradingState:
+    async def _conduct_debate(self, state: TradingState) -> TradingState:
         # Run Bull vs Bear
         try:
             ticker = state["ticker"]
@@ -132,7 +149,7 @@ class TradingGraph:
                 state["error"] = "No analysis event ID available"
                 return state
             
-            debate = self.debate.conduct_debate(ticker, event_id)
+            debate = await self.debate.aconduct_debate(ticker, event_id)
             if debate and debate.id:
                 state["debate_result"] = {
                     "debate_id": debate.id,
@@ -150,7 +167,7 @@ class TradingGraph:
         
         return state
     
-    def _create_proposal_from_debate(self, state: TradingState) -> TradingState:
+    async def _create_proposal_from_debate(self, state: TradingState) -> TradingState:
         # Bull/Bear transcript to trade order
         try:
             ticker = state["ticker"]
@@ -169,14 +186,13 @@ class TradingGraph:
                 return state
             
             # Get snapshot, fetch and save if it doesn't exist
-            snapshot = self.db.get_latest_snapshot(ticker)
+            snapshot = await asyncio.to_thread(self.db.get_latest_snapshot, ticker)
             if not snapshot:
                 logger.info("No snapshot found, fetching from API", ticker=ticker)
                 try:
-                    snapshot_data = self.finnhub.get_stock_snapshot(ticker)
+                    snapshot_data = await asyncio.to_thread(self.finnhub.get_stock_snapshot, ticker)
                     from backend.database.models import StockSnapshot
-                    snapshot_id = self.db.save_stock_snapshot(StockSnapshot(**snapshot_data))
-                    snapshot = self.db.get_latest_snapshot(ticker)
+                    snapshot = await asyncio.to_thread(self.db.save_stock_snapshot, StockSnapshot(**snapshot_data))
                     if not snapshot:
                         logger.error("Failed to retrieve snapshot after saving", ticker=ticker)
                         state["error"] = "Failed to retrieve snapshot after saving"
@@ -186,72 +202,44 @@ class TradingGraph:
                     state["error"] = f"Failed to fetch snapshot: {str(e)}"
                     return state
             
-            system_prompt = """Based on a debate between bull and bear analysts, create a trade proposal.
-
-BULL ARGUMENT:
-{bull_argument}
-
-BEAR ARGUMENT:
-{bear_argument}
-
-CONSENSUS:
-{consensus}
-
-CRITICAL REQUIREMENTS FOR TRADING:
-- You MUST have STRONG confidence (70+) to propose BUY or SELL
-- If confidence is below 70, you MUST return "HOLD" regardless of the debate outcome
-- Only trade when there's CONVERGING EVIDENCE from MULTIPLE news sources
-- Consider transaction costs - only trade if the opportunity clearly justifies them
-- Be conservative: when in doubt, HOLD
-- A single news item is NOT sufficient - you need multiple independent sources confirming the narrative
-
-Return JSON:
-{{
-  "action": "BUY" | "SELL" | "HOLD",
-  "quantity": number of shares (0 if HOLD),
-  "reasoning": "Detailed reasoning. Must explain why confidence is high enough to trade, or why HOLD is appropriate.",
-  "confidence_score": 0-100 (MUST be 70+ for BUY/SELL, can be lower for HOLD)
-}}
-
-IMPORTANT: If confidence_score < 70, action MUST be "HOLD"."""
-            
-            user_prompt = system_prompt.format(
-                bull_argument=debate_result.get("bull_argument", ""),
-                bear_argument=debate_result.get("bear_argument", ""),
-                consensus=debate_result.get("consensus", "")
-            )
+            user_prompt = _PROPOSAL_PROMPT.format_map({
+                "bull_argument": debate_result.get("bull_argument", ""),
+                "bear_argument": debate_result.get("bear_argument", ""),
+                "consensus": debate_result.get("consensus", "")
+            })
             
-            response = self.trader.llm.chat_completion(
+            response = await self.trader.llm.acached_chat_completion(
                 [{"role": "user", "content": user_prompt}],
                 temperature=0.7,
                 response_format={"type": "json_object"}
             )
             
-            proposal_data = json.loads(response)
+            proposal_data = orjson.loads(response)
             
             # Enforce minimum confidence threshold
             confidence_score = proposal_data.get("confidence_score", 0)
             action = proposal_data.get("action", "HOLD")
             
             # Force HOLD if confidence is too low for trading
-            if action in ("BUY", "SELL") and confidence_score < 70:
+            gated_action = _ACTION_REMAP.get((action, confidence_score >= _MIN_TRADE_CONFIDENCE), action)
+            if gated_action != action:
                 logger.warning(
                     "Proposal confidence too low for trading",
                     ticker=ticker,
                     action=action,
                     confidence=confidence_score,
-                    required=70
+                    required=_MIN_TRADE_CONFIDENCE
                 )
-                action = "HOLD"
-                proposal_data["action"] = "HOLD"
+                action = gated_action
+                proposal_data["action"] = action
                 proposal_data["quantity"] = 0
-                proposal_data["reasoning"] = f"{proposal_data.get('reasoning', '')} [Rejected: Confidence {confidence_score} < 70 required for trading]"
+                proposal_data["reasoning"] = f"{proposal_data.get('reasoning', '')} [Rejected: Confidence {confidence_score} < {_MIN_TRADE_CONFIDENCE} required for trading]"
             
             proposal = TradeProposal(
                 ticker=ticker,
                 action=action,
                 quantity=proposal_data.get("quantity", 0) if action != "HOLD" else 0,
-                proposed_price=snapshot.get("price") if snapshot else None,
+                proposed_price=snapshot.price if snapshot else None,
                 reasoning=proposal_data.get("reasoning", ""),
                 confidence_score=confidence_score,
                 analysis_event_id=event_id,
@@ -259,7 +247,7 @@ IMPORTANT: If confidence_score < 70, action MUST be "HOLD"."""
                 status="PENDING"
             )
             
-            proposal_id = self.db.save_trade_proposal(proposal)
+            proposal_id = await asyncio.to_thread(self.db.save_trade_proposal, proposal)
             proposal.id = proposal_id
             state["trade_proposal"] = proposal
         
@@ -269,7 +257,7 @@ IMPORTANT: If confidence_score < 70, action MUST be "HOLD"."""
         
         return state
     
-    def _review_proposal(self, state: TradingState) -> TradingState:
+    async def _review_proposal(self, state: TradingState) -> TradingState:
         # Risk check by portfolio manager
         try:
             proposal = state.get("trade_proposal")
@@ -277,23 +265,41 @@ IMPORTANT: If confidence_score < 70, action MUST be "HOLD"."""
                 state["error"] = "No proposal to review"
                 return state
             
-            decision = self.portfolio.review_proposal(proposal)
+            await self._acquire_portfolio(state["ticker"])
+            decision = await asyncio.to_thread(self.portfolio.review_proposal, proposal)
             state["portfolio_decision"] = decision
         
         except Exception as e:
             logger.error("Failed to review proposal", error=str(e))
             state["error"] = str(e)
         
+        # An approved trade keeps the lock until _execute_trade is done with it
+        if state.get("error") or (state.get("portfolio_decision") or {}).get("decision") != "APPROVE":
+            self._release_portfolio(state["ticker"])
         return state
     
-    def _should_execute(self, state: TradingState) -> str:
+    async def _acquire_portfolio(self, ticker: str):
+        # Wait for the portfolio lock without tying up a thread; polling keeps the wait
+        # cancellable and works whichever loop or thread the run is on
+        while not self._portfolio_lock.acquire(blocking=False):
+            await asyncio.sleep(self._PORTFOLIO_LOCK_POLL)
+        self._portfolio_owner = ticker
+    
+    def _release_portfolio(self, ticker: str):
+        # Release the portfolio lock if this ticker holds it
+        if self._portfolio_owner == ticker:
+            self._portfolio_owner = None
+            self._portfolio_lock.release()
+    
+    @staticmethod
+    def _should_execute(state: TradingState) -> str:
         # Decision branch
         decision = state.get("portfolio_decision", {})
         if decision.get("decision") == "APPROVE":
             return "execute"
         return "reject"
     
-    def _execute_trade(self, state: TradingState) -> TradingState:
+    async def _execute_trade(self, state: TradingState) -> TradingState:
         # Call Alpaca
         try:
             proposal = state.get("trade_proposal")
@@ -303,7 +309,10 @@ IMPORTANT: If confidence_score < 70, action MUST be "HOLD"."""
                 state["error"] = "Missing proposal or decision"
                 return state
             
-            executed = self.portfolio.execute_trade(proposal, decision)
+            # Held since review, unless this run resumed straight into execution
+            if self._portfolio_owner != state["ticker"]:
+                await self._acquire_portfolio(state["ticker"])
+            executed = await asyncio.to_thread(self.portfolio.execute_trade, proposal, decision)
             if executed:
                 state["executed_trade"] = {
                     "id": executed.id,
@@ -316,14 +325,28 @@ IMPORTANT: If confidence_score < 70, action MUST be "HOLD"."""
         except Exception as e:
             logger.error("Failed to execute trade", error=str(e))
             state["error"] = str(e)
+        finally:
+            self._release_portfolio(state["ticker"])
         
         return state
     
-    def run(self, ticker: str) -> TradingState:
-        # Main entry for one ticker scan
+    def run(self, ticker: str, analysis_result: Optional[Dict[str, Any]] = None, cycle_id: Optional[str] = None) -> TradingState:
+        # Blocking wrapper around arun
+        return asyncio.run(self.arun(ticker, analysis_result, cycle_id))
+    
+    async def arun(
+        self,
+        ticker: str,
+        analysis_result: Optional[Dict[str, Any]] = None,
+        cycle_id: Optional[str] = None
+    ) -> TradingState:
+        # Main entry for one ticker scan, optionally reusing a batched headline analysis.
+        # Only a run cut short in this same cycle is resumed; without a cycle_id nothing is
+        cycle_id = cycle_id or uuid.uuid4().hex
         initial_state: TradingState = {
             "ticker": ticker,
-            "analysis_result": None,
+            "cycle_id": cycle_id,
+            "analysis_result": analysis_result,
             "needs_debate": False,
             "debate_result": None,
             "trade_proposal": None,
@@ -332,8 +355,77 @@ IMPORTANT: If confidence_score < 70, action MUST be "HOLD"."""
             "error": None
         }
         
-        result = self.graph.invoke(initial_state)
+        # One checkpoint thread per ticker and day, so a run cut short and retried in the same cycle
+        # resumes after its last finished node
+        config = {"configurable": {"trading_graph": self, "thread_id": f"{ticker}-{date.today().isoformat()}"}}
+        try:
+            async with AsyncSqliteSaver.from_conn_string(settings.graph_checkpoint_path) as checkpointer:
+                graph = self.graph.copy(update={"checkpointer": checkpointer})
+                checkpoint = await graph.aget_state(config)
+                if checkpoint.next and checkpoint.values.get("cycle_id") == cycle_id:
+                    logger.info("Resuming interrupted workflow", ticker=ticker, next_nodes=list(checkpoint.next))
+                    result = await graph.ainvoke(None, config)
+                else:
+                    if checkpoint.next:
+                        # Older state would override this cycle's analysis; the proposal it left is
+                        # still guarded against re-execution by the portfolio manager
+                        logger.info("Discarding workflow interrupted in an earlier cycle", ticker=ticker, next_nodes=list(checkpoint.next))
+                    result = await graph.ainvoke(initial_state, config)
+        finally:
+            # A run that fails between review and execute must not keep the lock
+            self._release_portfolio(ticker)
         logger.info("Trading workflow completed", ticker=ticker, error=result.get("error"))
         
         return result
 
+
+def _node(name: str):
+    # Graph node forwarding to the named TradingGraph method of the current run
+    async def node(state: TradingState, config: RunnableConfig) -> TradingState:
+        return await getattr(config["configurable"]["trading_graph"], name)(state)
+    node.__name__ = name
+    return node
+
+
+def _build_graph() -> StateGraph:
+    # Define nodes and edges, nodes dispatch to the TradingGraph in the run config
+    workflow = StateGraph(TradingState)
+    
+    workflow.add_node("analyze_ticker", _node("_analyze_ticker"))
+    workflow.add_node("conduct_debate", _node("_conduct_debate"))
+    workflow.add_node("create_proposal_from_debate", _node("_create_proposal_from_debate"))
+    workflow.add_node("review_proposal", _node("_review_proposal"))
+    workflow.add_node("execute_trade", _node("_execute_trade"))
+    
+    workflow.set_entry_point("analyze_ticker")
+    
+    # After analyzing headlines, decide if debate is needed
+    workflow.add_conditional_edges(
+        "analyze_ticker",
+        TradingGraph._should_debate,
+        {
+            "debate": "conduct_debate",
+            "skip": END
+        }
+    )
+    
+    # Always go through debate → create proposal → review → execute
+    workflow.add_edge("conduct_debate", "create_proposal_from_debate")
+    workflow.add_edge("create_proposal_from_debate", "review_proposal")
+    
+    workflow.add_conditional_edges(
+        "review_proposal",
+        TradingGraph._should_execute,
+        {
+            "execute": "execute_trade",
+            "reject": END
+        }
+    )
+    
+    workflow.add_edge("execute_trade", END)
+    
+    return workflow.compile()
+
+
+# Structure is data-independent, so compile once per process
+_COMPILED_GRAPH = _build_graph()
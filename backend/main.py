@@ -1,6 +1,9 @@
 # Backend orchestrator
+import asyncio
 import time
+import uuid
 import structlog
+from typing import Optional, Dict, Any, List
 from datetime import datetime, timedelta
 
 from backend.config import settings
@@ -15,6 +18,9 @@ logger = structlog.get_logger(__name__)
 class TradingSystem:
     # High-level system control
     
+    # Tickers whose graphs run at once, each holds DB connections and LLM calls in flight
+    _TICKER_CONCURRENCY = 4
+    
     def __init__(self):
         # Wire up all components
         self.db = DatabaseClient()
@@ -28,21 +34,29 @@ class TradingSystem:
         # Fetch latest prices from Finnhub
         logger.info("Updating stock data", tickers=settings.stocks)
         
-        for ticker in settings.stocks:
-            try:
-                snapshot_data = self.finnhub.get_stock_snapshot(ticker)
-                from backend.database.models import StockSnapshot
-                snapshot = StockSnapshot(**snapshot_data)
-                self.db.save_stock_snapshot(snapshot)
-                logger.info("Stock data updated", ticker=ticker)
-            except Exception as e:
-                logger.error("Failed to update stock data", ticker=ticker, error=str(e))
+        # All tickers fetched concurrently, then stored with one INSERT
+        try:
+            from backend.database.models import StockSnapshot
+            fetched = self.finnhub.get_stock_snapshots(settings.stocks)
+            saved = self.db.save_stock_snapshots([StockSnapshot(**data) for data in fetched.values()])
+            logger.info("Stock data updated", tickers=list(saved))
+        except Exception as e:
+            logger.error("Failed to update stock data", tickers=settings.stocks, error=str(e))
     
-    def process_ticker(self, ticker: str) -> None:
+    def process_ticker(self, ticker: str, analysis_result: Optional[Dict[str, Any]] = None) -> None:
         # Run standard trading flow for one ticker
+        asyncio.run(self.aprocess_ticker(ticker, analysis_result))
+    
+    async def aprocess_ticker(
+        self,
+        ticker: str,
+        analysis_result: Optional[Dict[str, Any]] = None,
+        cycle_id: Optional[str] = None
+    ) -> None:
+        # Async trading flow for one ticker, errors are logged not raised
         try:
             logger.info("Processing ticker", ticker=ticker)
-            result = self.graph.run(ticker)
+            result = await self.graph.arun(ticker, analysis_result, cycle_id)
             
             if result.get("error"):
                 logger.error("Ticker processing failed", ticker=ticker, error=result["error"])
@@ -60,12 +74,24 @@ class TradingSystem:
         
         self.update_stock_data()
         
-        for ticker in settings.stocks:
-            self.process_ticker(ticker)
-            time.sleep(5)
+        # Headline scans for the whole watchlist are batched into a few LLM calls
+        analyses = self.graph.trader.analyze_tickers(settings.stocks)
+        
+        # Ticker graphs interrupted within this cycle may resume, earlier cycles' state is dropped
+        asyncio.run(self._aprocess_tickers(settings.stocks, analyses, uuid.uuid4().hex))
         
         logger.info("Trading cycle complete")
     
+    async def _aprocess_tickers(self, tickers: List[str], analyses: Dict[str, Dict[str, Any]], cycle_id: str) -> None:
+        # Overlap the per-ticker graphs, capped at _TICKER_CONCURRENCY
+        semaphore = asyncio.Semaphore(self._TICKER_CONCURRENCY)
+        
+        async def process(ticker: str) -> None:
+            async with semaphore:
+                await self.aprocess_ticker(ticker, analyses.get(ticker), cycle_id)
+        
+        await asyncio.gather(*(process(ticker) for ticker in tickers))
+    
     def should_run_trading_cycle(self) -> bool:
         # Check market hours and daily limits
         # Check if market is open
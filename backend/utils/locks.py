@@ -2,11 +2,13 @@
 from __future__ import annotations
 
 import contextlib
-import time
-from typing import Iterator
+import os
+import threading
+from typing import Iterator, Optional
 
 import psycopg2
 import structlog
+from psycopg2.pool import ThreadedConnectionPool
 
 from backend.config import settings
 
@@ -21,52 +23,71 @@ class GlobalPromptLock:
         self,
         dsn: str,
         lock_key: int = 42,
-        retry_interval: float = 0.5,
         timeout_seconds: float = 120.0,
+        max_connections: int = 16,
     ) -> None:
         self.dsn = dsn
         self.lock_key = lock_key
-        self.retry_interval = retry_interval
         self.timeout_seconds = timeout_seconds
+        self.max_connections = max_connections
+        # Opened on first acquire and reopened after a fork, so importing this module stays free
+        self._pool: Optional[ThreadedConnectionPool] = None
+        self._pool_pid: Optional[int] = None
+        self._pool_lock = threading.Lock()
         logger.info(
             "Prompt lock initialized",
             lock_key=lock_key,
-            retry_interval=retry_interval,
             timeout_seconds=timeout_seconds,
         )
 
+    def _get_pool(self) -> ThreadedConnectionPool:
+        with self._pool_lock:
+            if self._pool is None or self._pool_pid != os.getpid():
+                # A forked child must not reuse the parent's sockets, so the old pool is just dropped
+                self._pool = ThreadedConnectionPool(1, self.max_connections, self.dsn)
+                self._pool_pid = os.getpid()
+            return self._pool
+
     def _connect(self):
-        conn = psycopg2.connect(self.dsn)
+        # Pooled session, the advisory lock is session scoped so it must be released before checkin
+        conn = self._get_pool().getconn()
         conn.autocommit = True
         return conn, conn.cursor()
 
-    def _wait_for_lock(self, cursor) -> bool:
-        start = time.time()
-        while True:
+    def _wait_for_lock(self, cursor, try_only: bool = False) -> bool:
+        if try_only:
+            # Single attempt for callers that would rather skip than queue
             cursor.execute("SELECT pg_try_advisory_lock(%s);", (self.lock_key,))
             acquired = cursor.fetchone()[0]
-            if acquired:
-                logger.debug("Prompt lock acquired")
-                return True
-
-            if time.time() - start > self.timeout_seconds:
-                return False
-
-            time.sleep(self.retry_interval)
+        else:
+            # Blocking lock, the server wakes this session as soon as the holder unlocks
+            cursor.execute("SET statement_timeout = %s;", (int(self.timeout_seconds * 1000),))
+            try:
+                cursor.execute("SELECT pg_advisory_lock(%s);", (self.lock_key,))
+                acquired = True
+            except psycopg2.extensions.QueryCanceledError:
+                acquired = False
+            finally:
+                # The session goes back to the pool, so the timeout must not stick
+                cursor.execute("RESET statement_timeout;")
+        if acquired:
+            logger.debug("Prompt lock acquired")
+        return acquired
 
     def _release(self, cursor) -> None:
         cursor.execute("SELECT pg_advisory_unlock(%s);", (self.lock_key,))
         logger.debug("Prompt lock released")
 
     @contextlib.contextmanager
-    def acquire(self) -> Iterator[None]:
-        # Lock/unlock wrapper
+    def acquire(self, try_only: bool = False) -> Iterator[None]:
+        # Lock/unlock wrapper; try_only raises TimeoutError at once when the lock is held
         conn = None
         cursor = None
         acquired = False
+        released = True
         try:
             conn, cursor = self._connect()
-            acquired = self._wait_for_lock(cursor)
+            acquired = self._wait_for_lock(cursor, try_only)
             if not acquired:
                 raise TimeoutError("Timed out acquiring global prompt lock")
             yield
@@ -76,10 +97,12 @@ class GlobalPromptLock:
                     if acquired:
                         self._release(cursor)
                 except Exception as exc:  # pragma: no cover - best effort logging
+                    released = False
                     logger.warning("Failed to release prompt lock", error=str(exc))
                 cursor.close()
             if conn is not None:
-                conn.close()
+                # Closing a session whose unlock failed drops the lock with it
+                self._get_pool().putconn(conn, close=not released or bool(conn.closed))
 
 
 prompt_lock = GlobalPromptLock(settings.postgres_url)
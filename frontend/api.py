@@ -1,10 +1,13 @@
 # Dashboard API
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect
-from fastapi.responses import HTMLResponse, FileResponse
+from fastapi.responses import HTMLResponse, FileResponse, ORJSONResponse
 from fastapi.staticfiles import StaticFiles
+from fastapi.encoders import jsonable_encoder
 from typing import List, Dict, Any
 import asyncio
 import json
+import orjson
+import psycopg2
 import structlog
 import os
 from pathlib import Path
@@ -17,13 +20,27 @@ from backend.config import settings
 
 logger = structlog.get_logger(__name__)
 
-app = FastAPI(title="Trading System Dashboard")
+app = FastAPI(title="Trading System Dashboard", default_response_class=ORJSONResponse)
 
 db = DatabaseClient()
 alpaca = AlpacaClient(paper=True)
 
 FRONTEND_DIR = Path(__file__).parent
 
+# Pushes follow NOTIFYs on this channel (see migrations/09_dashboard_notify.sql)
+DASHBOARD_CHANNEL = "dashboard"
+# Longest gap between pushes while nothing is written; account value still moves with the market
+BROADCAST_HEARTBEAT = 60
+# Fixed polling period used only when LISTEN cannot be set up
+BROADCAST_INTERVAL = 5
+# Wait after a wake-up so a burst of writes becomes one push
+BROADCAST_DEBOUNCE = 0.5
+# Cached reads made stale by a NOTIFY from each table
+_NOTIFY_INVALIDATES = {
+    "executed_trades": ("trades",),
+    "stock_snapshots": ("snapshot",),
+}
+
 
 class ConnectionManager:
     # WS client tracker
@@ -38,12 +55,16 @@ class ConnectionManager:
     def disconnect(self, websocket: WebSocket):
         self.active_connections.remove(websocket)
     
-    async def broadcast(self, message: dict):
-        for connection in self.active_connections:
-            try:
-                await connection.send_json(message)
-            except:
-                pass
+    async def broadcast(self, payload: str):
+        # Send one pre-serialized message to every client at once, dropping the ones that fail
+        connections = list(self.active_connections)
+        results = await asyncio.gather(
+            *(connection.send_text(payload) for connection in connections),
+            return_exceptions=True
+        )
+        for connection, result in zip(connections, results):
+            if isinstance(result, Exception) and connection in self.active_connections:
+                self.active_connections.remove(connection)
 
 
 manager = ConnectionManager()
@@ -92,8 +113,7 @@ async def get_positions():
 async def get_trades(limit: int = 50):
     # Past week's orders
     try:
-        trades = db.get_recent_trades(days=7)
-        return {"trades": trades[:limit]}
+        return {"trades": db.get_recent_trades(days=7, limit=limit)}
     except Exception as e:
         logger.error("Failed to get trades", error=str(e))
         return {"trades": [], "error": str(e)}
@@ -103,11 +123,7 @@ async def get_trades(limit: int = 50):
 async def get_proposals(limit: int = 20):
     # What the system wants to do
     try:
-        recent = db._execute_query(
-            "SELECT * FROM trade_proposals ORDER BY created_at DESC LIMIT %s",
-            (limit,)
-        )
-        return {"proposals": recent}
+        return {"proposals": db.get_recent_proposals(limit=limit)}
     except Exception as e:
         logger.error("Failed to get proposals", error=str(e))
         return {"proposals": [], "error": str(e)}
@@ -130,35 +146,20 @@ async def get_article(article_id: int):
     try:
         article = db.get_article_by_id(article_id)
         if not article:
-            return {"error": "Article not found"}, 404
+            return ORJSONResponse(content={"error": "Article not found"}, status_code=404)
         
-        # Get related analysis events
-        analysis_events = db._execute_query(
-            "SELECT * FROM analysis_events WHERE ticker = %s ORDER BY created_at DESC LIMIT 5",
-            (article.get('ticker'),)
-        ) if article.get('ticker') else []
-        
-        # Get related debates
-        debates = db._execute_query(
-            "SELECT * FROM debates WHERE ticker = %s ORDER BY created_at DESC LIMIT 3",
-            (article.get('ticker'),)
-        ) if article.get('ticker') else []
-        
-        # Get related trade proposals
-        proposals = db._execute_query(
-            "SELECT * FROM trade_proposals WHERE ticker = %s ORDER BY created_at DESC LIMIT 5",
-            (article.get('ticker'),)
-        ) if article.get('ticker') else []
+        # Related analysis events, debates and trade proposals in one round trip
+        related = db.get_article_context(article['ticker']) if article.get('ticker') else {}
         
         return {
             "article": article,
-            "related_analysis": analysis_events,
-            "related_debates": debates,
-            "related_proposals": proposals
+            "related_analysis": related.get("analysis", []),
+            "related_debates": related.get("debates", []),
+            "related_proposals": related.get("proposals", [])
         }
     except Exception as e:
         logger.error("Failed to get article", article_id=article_id, error=str(e))
-        return {"error": str(e)}, 500
+        return ORJSONResponse(content={"error": str(e)}, status_code=500)
 
 
 @app.get("/api/snapshots")
@@ -168,11 +169,9 @@ async def get_snapshots(ticker: str = None):
         if ticker:
             snapshots = db.get_recent_snapshots(ticker, hours=24)
         else:
-            snapshots = []
-            for t in settings.stocks:
-                latest = db.get_latest_snapshot(t)
-                if latest:
-                    snapshots.append(latest)
+            # One query for the cache misses, watchlist order kept
+            latest = db.get_latest_snapshots(settings.stocks)
+            snapshots = [latest[t] for t in settings.stocks if t in latest]
         return {"snapshots": snapshots}
     except Exception as e:
         logger.error("Failed to get snapshots", error=str(e))
@@ -185,7 +184,8 @@ async def get_analysis(limit: int = 20):
     try:
         events = db._execute_query(
             "SELECT * FROM analysis_events ORDER BY created_at DESC LIMIT %s",
-            (limit,)
+            (limit,),
+            readonly=True
         )
         return {"events": events}
     except Exception as e:
@@ -214,7 +214,8 @@ async def get_trader_interest(limit: int = 20):
             ORDER BY created_at DESC 
             LIMIT %s
             """,
-            (limit,)
+            (limit,),
+            readonly=True
         )
         
         # Separate interesting vs not interesting
@@ -237,7 +238,8 @@ async def get_debates(limit: int = 10):
     try:
         debates = db._execute_query(
             "SELECT * FROM debates ORDER BY created_at DESC LIMIT %s",
-            (limit,)
+            (limit,),
+            readonly=True
         )
         return {"debates": debates}
     except Exception as e:
@@ -247,16 +249,70 @@ async def get_debates(limit: int = 10):
 
 @app.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
-    # UI updates
+    # UI updates are pushed by _broadcast_loop, this only holds the socket open
     await manager.connect(websocket)
     try:
         while True:
-            await asyncio.sleep(5)
+            await websocket.receive_text()
+    except WebSocketDisconnect:
+        if websocket in manager.active_connections:
+            manager.disconnect(websocket)
+
+
+def _listen_for_changes(changed: asyncio.Event):
+    # Dedicated LISTEN session whose socket is watched by the event loop; sets changed on each NOTIFY
+    conn = psycopg2.connect(settings.postgres_url)
+    conn.autocommit = True
+    with conn.cursor() as cur:
+        cur.execute(f"LISTEN {DASHBOARD_CHANNEL}")
+    
+    loop = asyncio.get_running_loop()
+    
+    def on_readable():
+        try:
+            conn.poll()
+        except Exception as e:
+            # Lost session: stop watching it, pushes continue on the heartbeat
+            logger.warning("Dashboard LISTEN connection lost", error=str(e))
+            loop.remove_reader(conn.fileno())
+            return
+        if conn.notifies:
+            for notify in conn.notifies:
+                db._invalidate_reads(*_NOTIFY_INVALIDATES.get(notify.payload, ()))
+            conn.notifies.clear()
+            changed.set()
+    
+    loop.add_reader(conn.fileno(), on_readable)
+    return conn
+
+
+async def _broadcast_loop():
+    # Collect the update once per change and fan it out to every client
+    changed = asyncio.Event()
+    try:
+        app.state.listen_conn = _listen_for_changes(changed)
+        timeout = BROADCAST_HEARTBEAT
+    except Exception as e:
+        logger.warning("Dashboard LISTEN unavailable, falling back to polling", error=str(e))
+        app.state.listen_conn = None
+        timeout = BROADCAST_INTERVAL
+    
+    while True:
+        try:
+            await asyncio.wait_for(changed.wait(), timeout)
+            await asyncio.sleep(BROADCAST_DEBOUNCE)
+        except asyncio.TimeoutError:
+            pass
+        changed.clear()
+        if not manager.active_connections:
+            continue
+        try:
             status = await get_status()
             positions = await get_positions()
             trades = await get_trades(limit=10)
             
-            await websocket.send_json({
+            # Decimal prices and datetimes need encoding before serializing
+            payload = orjson.dumps(jsonable_encoder({
                 "type": "update",
                 "data": {
                     "status": status,
@@ -264,20 +320,27 @@ async def websocket_endpoint(websocket: WebSocket):
                     "recent_trades": trades.get("trades", [])[:5]
                 },
                 "timestamp": datetime.utcnow().isoformat()
-            })
-    except WebSocketDisconnect:
-        manager.disconnect(websocket)
+            })).decode()
+            await manager.broadcast(payload)
+        except Exception as e:
+            logger.error("Dashboard broadcast failed", error=str(e))
 
 
 @app.on_event("startup")
 async def startup_event():
     # Boots up
+    app.state.broadcast_task = asyncio.create_task(_broadcast_loop())
     logger.info("Frontend API started")
 
 
 @app.on_event("shutdown")
 async def shutdown_event():
     # Cleanup on exit
+    app.state.broadcast_task.cancel()
+    listen_conn = getattr(app.state, "listen_conn", None)
+    if listen_conn is not None and not listen_conn.closed:
+        asyncio.get_running_loop().remove_reader(listen_conn.fileno())
+        listen_conn.close()
     db.close()
     logger.info("Frontend API stopped")
 
@@ -0,0 +1,6 @@
+-- Short prefix of the cleaned text so prompt builders don't pull whole articles
+ALTER TABLE articles_cleaned ADD COLUMN IF NOT EXISTS content_preview VARCHAR(1200);
+
+UPDATE articles_cleaned
+SET content_preview = LEFT(content_text, 1000)
+WHERE content_preview IS NULL;
@@ -0,0 +1,9 @@
+-- HNSW graph instead of IVFFlat: no training step, better recall at the same query speed.
+-- It indexes a half-precision copy of each embedding: half the bytes per distance and
+-- a graph half the size, while the column keeps full precision for dedup reads
+DROP INDEX IF EXISTS idx_article_embeddings_vector;
+
+SET maintenance_work_mem = '1GB';
+
+CREATE INDEX IF NOT EXISTS idx_article_embeddings_hnsw_half ON article_embeddings
+USING hnsw ((embedding::halfvec(1536)) halfvec_cosine_ops) WITH (m = 24, ef_construction = 128);
@@ -0,0 +1,2 @@
+-- has_embedding checks probe embeddings by article id instead of scanning vector rows
+CREATE INDEX IF NOT EXISTS idx_article_embeddings_cleaned_id ON article_embeddings(cleaned_article_id);
@@ -0,0 +1,7 @@
+-- Composite and partial indexes matching the recent-articles, latest-snapshot,
+-- recent-trades and pending-proposals lookups
+CREATE INDEX IF NOT EXISTS idx_articles_cleaned_usable_ticker_time ON articles_cleaned(ticker, timestamp DESC) WHERE is_usable;
+CREATE INDEX IF NOT EXISTS idx_articles_cleaned_usable_time ON articles_cleaned(timestamp DESC) WHERE is_usable;
+CREATE INDEX IF NOT EXISTS idx_stock_snapshots_ticker_time ON stock_snapshots(ticker, snapshot_time DESC);
+CREATE INDEX IF NOT EXISTS idx_executed_trades_ticker_time ON executed_trades(ticker, executed_at DESC);
+CREATE INDEX IF NOT EXISTS idx_trade_proposals_pending ON trade_proposals(created_at DESC) WHERE status = 'PENDING';
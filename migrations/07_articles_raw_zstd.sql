@@ -0,0 +1,5 @@
+-- Raw pages are zstd-compressed by the client; EXTERNAL storage keeps Postgres
+-- from trying to pglz the already compressed bytes. Older rows keep raw_html
+ALTER TABLE articles_raw ADD COLUMN IF NOT EXISTS raw_html_zstd BYTEA;
+ALTER TABLE articles_raw ALTER COLUMN raw_html_zstd SET STORAGE EXTERNAL;
+ALTER TABLE articles_raw ALTER COLUMN raw_html DROP NOT NULL;
@@ -0,0 +1,96 @@
+-- Range-partition stock_snapshots by month so latest/recent reads prune to the
+-- newest partitions and old months can be detached or dropped whole.
+-- The client calls create_stock_snapshot_partitions whenever the month changes, covering
+-- this and next month; anything outside the created ranges lands in the default partition.
+-- Rows already in the default partition for a new month are moved into it, otherwise
+-- attaching the partition would fail with "default partition would be violated".
+BEGIN;
+
+CREATE OR REPLACE FUNCTION create_stock_snapshot_partitions(from_time TIMESTAMPTZ, to_time TIMESTAMPTZ)
+RETURNS void AS $$
+DECLARE
+    month_start TIMESTAMPTZ := date_trunc('month', from_time);
+    partition_name TEXT;
+BEGIN
+    WHILE month_start <= to_time LOOP
+        partition_name := 'stock_snapshots_' || to_char(month_start, 'YYYY_MM');
+        IF to_regclass(partition_name) IS NULL THEN
+            -- Hold off concurrent inserts until the new partition is in place
+            LOCK TABLE stock_snapshots IN SHARE ROW EXCLUSIVE MODE;
+            EXECUTE 'CREATE TEMP TABLE stock_snapshots_moving (LIKE stock_snapshots) ON COMMIT DROP';
+            EXECUTE format(
+                'WITH moved AS (DELETE FROM stock_snapshots_default WHERE snapshot_time >= %L AND snapshot_time < %L RETURNING *) '
+                'INSERT INTO stock_snapshots_moving SELECT * FROM moved',
+                month_start,
+                month_start + interval '1 month'
+            );
+            EXECUTE format(
+                'CREATE TABLE %I PARTITION OF stock_snapshots FOR VALUES FROM (%L) TO (%L)',
+                partition_name,
+                month_start,
+                month_start + interval '1 month'
+            );
+            EXECUTE 'INSERT INTO stock_snapshots SELECT * FROM stock_snapshots_moving';
+            EXECUTE 'DROP TABLE stock_snapshots_moving';
+        END IF;
+        month_start := month_start + interval '1 month';
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql;
+
+-- The table swap only runs while stock_snapshots is still a plain table, so applying
+-- this file again (make migrate) leaves an already partitioned volume alone
+DO $migrate$
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = 'stock_snapshots'::regclass) THEN
+        RETURN;
+    END IF;
+
+    ALTER TABLE stock_snapshots RENAME TO stock_snapshots_unpartitioned;
+
+    CREATE TABLE stock_snapshots (
+        id SERIAL,
+        ticker VARCHAR(10) NOT NULL,
+        price DECIMAL(12, 4) NOT NULL,
+        volume BIGINT,
+        high DECIMAL(12, 4),
+        low DECIMAL(12, 4),
+        open_price DECIMAL(12, 4),
+        close_price DECIMAL(12, 4),
+        market_cap BIGINT,
+        pe_ratio DECIMAL(10, 4),
+        dividend_yield DECIMAL(8, 4),
+        snapshot_time TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        data_source VARCHAR(50) DEFAULT 'finnhub',
+        PRIMARY KEY (id, snapshot_time)
+    ) PARTITION BY RANGE (snapshot_time);
+
+    CREATE TABLE stock_snapshots_default PARTITION OF stock_snapshots DEFAULT;
+
+    PERFORM create_stock_snapshot_partitions(
+        COALESCE((SELECT MIN(snapshot_time) FROM stock_snapshots_unpartitioned), now()),
+        now() + interval '1 month'
+    );
+
+    INSERT INTO stock_snapshots (
+        id, ticker, price, volume, high, low, open_price, close_price,
+        market_cap, pe_ratio, dividend_yield, snapshot_time, data_source
+    )
+    SELECT
+        id, ticker, price, volume, high, low, open_price, close_price,
+        market_cap, pe_ratio, dividend_yield, COALESCE(snapshot_time, now()), data_source
+    FROM stock_snapshots_unpartitioned;
+
+    PERFORM setval(pg_get_serial_sequence('stock_snapshots', 'id'), COALESCE(MAX(id), 0) + 1, false)
+    FROM stock_snapshots;
+
+    DROP TABLE stock_snapshots_unpartitioned;
+END;
+$migrate$;
+
+-- Created on the parent, so every partition gets its own copy
+CREATE INDEX IF NOT EXISTS idx_stock_snapshots_ticker ON stock_snapshots(ticker);
+CREATE INDEX IF NOT EXISTS idx_stock_snapshots_time ON stock_snapshots(snapshot_time);
+CREATE INDEX IF NOT EXISTS idx_stock_snapshots_ticker_time ON stock_snapshots(ticker, snapshot_time DESC);
+
+COMMIT;
@@ -0,0 +1,23 @@
+-- Wake the dashboard when trading state changes instead of having it poll.
+-- Statement-level, so a bulk insert sends one notification, not one per row
+CREATE OR REPLACE FUNCTION notify_dashboard() RETURNS trigger AS $$
+BEGIN
+    PERFORM pg_notify('dashboard', TG_TABLE_NAME);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trade_proposals_notify_dashboard ON trade_proposals;
+CREATE TRIGGER trade_proposals_notify_dashboard
+    AFTER INSERT OR UPDATE ON trade_proposals
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_dashboard();
+
+DROP TRIGGER IF EXISTS executed_trades_notify_dashboard ON executed_trades;
+CREATE TRIGGER executed_trades_notify_dashboard
+    AFTER INSERT OR UPDATE ON executed_trades
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_dashboard();
+
+DROP TRIGGER IF EXISTS stock_snapshots_notify_dashboard ON stock_snapshots;
+CREATE TRIGGER stock_snapshots_notify_dashboard
+    AFTER INSERT ON stock_snapshots
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_dashboard();
@@ -1,5 +1,7 @@
 # News scraper orchestrator
-import time
+from typing import List, Optional, Tuple
+import asyncio
+import signal
 import structlog
 from datetime import datetime, timezone
 
@@ -20,52 +22,66 @@ class NewsScrapingService:
         self.db = DatabaseClient()
         self.llm = LLMClient(chat_model="gpt-5-nano-2025-08-07")  # Use nano for article cleaning
         self.scraper = NewsScraper()
+        # Set to start the next cycle before the interval is up
+        self._wake = asyncio.Event()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
         logger.info("News scraping service initialized")
     
-    def process_article(self, article_meta: dict) -> None:
-        # Scrape, clean, and embed a single story
+    def _needs_processing(self, article_meta: dict) -> bool:
+        # Has a URL and is not cleaned yet
         url = article_meta.get("url", "")
         if not url:
             logger.warning("Article missing URL", article=article_meta.get("title"))
-            return
+            return False
         
         ticker = article_meta.get("ticker", "")
-        
-        # Check if already processed
         if self.db.cleaned_article_exists(url, ticker):
             logger.debug("Article already cleaned, skipping", url=url[:60], ticker=ticker)
+            return False
+        return True
+    
+    def process_article(self, article_meta: dict) -> None:
+        # Scrape, clean, and embed a single story (run_cycle batches these steps)
+        if not self._needs_processing(article_meta):
             return
         
-        summary = article_meta.get("summary", "")
-        
+        url = article_meta["url"]
         try:
-            content, scrape_success = self.scraper.scrape_article_content(url, summary)
+            content, scrape_success = self.scraper.scrape_article_content(url, article_meta.get("summary", ""))
         except Exception as e:
             logger.error("Failed to scrape article", url=url[:60], error=str(e))
             return
         
-        raw_article = {
-            "url": url,
-            "raw_html": content,
-            "ticker": ticker,
-            "source_url": article_meta.get("source", "finnhub"),
-            "scraped_at": datetime.utcnow(),
-        }
+        prepared = self.clean_article(article_meta, content)
+        if prepared:
+            self.embed_articles(self.store_articles([prepared]))
+    
+    def clean_article(
+        self,
+        article_meta: dict,
+        content: str,
+        now: Optional[datetime] = None
+    ) -> Optional[Tuple[ArticleRaw, ArticleCleaned]]:
+        # Raw and cleaned rows for an already scraped story, None if they cannot be built.
+        # now is shared by a whole cycle's articles when given
+        now = now or datetime.now(timezone.utc)
+        url = article_meta["url"]
+        ticker = article_meta.get("ticker", "")
         
         article_datetime = article_meta.get("datetime", 0)
         if article_datetime:
             try:
                 article_timestamp = datetime.fromtimestamp(article_datetime, tz=timezone.utc)
             except:
-                article_timestamp = datetime.utcnow()
+                article_timestamp = now
         else:
-            article_timestamp = datetime.utcnow()
+            article_timestamp = now
         
         # Try to extract with LLM, but have a fallback if it fails
         try:
             # Pass the ticker to the LLM so it can verify the company is mentioned
             extracted = self.llm.extract_article_json(content, ticker=ticker)
-            extracted["llm_model"] = self.llm.chat_model
+            llm_model = self.llm.chat_model
         except Exception as e:
             logger.warning("LLM extraction failed, using fallback", url=url[:60], error=str(e))
             # Fallback: create basic cleaned article without LLM
@@ -76,46 +92,77 @@ class NewsScrapingService:
                 "is_usable": bool(content and len(content) > 100),
                 "reason": "LLM processing failed, using raw content",
                 "timestamp": article_timestamp,
-                "llm_model": None,
             }
+            llm_model = None
         
-        extracted["ticker"] = ticker or extracted.get("ticker")
-        extracted["title"] = article_meta.get("title", extracted.get("title", "Unknown"))
-        extracted["timestamp"] = article_timestamp
-        
-        if not extracted.get("content_text") and content:
-            extracted["content_text"] = content[:5000]
-        
-        # Save both in a single transaction
+        # Fields passed by name, no intermediate dicts to merge and splat
         try:
-            raw_id, cleaned_id = self.db.save_raw_and_cleaned_article(
-                ArticleRaw(**raw_article),
-                ArticleCleaned(**extracted)
+            return (
+                # Built from our own values only, so validation is skipped; LLM output below is validated
+                ArticleRaw.model_construct(
+                    url=url,
+                    raw_html=content,
+                    ticker=ticker,
+                    source_url=article_meta.get("source", "finnhub"),
+                    scraped_at=now
+                ),
+                ArticleCleaned(
+                    title=article_meta.get("title", extracted.get("title", "Unknown")),
+                    ticker=ticker or extracted.get("ticker"),
+                    content_text=extracted.get("content_text") or content[:5000],
+                    is_usable=extracted.get("is_usable", False),
+                    reason=extracted.get("reason"),
+                    timestamp=article_timestamp,
+                    llm_model=llm_model
+                )
             )
-            
-            if not raw_id or not cleaned_id:
-                logger.error("Failed to save article", url=url[:60])
-                return
-            
-            logger.info("Saved raw and cleaned article", url=url[:60], raw_id=raw_id, cleaned_id=cleaned_id, usable=extracted.get("is_usable"))
-            
-            # Try to get embedding, but don't fail if it doesn't work
-            if extracted.get("is_usable") and extracted.get("content_text"):
+        except Exception as e:
+            logger.error("Invalid cleaned article", url=url[:60], error=str(e))
+            return None
+    
+    def store_articles(self, items: List[Tuple[ArticleRaw, ArticleCleaned]]) -> List[Tuple[int, str]]:
+        # Save (raw, cleaned) pairs in one transaction, falling back to one at a time if the batch fails.
+        # Returns (cleaned_id, text) for the usable ones, to be embedded
+        if not items:
+            return []
+        try:
+            ids = self.db.save_raw_and_cleaned_articles(items)
+        except Exception as e:
+            logger.warning("Batch article save failed, saving one by one", count=len(items), error=str(e))
+            ids = []
+            for raw_article, cleaned_article in items:
                 try:
-                    embedding = self.llm.get_embedding(extracted["content_text"])
-                    if embedding:
-                        self.db.save_article_embedding(ArticleEmbedding(
-                            cleaned_article_id=cleaned_id,
-                            embedding=embedding
-                        ))
-                        logger.info("Saved article embedding", cleaned_id=cleaned_id)
-                    else:
-                        logger.debug("Embedding not available (skipped)", cleaned_id=cleaned_id)
+                    ids.append(self.db.save_raw_and_cleaned_article(raw_article, cleaned_article))
                 except Exception as e:
-                    logger.warning("Failed to save embedding, continuing", cleaned_id=cleaned_id, error=str(e))
+                    logger.error("Failed to save article to database", url=raw_article.url[:60], error=str(e))
+                    ids.append((None, None))
         
+        to_embed = []
+        for (raw_article, cleaned_article), (raw_id, cleaned_id) in zip(items, ids):
+            if not raw_id or not cleaned_id:
+                logger.error("Failed to save article", url=raw_article.url[:60])
+                continue
+            logger.info("Saved raw and cleaned article", url=raw_article.url[:60], raw_id=raw_id, cleaned_id=cleaned_id, usable=cleaned_article.is_usable)
+            if cleaned_article.is_usable and cleaned_article.content_text:
+                to_embed.append((cleaned_id, cleaned_article.content_text))
+        return to_embed
+    
+    def embed_articles(self, items: List[Tuple[int, str]]) -> None:
+        # Embed (cleaned_id, text) pairs in batched requests and store them in one INSERT.
+        # Failures are logged, not raised, articles without a vector stay usable
+        if not items:
+            return
+        try:
+            embeddings = self.llm.get_embeddings_batch([text for _, text in items])
+            rows = [
+                ArticleEmbedding(cleaned_article_id=cleaned_id, embedding=embedding)
+                for (cleaned_id, _), embedding in zip(items, embeddings)
+                if embedding
+            ]
+            self.db.save_article_embeddings_bulk(rows)
+            logger.info("Saved article embeddings", count=len(rows), skipped=len(items) - len(rows))
         except Exception as e:
-            logger.error("Failed to save article to database", url=url[:60], error=str(e))
+            logger.warning("Failed to save embeddings, continuing", count=len(items), error=str(e))
     
     def run_cycle(self) -> None:
         # Loop through all configured tickers
@@ -124,27 +171,57 @@ class NewsScrapingService:
         articles = self.scraper.scrape_all(settings.stocks)
         logger.info("Scraped articles", count=len(articles))
         
-        for article in articles:
-            self.process_article(article)
-            time.sleep(1)
+        # One query for which stories are already cleaned instead of one per article
+        with_url = [article for article in articles if article.get("url")]
+        if len(with_url) < len(articles):
+            logger.warning("Articles missing URL", count=len(articles) - len(with_url))
+        cleaned = self.db.cleaned_articles_existing([(article["url"], article.get("ticker", "")) for article in with_url])
+        pending = [article for article in with_url if (article["url"], article.get("ticker", "")) not in cleaned]
+        logger.info("Articles to process", pending=len(pending), already_cleaned=len(with_url) - len(pending))
+        
+        # Page fetches overlap, per-host limits in the fetcher replace the old per-article sleep
+        now = datetime.now(timezone.utc)
+        prepared = [
+            self.clean_article(article, content, now)
+            for article, (content, _) in zip(pending, self.scraper.scrape_articles_content(pending))
+        ]
+        
+        # The whole cycle is saved in one transaction and embedded in a few batched requests
+        self.embed_articles(self.store_articles([item for item in prepared if item]))
         
         logger.info("Scraping cycle complete")
     
-    def run(self, interval_minutes: int = 30) -> None:
-        # Continuous loop
+    def trigger_now(self) -> None:
+        # Cut the current wait short and scrape right away, callable from any thread
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._wake.set)
+    
+    async def _wait(self, seconds: float) -> None:
+        # Sleep between cycles unless trigger_now (or SIGUSR1) wakes us first
+        try:
+            await asyncio.wait_for(self._wake.wait(), timeout=seconds)
+            logger.info("Scraping cycle triggered early")
+        except asyncio.TimeoutError:
+            pass
+        self._wake.clear()
+    
+    async def run(self, interval_minutes: int = 30) -> None:
+        # Continuous loop; cycles run in a worker thread so the loop stays free for wake-ups
         logger.info("Starting news scraping service", interval_minutes=interval_minutes)
+        self._loop = asyncio.get_running_loop()
+        try:
+            self._loop.add_signal_handler(signal.SIGUSR1, self._wake.set)
+        except (AttributeError, NotImplementedError):
+            logger.debug("SIGUSR1 wake-up not available on this platform")
         
         while True:
             try:
-                self.run_cycle()
+                await asyncio.to_thread(self.run_cycle)
                 logger.info("Sleeping until next cycle", minutes=interval_minutes)
-                time.sleep(interval_minutes * 60)
-            except KeyboardInterrupt:
-                logger.info("Shutting down news scraping service")
-                break
+                await self._wait(interval_minutes * 60)
             except Exception as e:
                 logger.error("Error in scraping cycle", error=str(e))
-                time.sleep(60)
+                await asyncio.sleep(60)
 
 
 if __name__ == "__main__":
@@ -157,5 +234,8 @@ if __name__ == "__main__":
     )
     
     service = NewsScrapingService()
-    service.run(interval_minutes=30)
+    try:
+        asyncio.run(service.run(interval_minutes=30))
+    except KeyboardInterrupt:
+        logger.info("Shutting down news scraping service")
 
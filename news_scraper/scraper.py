@@ -1,34 +1,128 @@
 # Finnhub API and HTML content fetcher
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Union
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
+import asyncio
+import multiprocessing
+import os
+import re
+import threading
+import orjson
 import structlog
 import requests
-import time
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from cachetools import TTLCache
+from selectolax.parser import HTMLParser
 
 from backend.config import settings
+from backend.clients.rate_limiter import RateLimiter
+from news_scraper.async_scraper import fetch_all, is_html, MAX_PAGE_BYTES, PAGE_CHUNK_BYTES
 
 
 logger = structlog.get_logger(__name__)
 
+# Opening tag of any element text is taken from, pages without one are not parsed
+_CONTENT_TAG_RE = re.compile(rb"<(?:p|article|div)[\s/>]", re.IGNORECASE)
+# Tried in order, the first that yields text wins; an article or div repeats its paragraphs' text
+_CONTENT_SELECTORS = ("p", "article", "div")
+_MIN_BLOCK_CHARS = 40
+_WHITESPACE_RE = re.compile(r"\s+")
+# Paywalled or bot-blocking hosts, fetching them only ends in a timeout or a login page
+_BLOCKED_DOMAINS = frozenset({"wsj.com", "ft.com", "bloomberg.com", "barrons.com"})
+_BLOCKED_SUFFIXES = tuple("." + domain for domain in _BLOCKED_DOMAINS)
+_HOST_RE = re.compile(r"https?://(?:www\.)?([^/:?#]+)", re.IGNORECASE)
+# Joins block texts for the single whitespace pass, never produced by the parser
+_BLOCK_SEP = "\x00"
+
+
+def parse_page(html: Union[bytes, str], url: str, summary: str = "") -> tuple[str, bool]:
+    # Plain text from a fetched article page, summary fallback when nothing usable.
+    # Raw bytes are preferred so the parser detects the charset itself; module level so
+    # the parse pool can pickle it
+    try:
+        raw = html.encode() if isinstance(html, str) else html
+        if not _CONTENT_TAG_RE.search(raw):
+            logger.debug("No content tags, using summary", url=url[:60])
+            return (summary if summary else "No content available", False)
+        
+        # Charset comes from the bytes and <meta charset>; Lexbor would assume UTF-8
+        tree = HTMLParser(raw, detect_encoding=True, use_meta_tags=True, decode_errors="replace")
+        
+        content = ""
+        for selector in _CONTENT_SELECTORS:
+            # Raw block texts collapsed in one regex pass; keeps the space between inline
+            # elements that per-node stripping glued together
+            joined = _WHITESPACE_RE.sub(" ", _BLOCK_SEP.join(node.text() for node in tree.css(selector)))
+            content = "\n".join(
+                block for block in map(str.strip, joined.split(_BLOCK_SEP)) if len(block) > _MIN_BLOCK_CHARS
+            )
+            if content:
+                break
+        
+        if not content or not content.strip():
+            logger.debug("No content found, using summary", url=url[:60])
+            return (summary if summary else "No content available", False)
+        
+        if len(content) > 10000:
+            content = content[:10000]
+            logger.debug("Truncated content", url=url[:60])
+        
+        return (content, True)
+    except Exception as e:
+        logger.warning("Failed to parse article", url=url[:60], error=str(e))
+        return (summary if summary else "No content available", False)
+
 
 class NewsScraper:
     # Gets article metadata and full text
     
+    # Max tickers fetched from Finnhub at once
+    _FETCH_WORKERS = 16
+    # Company news is reused this long, re-runs and retries inside it skip Finnhub
+    _NEWS_CACHE_TTL = 300
+    _NEWS_CACHE_SIZE = 512
+    # Hosts whose pages fail this many times in a row are skipped for _HOST_BLOCK_SECONDS;
+    # any successful fetch resets the count
+    _HOST_FAILURE_LIMIT = 3
+    _HOST_BLOCK_SECONDS = 3600
+    _HOST_BLOCK_SIZE = 1024
+    
     def __init__(self):
-        # Configure requests session
+        # Configure requests session, sized for concurrent fetches
         self.session = requests.Session()
         self.session.headers.update({
             "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
         })
+        adapter = HTTPAdapter(pool_connections=16, pool_maxsize=32)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
         self.finnhub_key = settings.finnhub_key
+        # Paces company-news calls across worker threads instead of a fixed sleep per ticker
+        self.rate_limiter = RateLimiter(settings.finnhub_calls_per_minute, 60)
+        self._executor = ThreadPoolExecutor(
+            max_workers=min(self._FETCH_WORKERS, max(1, len(settings.stocks))),
+            thread_name_prefix="news-fetch"
+        )
+        self._parse_pool: Optional[ProcessPoolExecutor] = None
+        self._news_cache = TTLCache(maxsize=self._NEWS_CACHE_SIZE, ttl=self._NEWS_CACHE_TTL)
+        self._news_cache_lock = threading.Lock()
+        self._host_failures: Dict[str, int] = {}
+        self._failing_hosts = TTLCache(maxsize=self._HOST_BLOCK_SIZE, ttl=self._HOST_BLOCK_SECONDS)
+        self._host_lock = threading.Lock()
         logger.info("News scraper initialized")
     
     def fetch_news_for_ticker(self, ticker: str) -> List[Dict[str, Any]]:
-        # Get last 24h news from Finnhub
+        # Get last 24h news from Finnhub; successful answers are cached per (ticker, day)
         today = datetime.now(timezone.utc)
         yesterday = today - timedelta(days=1)
         
+        cache_key = (ticker, today.date())
+        with self._news_cache_lock:
+            cached = self._news_cache.get(cache_key)
+        if cached is not None:
+            logger.debug("Finnhub news cache hit", ticker=ticker, count=len(cached))
+            return list(cached)
+        
         url = (
             f"https://finnhub.io/api/v1/company-news?"
             f"symbol={ticker}&from={yesterday.strftime('%Y-%m-%d')}&to={today.strftime('%Y-%m-%d')}"
@@ -36,9 +130,10 @@ class NewsScraper:
         )
         
         try:
+            self.rate_limiter.wait_if_needed()
             response = self.session.get(url, timeout=10)
             response.raise_for_status()
-            news_items = response.json()
+            news_items = orjson.loads(response.content)
             
             articles = []
             for item in news_items[:20]:
@@ -52,47 +147,118 @@ class NewsScraper:
                 })
             
             logger.info("Fetched Finnhub news", ticker=ticker, count=len(articles))
-            return articles
+            with self._news_cache_lock:
+                self._news_cache[cache_key] = articles
+            return list(articles)
         except Exception as e:
             logger.error("Failed to fetch Finnhub news", ticker=ticker, error=str(e))
             return []
     
     
+    def _host(self, url: str) -> Optional[str]:
+        # Lowercased host without www., None for anything that is not an http(s) URL
+        match = _HOST_RE.match(url)
+        return match.group(1).lower() if match else None
+    
+    def _is_blocked(self, url: str) -> bool:
+        # Known paywalled domain or a host that failed repeatedly within the block window
+        host = self._host(url)
+        if host is None:
+            return False
+        if host in _BLOCKED_DOMAINS or host.endswith(_BLOCKED_SUFFIXES):
+            return True
+        with self._host_lock:
+            return host in self._failing_hosts
+    
+    def _record_failure(self, url: str):
+        # Count a failed fetch against its host, blocking it for a while after too many in a row
+        host = self._host(url)
+        if host is None:
+            return
+        with self._host_lock:
+            self._host_failures[host] = failures = self._host_failures.get(host, 0) + 1
+            if failures < self._HOST_FAILURE_LIMIT:
+                return
+            self._host_failures.pop(host, None)
+            self._failing_hosts[host] = True
+        logger.info("Host keeps failing, pausing fetches", host=host, failures=failures, seconds=self._HOST_BLOCK_SECONDS)
+    
+    def _record_success(self, url: str):
+        # A page came back, so earlier failures were not a pattern
+        host = self._host(url)
+        if host is None:
+            return
+        with self._host_lock:
+            self._host_failures.pop(host, None)
+    
     def scrape_article_content(self, url: str, summary: str = "") -> tuple[str, bool]:
-        # Extract plain text from article URL
+        # Extract plain text from article URL, reading at most MAX_PAGE_BYTES of an HTML body
+        if self._is_blocked(url):
+            logger.debug("Blocked host, using summary", url=url[:60])
+            return (summary if summary else "No content available", False)
         try:
-            response = self.session.get(url, timeout=15)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.text, "html.parser")
-            
-            paragraphs = soup.find_all(["p", "article", "div"])
-            content = "\n".join([
-                p.get_text(strip=True) for p in paragraphs 
-                if len(p.get_text(strip=True)) > 40
-            ])
-            
-            if not content or not content.strip():
-                logger.debug("No content found, using summary", url=url[:60])
-                return (summary if summary else "No content available", False)
-            
-            if len(content) > 10000:
-                content = content[:10000]
-                logger.debug("Truncated content", url=url[:60])
-            
-            return (content, True)
+            with self.session.get(url, timeout=15, stream=True) as response:
+                response.raise_for_status()
+                if not is_html(response.headers.get("Content-Type")):
+                    logger.debug("Skipping non-HTML page", url=url[:60], content_type=response.headers.get("Content-Type"))
+                    return (summary if summary else "No content available", False)
+                body = bytearray()
+                for chunk in response.iter_content(PAGE_CHUNK_BYTES):
+                    body += chunk
+                    if len(body) >= MAX_PAGE_BYTES:
+                        break
         except Exception as e:
             logger.warning("Failed to scrape article", url=url[:60], error=str(e))
+            self._record_failure(url)
             return (summary if summary else "No content available", False)
+        self._record_success(url)
+        return self.parse_article_content(bytes(body[:MAX_PAGE_BYTES]), url, summary)
+    
+    def scrape_articles_content(self, articles: List[Dict[str, Any]]) -> List[tuple[str, bool]]:
+        # scrape_article_content for many articles, pages fetched concurrently
+        if not articles:
+            return []
+        return asyncio.run(self._ascrape_articles_content(articles))
+    
+    def _get_parse_pool(self) -> ProcessPoolExecutor:
+        # Parsing is CPU-bound, so it gets its own processes; spawned since this process runs threads
+        if self._parse_pool is None:
+            self._parse_pool = ProcessPoolExecutor(
+                max_workers=os.cpu_count(),
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._parse_pool
+    
+    async def _ascrape_articles_content(self, articles: List[Dict[str, Any]]) -> List[tuple[str, bool]]:
+        # Fetch every page on the event loop, parse them across the process pool
+        pages = await fetch_all([article["url"] for article in articles if not self._is_blocked(article["url"])])
+        for url, page in pages.items():
+            if page is None:
+                self._record_failure(url)
+            else:
+                self._record_success(url)
+        loop = asyncio.get_running_loop()
+        pool = self._get_parse_pool()
+        
+        async def parse(article: Dict[str, Any]) -> tuple[str, bool]:
+            summary = article.get("summary", "")
+            html = pages.get(article["url"])
+            if not html:
+                return (summary if summary else "No content available", False)
+            return await loop.run_in_executor(pool, parse_page, html, article["url"], summary)
+        
+        return list(await asyncio.gather(*(parse(article) for article in articles)))
+    
+    def parse_article_content(self, html: Union[bytes, str], url: str, summary: str = "") -> tuple[str, bool]:
+        # Plain text from a fetched article page, summary fallback when nothing usable
+        return parse_page(html, url, summary)
     
     def scrape_all(self, tickers: List[str]) -> List[Dict[str, Any]]:
-        # Batch fetch for multiple symbols
+        # Batch fetch for multiple symbols, tickers run concurrently in ticker order
         all_articles = []
         
-        for ticker in tickers:
-            articles = self.fetch_news_for_ticker(ticker)
+        for articles in self._executor.map(self.fetch_news_for_ticker, tickers):
             all_articles.extend(articles)
-            time.sleep(1)
         
         logger.info("News fetching complete", total_articles=len(all_articles))
         return all_articles
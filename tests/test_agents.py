@@ -1,10 +1,27 @@
 # Agent unit tests
+import asyncio
+import time
+from datetime import date
 import pytest
-from unittest.mock import Mock, MagicMock
+import orjson
+from decimal import Decimal
+from types import SimpleNamespace
+from unittest.mock import Mock, MagicMock, AsyncMock
+from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
 
-from backend.agents import TraderAgent, BullAgent, BearAgent
+from backend.agents import (
+    TraderAgent,
+    BullAgent,
+    BearAgent,
+    DebateOrchestrator,
+    PortfolioManagerAgent,
+    NewsCleaningAgent,
+)
 from backend.database import DatabaseClient
-from backend.clients import LLMClient, FinnhubClient
+from backend.graph import TradingGraph
+from backend.config import settings
+from backend.clients import LLMClient, FinnhubClient, AlpacaClient
+from backend.database.models import TradeProposal, SnapshotView, AnalysisBundle, ExecutedTrade
 
 
 @pytest.fixture
@@ -12,9 +29,15 @@ def mock_db():
     # Mock DB with default responses
     db = Mock(spec=DatabaseClient)
     db.get_recent_articles.return_value = []
-    db.get_latest_snapshot.return_value = {"price": 150.0}
+    db.get_latest_snapshot.return_value = SnapshotView(ticker="AAPL", price=150.0)
     db.get_recent_trades.return_value = []
+    db.get_analysis_bundle.return_value = AnalysisBundle(
+        articles=[],
+        snapshot=SnapshotView(ticker="AAPL", price=150.0),
+        recent_trades=[]
+    )
     db.save_analysis_event.return_value = 1
+    db.get_executed_trade_for_proposal.return_value = None
     return db
 
 
@@ -38,6 +61,15 @@ def mock_finnhub():
     return finnhub
 
 
+@pytest.fixture
+def mock_alpaca():
+    # Mock Alpaca account state
+    alpaca = Mock(spec=AlpacaClient)
+    alpaca.get_account.return_value = {"cash": Decimal("10000.00"), "buying_power": Decimal("10000.00")}
+    alpaca.get_positions.return_value = []
+    return alpaca
+
+
 def test_trader_agent_analyze(mock_db, mock_llm, mock_finnhub):
     # Ensure trader can parse tickers
     agent = TraderAgent(mock_db, mock_llm, mock_finnhub)
@@ -48,6 +80,52 @@ def test_trader_agent_analyze(mock_db, mock_llm, mock_finnhub):
     assert result["ticker"] == "AAPL"
 
 
+def test_trader_parse_analysis_fast_path_matches_json():
+    # The regex path and the full decode agree; other shapes keep every key
+    flat = '{"is_interesting": true, "reasoning": "Beat \\"estimates\\"", "confidence": 82}'
+    assert TraderAgent._parse_analysis(flat) == orjson.loads(flat)
+    extra = '{"is_interesting": false, "reasoning": "Test", "needs_debate": false, "confidence": 10}'
+    assert TraderAgent._parse_analysis(extra)["needs_debate"] is False
+
+
+def test_trader_analyze_tickers_batches(mock_db, mock_llm, mock_finnhub):
+    # One LLM call and one insert for a small watchlist
+    mock_db.get_recent_articles_bulk.return_value = {"AAPL": [{"title": "Apple beats"}], "MSFT": []}
+    mock_db.get_latest_snapshots.return_value = {
+        "AAPL": SnapshotView(ticker="AAPL", price=150.0),
+        "MSFT": SnapshotView(ticker="MSFT", price=400.0)
+    }
+    mock_db.save_analysis_events.return_value = [11, 12]
+    mock_llm.gather_many = AsyncMock(return_value=[
+        '{"results": [{"ticker": "MSFT", "is_interesting": false, "reasoning": "quiet", "confidence": 20},'
+        ' {"ticker": "AAPL", "is_interesting": true, "reasoning": "earnings", "confidence": 80}]}'
+    ])
+    agent = TraderAgent(mock_db, mock_llm, mock_finnhub)
+    results = agent.analyze_tickers(["AAPL", "MSFT"])
+    
+    assert len(mock_llm.gather_many.call_args[0][0]) == 1
+    mock_llm.chat_completion.assert_not_called()
+    assert mock_db.save_analysis_events.call_count == 1
+    assert results["AAPL"]["event_id"] == 11
+    assert results["AAPL"]["analysis"]["is_interesting"] is True
+    assert results["MSFT"]["event_id"] == 12
+
+
+def test_self_analyze_many_round_trip(mock_db, mock_llm, mock_finnhub):
+    # Queued deep dives become proposals once the batch completes
+    mock_llm.batch_request.side_effect = lambda custom_id, messages, **kwargs: {"custom_id": custom_id}
+    mock_llm.submit_batch.return_value = "batch_1"
+    mock_llm.poll_batch.side_effect = [None, {"AAPL:5": '{"action": "BUY", "quantity": 2, "reasoning": "r", "confidence_score": 80}'}]
+    mock_db.save_trade_proposal.return_value = 9
+    agent = TraderAgent(mock_db, mock_llm, mock_finnhub)
+    
+    assert agent.self_analyze_many([("AAPL", 5)]) == "batch_1"
+    assert mock_llm.submit_batch.call_args[0][0] == [{"custom_id": "AAPL:5"}]
+    assert agent.collect_self_analyze_batch("batch_1") is None
+    proposals = agent.collect_self_analyze_batch("batch_1")
+    assert [(p.ticker, p.action, p.analysis_event_id, p.id) for p in proposals] == [("AAPL", "BUY", 5, 9)]
+
+
 def test_bull_agent(mock_db, mock_llm):
     # Check bull case generation
     mock_llm.chat_completion.return_value = "This stock is great!"
@@ -67,3 +145,257 @@ def test_bear_agent(mock_db, mock_llm):
     assert argument is not None
     assert len(argument) > 0
 
+
+
+async def _stream(*deltas):
+    # Fake streamed completion
+    for delta in deltas:
+        yield delta
+
+
+def test_debate_runs_bull_and_bear_async(mock_db, mock_llm):
+    # Both sides stream through the async client, consensus is awaited on the same loop
+    mock_llm.astream_chat_completion.side_effect = [_stream("Bull", " case"), _stream("Bear", " case")]
+    mock_llm.acached_chat_completion = AsyncMock(return_value="Balanced view")
+    mock_db.save_debate.return_value = 7
+    orchestrator = DebateOrchestrator(mock_db, mock_llm)
+    debate = orchestrator.conduct_debate("AAPL", 1)
+    
+    assert mock_llm.astream_chat_completion.call_count == 2
+    assert debate.bull_argument == "Bull case"
+    assert debate.bear_argument == "Bear case"
+    assert debate.final_consensus == "Balanced view"
+    assert debate.id == 7
+    mock_llm.chat_completion.assert_not_called()
+
+
+def test_review_proposals_single_call(mock_db, mock_llm, mock_alpaca):
+    # One LLM request for the whole batch, hard rules still applied
+    mock_llm.chat_completion.return_value = '{"decisions": [{"decision": "APPROVE", "reasoning": "ok"}, {"decision": "APPROVE", "reasoning": "ok"}]}'
+    agent = PortfolioManagerAgent(mock_db, mock_llm, mock_alpaca)
+    proposals = [
+        TradeProposal(ticker="AAPL", action="BUY", quantity=1, reasoning="r", confidence_score=80),
+        TradeProposal(ticker="MSFT", action="BUY", quantity=1, reasoning="r", confidence_score=50),
+        TradeProposal(ticker="NVDA", action="BUY", quantity=1, reasoning="r", confidence_score=90),
+    ]
+    decisions = agent.review_proposals(proposals)
+    
+    assert mock_llm.chat_completion.call_count == 1
+    assert mock_alpaca.get_account.call_count == 1
+    assert [d["decision"] for d in decisions] == ["APPROVE", "REJECT", "APPROVE"]
+
+
+def test_review_proposal_skips_llm_for_low_confidence(mock_db, mock_llm, mock_alpaca):
+    # Below 70 is rejected before any account or LLM lookup
+    agent = PortfolioManagerAgent(mock_db, mock_llm, mock_alpaca)
+    proposal = TradeProposal(ticker="AAPL", action="BUY", quantity=1, reasoning="r", confidence_score=65)
+    decision = agent.review_proposal(proposal)
+    
+    assert decision["decision"] == "REJECT"
+    mock_llm.chat_completion.assert_not_called()
+    mock_alpaca.get_account.assert_not_called()
+
+
+def test_wait_for_fill_keeps_polling_after_failed_poll(mock_db, mock_llm, mock_alpaca):
+    # One failed status poll is retried on the next interval, within the fill deadline
+    mock_alpaca.get_order.side_effect = [ConnectionError("reset"), {"status": "filled"}]
+    agent = PortfolioManagerAgent(mock_db, mock_llm, mock_alpaca)
+    
+    assert agent._wait_for_fill({"id": "order-1", "status": "new"}) == "filled"
+    assert mock_alpaca.get_order.call_count == 2
+
+
+def test_execute_trade_drops_cached_account_state(mock_db, mock_llm, mock_alpaca):
+    # The pre-trade account snapshot is not reused once the order is in
+    mock_alpaca.submit_order.return_value = {"id": "order-1", "price": 150.0}
+    mock_db.save_executed_trade.return_value = 7
+    agent = PortfolioManagerAgent(mock_db, mock_llm, mock_alpaca)
+    agent._account_state = (time.monotonic(), {"buying_power": Decimal("1000")}, [], {})
+    proposal = TradeProposal(id=1, ticker="AAPL", action="BUY", quantity=2, reasoning="r", confidence_score=80)
+    
+    executed = agent.execute_trade(proposal, {"decision": "APPROVE", "reasoning": "ok"})
+    
+    assert executed.id == 7
+    assert agent._account_state is None
+
+
+def test_debate_context_drops_duplicate_articles(mock_db, mock_llm):
+    # Republished wire copy should only be sent once
+    story = "Apple reported record quarterly revenue driven by strong iPhone and services sales growth"
+    articles = [
+        {"content_text": story},
+        {"content_text": story + "."},
+        {"content_text": "Regulators opened a new antitrust probe into the company's app store fees"},
+    ]
+    orchestrator = DebateOrchestrator(mock_db, mock_llm)
+    texts = orchestrator._select_article_texts(articles)
+    
+    assert len(texts) == 2
+
+
+def test_news_cleaning_skips_llm_for_clean_html(mock_llm):
+    # Well-formed article HTML is parsed locally
+    body = "Apple Inc. (NASDAQ: AAPL) reported quarterly results that beat analyst expectations. " * 5
+    html = (
+        '<html><head><title>Apple beats</title>'
+        '<meta property="article:published_time" content="2024-01-05T14:30:00Z"></head>'
+        f'<body><nav>Menu</nav><article><p>{body}</p></article></body></html>'
+    )
+    agent = NewsCleaningAgent(mock_llm)
+    cleaned = agent.clean_article(html, raw_article_id=1, ticker="AAPL")
+    
+    mock_llm.extract_article_json.assert_not_called()
+    assert cleaned.ticker == "AAPL"
+    assert cleaned.title == "Apple beats"
+    assert cleaned.is_usable
+    assert cleaned.llm_response is None
+
+
+def test_news_cleaning_other_ticker_goes_to_llm(mock_llm):
+    # A page that only cites a different company is left to the LLM's relevance check
+    mock_llm.chat_model = "test-model"
+    mock_llm.extract_article_json.return_value = {"title": "Apple beats", "content_text": "text", "is_usable": False}
+    body = "Apple Inc. (NASDAQ: AAPL) reported quarterly results that beat analyst expectations. " * 5
+    html = f"<html><head><title>Apple beats</title></head><body><article><p>{body}</p></article></body></html>"
+    agent = NewsCleaningAgent(mock_llm)
+    cleaned = agent.clean_article(html, raw_article_id=1, ticker="MSFT")
+    
+    mock_llm.extract_article_json.assert_called_once_with(html, "MSFT")
+    assert not cleaned.is_usable
+    assert cleaned.llm_model == "test-model"
+
+
+def test_news_cleaning_batch_uses_async_llm(mock_llm):
+    # Items the parser can't handle fall through to async extraction
+    mock_llm.chat_model = "test-model"
+    mock_llm.aextract_article_json.return_value = {"title": "T", "content_text": "text", "is_usable": False}
+    agent = NewsCleaningAgent(mock_llm)
+    cleaned = agent.clean_articles([("<html>short</html>", 1, "AAPL"), ("<html>also short</html>", 2, "MSFT")])
+    
+    assert [c.raw_article_id for c in cleaned] == [1, 2]
+    assert mock_llm.aextract_article_json.await_count == 2
+    assert all(c.llm_model == "test-model" for c in cleaned)
+
+
+def test_debate_context_drops_semantic_duplicates(mock_db, mock_llm):
+    # Rewrites with near-identical embeddings collapse to one source
+    mock_db.get_article_embeddings.return_value = {1: [1.0, 0.0], 2: [0.99, 0.05], 3: [0.0, 1.0]}
+    articles = [
+        {"id": 1, "has_embedding": True, "content_text": "Apple shares rally after strong earnings report"},
+        {"id": 2, "has_embedding": True, "content_text": "Strong quarterly results lift Apple stock higher"},
+        {"id": 3, "has_embedding": True, "content_text": "Apple faces new antitrust scrutiny in Europe"},
+        {"id": 4, "has_embedding": False, "content_text": "Apple shares rally after strong earnings report"},
+    ]
+    orchestrator = DebateOrchestrator(mock_db, mock_llm)
+    texts = orchestrator._select_article_texts(articles)
+    
+    assert len(texts) == 2
+
+
+def test_review_flags_buying_power_in_decimal(mock_db, mock_llm, mock_alpaca):
+    # Cash check stays exact, one cent over is flagged
+    agent = PortfolioManagerAgent(mock_db, mock_llm, mock_alpaca)
+    proposal = TradeProposal(ticker="AAPL", action="BUY", quantity=3, reasoning="r", confidence_score=80, proposed_price=Decimal("3333.34"))
+    context = agent._proposal_context(proposal, mock_alpaca.get_account.return_value, {})
+    
+    assert context["required_cash"] == Decimal("10000.02")
+    assert context["needs_buying_power"] is True
+
+
+def test_review_prompt_puts_portfolio_before_proposal(mock_db, mock_llm, mock_alpaca):
+    # Shared state leads the prompt so it can be prefix-cached
+    mock_llm.chat_completion.return_value = '{"decision": "APPROVE", "reasoning": "ok"}'
+    agent = PortfolioManagerAgent(mock_db, mock_llm, mock_alpaca)
+    agent.review_proposal(TradeProposal(ticker="AAPL", action="BUY", quantity=1, reasoning="r", confidence_score=80))
+    
+    messages = mock_llm.chat_completion.call_args[0][0]
+    shared, proposal = messages[1]["content"].split(PortfolioManagerAgent._PROPOSAL_SEPARATOR)
+    assert '"buying_power"' in shared and "AAPL" not in shared
+    assert '"ticker": "AAPL"' in proposal
+
+
+def test_orchestrators_share_debaters(mock_db, mock_llm):
+    # Recreating the orchestrator reuses the same bull/bear agents
+    first = DebateOrchestrator(mock_db, mock_llm)
+    second = DebateOrchestrator(mock_db, mock_llm)
+    
+    assert first.bull is second.bull
+    assert first.bear is second.bear
+
+
+def test_trading_graph_holds_portfolio_lock_until_execute(mock_db, mock_llm, mock_finnhub, mock_alpaca):
+    # A second ticker's review waits until the first ticker's approved trade has executed
+    graph = TradingGraph(mock_db, mock_llm, mock_finnhub, mock_alpaca)
+    calls = []
+    graph.portfolio = Mock()
+    graph.portfolio.review_proposal.side_effect = lambda p: calls.append(("review", p.ticker)) or {"decision": "APPROVE"}
+    graph.portfolio.execute_trade.side_effect = lambda p, d: calls.append(("execute", p.ticker))
+    
+    def state(ticker):
+        proposal = TradeProposal(ticker=ticker, action="BUY", quantity=1, reasoning="r", confidence_score=80)
+        return {"ticker": ticker, "trade_proposal": proposal, "portfolio_decision": None, "error": None}
+    
+    async def scenario():
+        first, second = state("AAPL"), state("MSFT")
+        await graph._review_proposal(first)
+        second_review = asyncio.create_task(graph._review_proposal(second))
+        await asyncio.sleep(0.2)
+        await graph._execute_trade(first)
+        await second_review
+        await graph._execute_trade(second)
+    
+    asyncio.run(scenario())
+    assert calls == [("review", "AAPL"), ("execute", "AAPL"), ("review", "MSFT"), ("execute", "MSFT")]
+
+
+def test_execute_trade_skips_already_executed_proposal(mock_db, mock_llm, mock_alpaca):
+    # A resumed run does not send a second order for a recorded trade
+    recorded = ExecutedTrade(id=3, trade_proposal_id=1, ticker="AAPL", action="BUY", quantity=2, execution_price=Decimal("150"))
+    mock_db.get_executed_trade_for_proposal.return_value = recorded
+    agent = PortfolioManagerAgent(mock_db, mock_llm, mock_alpaca)
+    proposal = TradeProposal(id=1, ticker="AAPL", action="BUY", quantity=2, reasoning="r", confidence_score=80)
+    
+    assert agent.execute_trade(proposal, {"decision": "APPROVE"}) is recorded
+    mock_alpaca.submit_order.assert_not_called()
+
+
+def test_submit_order_returns_existing_order_for_client_id():
+    # A repeated client_order_id picks up the order Alpaca already accepted
+    client = AlpacaClient.__new__(AlpacaClient)
+    client.client = Mock()
+    client.client.submit_order.side_effect = Exception("client_order_id must be unique")
+    client.client.get_order_by_client_order_id.return_value = SimpleNamespace(
+        id="order-1", symbol="AAPL", qty="2", side="buy", status="filled", type="market", filled_avg_price="150.5"
+    )
+    
+    order = client.submit_order("AAPL", 2, "BUY", client_order_id="proposal-1-main")
+    
+    assert order["id"] == "order-1"
+    assert client.client.submit_order.call_args.kwargs["client_order_id"] == "proposal-1-main"
+
+
+def test_trading_graph_resumes_only_same_cycle(mock_db, mock_llm, mock_finnhub, mock_alpaca, tmp_path, monkeypatch):
+    # A checkpoint waiting on execute_trade is resumed in its own cycle and dropped in a later one
+    monkeypatch.setattr(settings, "graph_checkpoint_path", str(tmp_path / "graph.sqlite"))
+    graph = TradingGraph(mock_db, mock_llm, mock_finnhub, mock_alpaca)
+    graph.portfolio = Mock()
+    graph.portfolio.execute_trade.return_value = None
+    not_interesting = {"analysis": {"is_interesting": False}}
+    
+    async def interrupt_before_execute(cycle_id):
+        config = {"configurable": {"trading_graph": graph, "thread_id": f"AAPL-{date.today().isoformat()}"}}
+        proposal = TradeProposal(id=1, ticker="AAPL", action="BUY", quantity=1, reasoning="r", confidence_score=80)
+        async with AsyncSqliteSaver.from_conn_string(settings.graph_checkpoint_path) as checkpointer:
+            saved = graph.graph.copy(update={"checkpointer": checkpointer})
+            await saved.aupdate_state(config, {
+                "ticker": "AAPL", "cycle_id": cycle_id, "trade_proposal": proposal,
+                "portfolio_decision": {"decision": "APPROVE"}, "error": None
+            }, as_node="review_proposal")
+    
+    asyncio.run(interrupt_before_execute("old"))
+    asyncio.run(graph.arun("AAPL", not_interesting, cycle_id="new"))
+    graph.portfolio.execute_trade.assert_not_called()
+    
+    asyncio.run(interrupt_before_execute("same"))
+    asyncio.run(graph.arun("AAPL", not_interesting, cycle_id="same"))
+    assert graph.portfolio.execute_trade.call_count == 1
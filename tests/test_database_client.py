@@ -1,6 +1,7 @@
 # Database integration tests
 import pytest
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
 from decimal import Decimal
 
 from backend.database import DatabaseClient
@@ -9,13 +10,17 @@ from backend.database.models import (
     ArticleCleaned,
     ArticleEmbedding,
     StockSnapshot,
+    TradeProposal,
+    ExecutedTrade,
 )
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def db_client():
-    # Test DB instance
-    return DatabaseClient()
+    # One pool for the whole run; tests use distinct urls/tickers instead of per-test cleanup
+    client = DatabaseClient()
+    yield client
+    client.close()
 
 
 def test_save_raw_article(db_client):
@@ -29,6 +34,31 @@ def test_save_raw_article(db_client):
     assert article_id is not None
 
 
+def test_save_raw_article_duplicate_keeps_id(db_client):
+    # Re-scraping a url returns the stored row's id
+    article = ArticleRaw(
+        url="https://example.com/dup",
+        raw_html="<html>First</html>",
+        ticker="AAPL"
+    )
+    first_id = db_client.save_raw_article(article)
+    second_id = db_client.save_raw_article(article.model_copy(update={"raw_html": "<html>Second</html>"}))
+    assert second_id == first_id
+
+
+def test_save_raw_articles_bulk(db_client):
+    # Ids come back in input order, repeated urls share one row
+    articles = [
+        ArticleRaw(url="https://example.com/bulk1", raw_html="<html>1</html>", ticker="AAPL"),
+        ArticleRaw(url="https://example.com/bulk2", raw_html="<html>2</html>", ticker="MSFT"),
+        ArticleRaw(url="https://example.com/bulk1", raw_html="<html>1b</html>", ticker="AAPL"),
+    ]
+    ids = db_client.save_raw_articles_bulk(articles)
+    assert len(ids) == 3
+    assert ids[0] == ids[2]
+    assert ids[0] != ids[1]
+
+
 def test_save_cleaned_article(db_client):
     # Save processed news
     raw_article = ArticleRaw(
@@ -50,6 +80,25 @@ def test_save_cleaned_article(db_client):
     assert cleaned_id is not None
 
 
+def test_save_raw_and_cleaned_article(db_client):
+    # Both rows land in one statement and link up
+    raw_id, cleaned_id = db_client.save_raw_and_cleaned_article(
+        ArticleRaw(url="https://example.com/test-both", raw_html="<html>Both</html>", ticker="AAPL"),
+        ArticleCleaned(
+            title="Both",
+            ticker="AAPL",
+            content_text="Apple content",
+            is_usable=True,
+            timestamp=datetime.utcnow(),
+            llm_response={"title": "Both"}
+        )
+    )
+    assert raw_id is not None
+    article = db_client.get_article_by_id(cleaned_id)
+    assert article["raw_article_id"] == raw_id
+    assert article["raw_html"] == "<html>Both</html>"
+
+
 def test_save_stock_snapshot(db_client):
     # Save price data
     snapshot = StockSnapshot(
@@ -61,8 +110,34 @@ def test_save_stock_snapshot(db_client):
         open_price=Decimal("150.00"),
         close_price=Decimal("150.50")
     )
-    snapshot_id = db_client.save_stock_snapshot(snapshot)
-    assert snapshot_id is not None
+    saved = db_client.save_stock_snapshot(snapshot)
+    assert saved is not None
+    assert saved.id is not None
+    assert saved.price == 150.5
+
+
+def test_save_stock_snapshots(db_client):
+    # Bulk insert returns the stored rows keyed by ticker
+    saved = db_client.save_stock_snapshots([
+        StockSnapshot(ticker="AAPL", price=Decimal("151.00")),
+        StockSnapshot(ticker="NVDA", price=Decimal("900.00"))
+    ])
+    assert saved["AAPL"].price == 151.0
+    assert saved["NVDA"].id is not None
+    assert db_client.get_latest_snapshot("NVDA").price == 900.0
+
+
+def test_snapshot_partition_takes_over_default_rows(db_client):
+    # A month written before its partition existed moves out of the default partition
+    snapshot_time = datetime(2099, 1, 15, tzinfo=timezone.utc)
+    db_client.save_stock_snapshot(StockSnapshot(ticker="PART", price=Decimal("1.00"), snapshot_time=snapshot_time))
+    db_client._execute_query(
+        "SELECT create_stock_snapshot_partitions(%s, %s) IS NULL AS ok", (snapshot_time, snapshot_time)
+    )
+    rows = db_client._execute_query(
+        "SELECT DISTINCT tableoid::regclass::text AS part FROM stock_snapshots WHERE ticker = 'PART'", readonly=True
+    )
+    assert [row["part"] for row in rows] == ["stock_snapshots_2099_01"]
 
 
 def test_get_latest_snapshot(db_client):
@@ -76,7 +151,17 @@ def test_get_latest_snapshot(db_client):
     
     latest = db_client.get_latest_snapshot("MSFT")
     assert latest is not None
-    assert latest["ticker"] == "MSFT"
+    assert latest.ticker == "MSFT"
+    assert latest.price == 300.0
+
+
+def test_get_recent_snapshots_are_views(db_client):
+    # Tuple rows map onto SnapshotView fields positionally
+    db_client.save_stock_snapshot(StockSnapshot(ticker="AMZN", price=Decimal("180.25"), volume=500))
+    snapshots = db_client.get_recent_snapshots("AMZN", hours=1)
+    assert snapshots[0].price == 180.25
+    assert snapshots[0].volume == 500
+    assert snapshots[0].data_source == "finnhub"
 
 
 def test_get_recent_articles(db_client):
@@ -101,3 +186,186 @@ def test_get_recent_articles(db_client):
     articles = db_client.get_recent_articles(ticker="GOOGL", hours=24)
     assert len(articles) > 0
 
+
+
+def test_iter_recent_articles_columns(db_client):
+    # Streamed rows carry only the requested columns
+    raw_id = db_client.save_raw_article(ArticleRaw(
+        url="https://example.com/test-stream",
+        raw_html="<html>Test</html>",
+        ticker="META"
+    ))
+    db_client.save_cleaned_article(ArticleCleaned(
+        raw_article_id=raw_id,
+        title="Streamed Article",
+        ticker="META",
+        content_text="Meta content",
+        is_usable=True,
+        timestamp=datetime.utcnow()
+    ))
+    
+    rows = list(db_client.iter_recent_articles(ticker="META", hours=24, columns=["id", "title"]))
+    assert len(rows) > 0
+    assert set(rows[0]) == {"id", "title"}
+
+
+def test_get_recent_articles_preview_only(db_client):
+    # Preview reads carry the stored prefix instead of the full body
+    raw_id = db_client.save_raw_article(ArticleRaw(
+        url="https://example.com/test-preview",
+        raw_html="<html>Test</html>",
+        ticker="NFLX"
+    ))
+    db_client.save_cleaned_article(ArticleCleaned(
+        raw_article_id=raw_id,
+        title="Long Article",
+        ticker="NFLX",
+        content_text="x" * 5000,
+        is_usable=True,
+        timestamp=datetime.utcnow()
+    ))
+    
+    articles = db_client.get_recent_articles(ticker="NFLX", hours=24, preview_only=True)
+    assert len(articles) > 0
+    assert "content_text" not in articles[0]
+    assert len(articles[0]["content_preview"]) == 1000
+
+
+def test_get_analysis_bundle(db_client):
+    # Previews, snapshot and trades come back from one query
+    db_client.save_stock_snapshot(StockSnapshot(ticker="AMZN", price=Decimal("180.00")))
+    raw_id = db_client.save_raw_article(ArticleRaw(
+        url="https://example.com/test-bundle",
+        raw_html="<html>Test</html>",
+        ticker="AMZN"
+    ))
+    db_client.save_cleaned_article(ArticleCleaned(
+        raw_article_id=raw_id,
+        title="Bundle Article",
+        ticker="AMZN",
+        content_text="Amazon content",
+        is_usable=True,
+        timestamp=datetime.utcnow()
+    ))
+    
+    bundle = db_client.get_analysis_bundle("AMZN")
+    assert bundle.snapshot.price == 180.0
+    assert bundle.articles[0]["content_preview"] == "Amazon content"
+    assert isinstance(bundle.recent_trades, list)
+
+
+def test_save_executed_trade_marks_proposal(db_client):
+    # Trade row and proposal status are written together
+    proposal_id = db_client.save_trade_proposal(TradeProposal(
+        ticker="AAPL",
+        action="BUY",
+        quantity=1,
+        reasoning="Test"
+    ))
+    trade_id = db_client.save_executed_trade(
+        ExecutedTrade(
+            trade_proposal_id=proposal_id,
+            ticker="AAPL",
+            action="BUY",
+            quantity=1,
+            execution_price=Decimal("150.00")
+        ),
+        mark_proposal_executed=True
+    )
+    assert trade_id is not None
+    assert proposal_id not in [p["id"] for p in db_client.get_pending_proposals()]
+
+
+def test_cleaned_article_to_db_row():
+    # JSONB column is sent as text and the preview falls back to the content
+    article = ArticleCleaned(
+        raw_article_id=7,
+        title="Test",
+        content_text="x" * 2000,
+        is_usable=True,
+        llm_response={"ticker": "AAPL", "at": datetime(2024, 1, 1)}
+    )
+    row = article.to_db_row()
+    assert row[0] == 7
+    assert len(row[4]) == 1000
+    assert isinstance(row[9], str)
+    assert '"ticker":"AAPL"' in row[9]
+
+
+def test_update_proposal_statuses(db_client):
+    # Several transitions land in one call
+    ids = [
+        db_client.save_trade_proposal(TradeProposal(ticker="AAPL", action="BUY", quantity=1, reasoning="Test"))
+        for _ in range(2)
+    ]
+    db_client.update_proposal_statuses([(ids[0], "REJECTED"), (ids[1], "APPROVED")])
+    pending_ids = [p["id"] for p in db_client.get_pending_proposals()]
+    assert ids[0] not in pending_ids
+    assert ids[1] not in pending_ids
+
+
+def test_cleaned_article_exists_after_save(db_client):
+    # A saved pair is reported as cleaned, an unknown one is not
+    db_client.save_raw_and_cleaned_article(
+        ArticleRaw(url="https://example.com/seen", raw_html="<html>Seen</html>", ticker="AAPL"),
+        ArticleCleaned(title="Seen", ticker="AAPL", content_text="Apple content", is_usable=True)
+    )
+    assert db_client.cleaned_article_exists("https://example.com/seen", "AAPL")
+    assert not db_client.cleaned_article_exists("https://example.com/unseen", "AAPL")
+
+
+def test_get_article_context(db_client):
+    # Related rows come back grouped by kind
+    db_client.save_trade_proposal(TradeProposal(ticker="ORCL", action="BUY", quantity=1, reasoning="Test"))
+    context = db_client.get_article_context("ORCL")
+    assert set(context) == {"analysis", "debates", "proposals"}
+    assert context["proposals"][0]["ticker"] == "ORCL"
+
+
+def test_get_recent_proposals(db_client):
+    # Newest first, trimmed to the dashboard columns
+    db_client.save_trade_proposal(TradeProposal(ticker="NFLX", action="HOLD", quantity=0, reasoning="Test"))
+    proposals = db_client.get_recent_proposals(limit=1)
+    assert len(proposals) == 1
+    assert proposals[0]["ticker"] == "NFLX"
+    assert "debate_id" not in proposals[0]
+
+
+def test_cleaned_articles_existing(db_client):
+    # Only the saved pair comes back from the batch check
+    db_client.save_raw_and_cleaned_article(
+        ArticleRaw(url="https://example.com/batch-seen", raw_html="<html>Seen</html>", ticker="AAPL"),
+        ArticleCleaned(title="Seen", ticker="AAPL", content_text="Apple content", is_usable=True)
+    )
+    pairs = [("https://example.com/batch-seen", "AAPL"), ("https://example.com/batch-unseen", "AAPL")]
+    assert db_client.cleaned_articles_existing(pairs) == {("https://example.com/batch-seen", "AAPL")}
+
+
+def test_save_raw_and_cleaned_articles(db_client):
+    # Both pairs land, the repeated url shares one raw row
+    raw = ArticleRaw(url="https://example.com/batch-pair", raw_html="<html>Pair</html>", ticker="AAPL")
+    items = [
+        (raw, ArticleCleaned(title="Pair", ticker="AAPL", content_text="Apple content", is_usable=True)),
+        (raw, ArticleCleaned(title="Pair", ticker="MSFT", content_text="Microsoft content", is_usable=True)),
+    ]
+    ids = db_client.save_raw_and_cleaned_articles(items)
+    assert ids[0][0] == ids[1][0]
+    assert ids[0][1] != ids[1][1]
+    assert db_client.cleaned_article_exists("https://example.com/batch-pair", "MSFT")
+
+
+def test_checkout_waits_for_free_connection(db_client):
+    # More concurrent readers than pooled connections queue up instead of raising PoolError
+    def query(_):
+        return db_client._execute_query("SELECT pg_sleep(0.05) IS NULL AS ok", readonly=True)[0]["ok"]
+    
+    with ThreadPoolExecutor(max_workers=32) as pool:
+        results = list(pool.map(query, range(32)))
+    assert all(results)
+
+
+def test_cached_reads_are_caller_owned(db_client):
+    # Mutating a cached result does not leak into the next read
+    trades = db_client.get_recent_trades(ticker="NOTRADES", days=1)
+    trades.append({"ticker": "NOTRADES"})
+    assert db_client.get_recent_trades(ticker="NOTRADES", days=1) == []